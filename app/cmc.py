@@ -1,82 +1,104 @@
 import os
 import sys
 import logging
-from logging.config import fileConfig
 
 from diskcache import Cache
 
-from main.adm_command_processor import ADMCommandProcessor
-from main.cli.cli_parser import parse_command_line_statement, COMMAND, CLI_TYPE, ADM, GIT, ICE, LOKI
-from main.config.configuration import ConfigSingleton, get_configuration_dict
+from main.cli.cli_parser import parse_command_line_statement, COMMAND, CLI_TYPE, ADM, GIT, ICE, LOKI, SERVE, PORT, LOGIN
+from main.cli.daemon_client import forward_to_daemon
+from main.config.configuration import ConfigSingleton, get_configuration_dict, configure_logging
 from main.config.constants import CACHE_REF, OPTIONS, ICE_CFG, ADM_CFG, CIRRUS_CFG, TABLE, OUTPUT, ENV, REGION, LOKI_CFG
-from main.gitlab_command_processor import GitLabCommandProcessor
-from main.http.cirrus_session_proxy import obtain_cookies_from_cirrus_driver
-from main.ice_command_processor import ICECommandProcessor
-from main.loki_command_processor import LokiCommandProcessor
-from main.message_processor import MessageProcessor
-from main.utils.utils import get_merged_app_cfg, unpack_config, cookies_file_exists
+from main.utils.utils import get_merged_app_cfg, unpack_config
+
+# Note the command processors are imported within action_cli_statement() as required, each pulls in heavy third party
+# libraries (selenium, elasticsearch, python-gitlab, bs4 etc) that most commands do not need
 
 CACHE_HOME = os.path.join(os.path.dirname(__file__), '../cache')
 
-LOGGING_CONFIG_FILE = os.path.join(os.path.dirname(__file__), './resources/logging_config.ini')
-fileConfig(LOGGING_CONFIG_FILE)
+configure_logging()
 logger = logging.getLogger('main')
 
 
 def main():
+    # Hand the command over to a running daemon if there is one, skipping all local setup
+    exit_code = forward_to_daemon(sys.argv)
+    if exit_code is not None:
+        sys.exit(exit_code)
+
     # Read in config
     config = ConfigSingleton(get_configuration_dict())
 
     with Cache(CACHE_HOME) as cache_ref:
+        config.set(CACHE_REF, cache_ref)
         # Parse the cli command, if the cmd is not well formed then it prints an error and exits
         parsed_cli_parameters_dict = parse_command_line_statement(sys.argv)
 
-        options = parsed_cli_parameters_dict.get(OPTIONS)
-        env = options.get(ENV)
-        region = options.get(REGION)
+        if parsed_cli_parameters_dict[CLI_TYPE] == SERVE:
+            from main.cli.daemon import serve_commands
+            # Processors are kept per env & region so their sessions and clients stay warm between requests
+            warm_processors = {}
+            serve_commands(lambda arguments_list: action_cli_statement(config, parse_command_line_statement(arguments_list), warm_processors),
+                           parsed_cli_parameters_dict[OPTIONS].get(PORT))
+        else:
+            action_cli_statement(config, parsed_cli_parameters_dict)
 
-        config.set(CACHE_REF, cache_ref)
-        # Handle all cirrus, log and ice commands
-        if parsed_cli_parameters_dict[CLI_TYPE] == COMMAND:
-            merged_app_cfg = get_merged_app_cfg(config, CIRRUS_CFG, options)
-            # Hand over the message processor to action
-            processor = MessageProcessor(options)
-            # Obtain the cirrus cookies if not present, but only for commands that require Cirrus
-            # TODO list messages for ice currently still fetches cirrus cookies
-            if processor.is_cirrus_based_request(parsed_cli_parameters_dict):
-                if not cookies_file_exists(config, CIRRUS_CFG, env, region):
-                    logger.debug("No Cirrus cookie found, logging in")
-                    obtain_cookies_from_cirrus_driver(merged_app_cfg)
-                    logger.debug("Selenium process completed")
-                else:
-                    logger.debug("Already logged into Cirrus, we have cookie, not logging in")
-            processor.action_cli_request(parsed_cli_parameters_dict, merged_app_cfg)
-
-        # Handle ADM commands
-        elif parsed_cli_parameters_dict[CLI_TYPE] == ADM:
-            merged_app_cfg = get_merged_app_cfg(config, ADM_CFG, options)
-            processor = ADMCommandProcessor()
-            processor.action_cli_request(parsed_cli_parameters_dict, merged_app_cfg)
-
-        # Handle GIT commands
-        elif parsed_cli_parameters_dict[CLI_TYPE] == GIT:
-            processor = GitLabCommandProcessor()
-            processor.action_cli_request(parsed_cli_parameters_dict)
-
-        # Handle ICE commands
-        elif parsed_cli_parameters_dict[CLI_TYPE] == ICE:
-            merged_app_cfg = get_merged_app_cfg(config, ICE_CFG, options)
-            options = merged_app_cfg[ICE_CFG][OPTIONS]
-            # Override output to Table
-            options[OUTPUT] = TABLE
-            processor = ICECommandProcessor()
-            processor.action_cli_request(parsed_cli_parameters_dict, merged_app_cfg)
-
-        # Handle Loki log search command
-        elif parsed_cli_parameters_dict[CLI_TYPE] == LOKI:
-            merged_app_cfg = get_merged_app_cfg(config, LOKI_CFG, options)
-            processor = LokiCommandProcessor()
-            processor.action_cli_request(parsed_cli_parameters_dict, merged_app_cfg)
+
+def action_cli_statement(config, parsed_cli_parameters_dict, warm_processors=None):
+    options = parsed_cli_parameters_dict.get(OPTIONS)
+    env = options.get(ENV)
+    region = options.get(REGION)
+
+    # Handle all cirrus, log and ice commands
+    if parsed_cli_parameters_dict[CLI_TYPE] == COMMAND:
+        from main.message_processor import MessageProcessor
+        merged_app_cfg = get_merged_app_cfg(config, CIRRUS_CFG, options)
+        # Hand over the message processor to action
+        warm_processor = warm_processors.get((env, region)) if warm_processors is not None else None
+        processor = MessageProcessor(options, warm_processor)
+        if warm_processors is not None:
+            warm_processors[(env, region)] = processor
+        # Obtain the cirrus cookies if not present, but only for commands that require Cirrus
+        # TODO list messages for ice currently still fetches cirrus cookies
+        if processor.is_cirrus_based_request(parsed_cli_parameters_dict):
+            from main.http.cirrus_login_proxy import ensure_cirrus_cookies
+            ensure_cirrus_cookies(merged_app_cfg)
+        processor.action_cli_request(parsed_cli_parameters_dict, merged_app_cfg)
+
+    # Handle ADM commands
+    elif parsed_cli_parameters_dict[CLI_TYPE] == ADM:
+        from main.adm_command_processor import ADMCommandProcessor
+        merged_app_cfg = get_merged_app_cfg(config, ADM_CFG, options)
+        processor = ADMCommandProcessor()
+        processor.action_cli_request(parsed_cli_parameters_dict, merged_app_cfg)
+
+    # Handle GIT commands
+    elif parsed_cli_parameters_dict[CLI_TYPE] == GIT:
+        from main.gitlab_command_processor import GitLabCommandProcessor
+        processor = GitLabCommandProcessor()
+        processor.action_cli_request(parsed_cli_parameters_dict)
+
+    # Handle ICE commands
+    elif parsed_cli_parameters_dict[CLI_TYPE] == ICE:
+        from main.ice_command_processor import ICECommandProcessor
+        merged_app_cfg = get_merged_app_cfg(config, ICE_CFG, options)
+        options = merged_app_cfg[ICE_CFG][OPTIONS]
+        # Override output to Table
+        options[OUTPUT] = TABLE
+        processor = ICECommandProcessor()
+        processor.action_cli_request(parsed_cli_parameters_dict, merged_app_cfg)
+
+    # Handle logging into the sites ahead of other commands
+    elif parsed_cli_parameters_dict[CLI_TYPE] == LOGIN:
+        from main.login_command_processor import LoginCommandProcessor
+        processor = LoginCommandProcessor()
+        processor.action_cli_request(parsed_cli_parameters_dict)
+
+    # Handle Loki log search command
+    elif parsed_cli_parameters_dict[CLI_TYPE] == LOKI:
+        from main.loki_command_processor import LokiCommandProcessor
+        merged_app_cfg = get_merged_app_cfg(config, LOKI_CFG, options)
+        processor = LokiCommandProcessor()
+        processor.action_cli_request(parsed_cli_parameters_dict, merged_app_cfg)
 
 
 if __name__ == '__main__':
@@ -1,21 +1,24 @@
 import json
 import logging
-from logging.config import fileConfig
 
-from main.cli.cli_parser import LOCATIONS, CONFIGS, ARTIFACTS, SCRIPTS, VERSIONS
-from main.config.configuration import ConfigSingleton, LOGGING_CONFIG_FILE
-from main.config.constants import FUNCTION, PROJECT, GROUP, OPTIONS, DataType, OUTPUT, TABLE
+from main.cli.cli_parser import LOCATIONS, CONFIGS, ARTIFACTS, SCRIPTS, VERSIONS, SNAPSHOT
+from main.config.configuration import ConfigSingleton
+from main.config.constants import FUNCTION, PROJECT, GROUP, OPTIONS, DataType, OUTPUT, TABLE, ADM_LOCATIONS, ADM_CONFIGS, \
+    ADM_VERSIONS, ADM_SCRIPTS, ADM_ARTIFACTS
 from main.formatter.formatter import Formatter, DynamicFormatter
 from main.http.adm_proxy import ADMProxy
 
 from main.utils.utils import error_and_exit
 
-fileConfig(LOGGING_CONFIG_FILE)
 logger = logging.getLogger('main')
+message_logger = logging.getLogger('message')
 
 
 class ADMCommandProcessor:
     """Main class that takes cli arguments and actions them by communicating with ADM"""
+    SNAPSHOT_DATA_TYPES = {ADM_LOCATIONS: (LOCATIONS, DataType.adm_locations), ADM_CONFIGS: (CONFIGS, DataType.adm_configs),
+                           ADM_VERSIONS: (VERSIONS, DataType.adm_versions), ADM_SCRIPTS: (SCRIPTS, DataType.adm_scripts),
+                           ADM_ARTIFACTS: (ARTIFACTS, DataType.adm_artifacts)}
 
     def __init__(self):
         self.configuration = ConfigSingleton()
@@ -41,6 +44,10 @@ class ADMCommandProcessor:
         logger.info("Received CLI request for function: {}".format(function_to_call))
         logger.debug("CLI command is: {}".format(str(cli_dict)))
 
+        if function_to_call == SNAPSHOT:
+            self.format_snapshot(project, group, options, merged_app_cfg)
+            return
+
         if function_to_call == LOCATIONS:
             if project:
                 result = self.adm_proxy.get_locations_for_project(project, merged_app_cfg)
@@ -56,7 +63,7 @@ class ADMCommandProcessor:
             elif group:
                 result = self.adm_proxy.get_configs_for_group(group, merged_app_cfg)
             else:
-                result = self.adm_proxy.get_configs(merged_app_cfg, merged_app_cfg)
+                result = self.adm_proxy.get_configs(merged_app_cfg)
             data_type = DataType.adm_configs
 
         elif function_to_call == VERSIONS:
@@ -88,4 +95,16 @@ class ADMCommandProcessor:
 
         else:
             error_and_exit(f"Unknown command passed for ADM: {function_to_call}")
-        self.formatter.format(data_type, result, options)
\ No newline at end of file
+        self.formatter.format(data_type, result, options)
+
+    def format_snapshot(self, project, group, options, merged_app_cfg):
+        """Formats every ADM page, each one as soon as it has been fetched"""
+        project_names = None
+        if project:
+            project_names = {project}
+        elif group:
+            project_names = set(self.adm_proxy.get_group_projects(group))
+        for url_key, result in self.adm_proxy.iter_snapshot(merged_app_cfg, project_names):
+            command_name, data_type = self.SNAPSHOT_DATA_TYPES[url_key]
+            message_logger.info("ADM {}:".format(command_name))
+            self.formatter.format(data_type, result, options)
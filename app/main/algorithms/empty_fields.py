@@ -1,17 +1,15 @@
 import logging
-from logging.config import fileConfig
 from enum import Enum
 from lxml import etree
 from lxml.etree import Element
 
-from main.config.configuration import LOGGING_CONFIG_FILE
 from main.config.constants import PAYLOAD, FIELDS, INDEX, DOCUMENT_LINES, HEADER_FIELDS, DOCUMENTS, MESSAGE_ID, \
     FIELD_TYPE
 import json
 
 from main.model.model_utils import MissingPayloadException
+from main.utils.json_stream import IncrementalJsonReader, sniff_payload_format, JSON_FORMAT, XML_FORMAT
 
-fileConfig(LOGGING_CONFIG_FILE)
 logger = logging.getLogger('parser')
 
 
@@ -35,6 +33,10 @@ def is_empty_data(field):
     return False
 
 
+def to_field_set(fields_list):
+    return frozenset(fields_list) if fields_list else None
+
+
 class DocumentFieldsParser:
     def __init__(self, kwargs):
         self.document_header_root   = kwargs["document_header_root"] if "document_header_root" in kwargs else None
@@ -44,11 +46,23 @@ class DocumentFieldsParser:
         self.line_include_fields = kwargs["line_include_fields"] if "line_include_fields" in kwargs else None
         self.line_exclude_fields = kwargs["line_exclude_fields"] if "line_exclude_fields" in kwargs else None
         self.type = EmptyFieldParseType.from_str(kwargs[FIELD_TYPE]) if FIELD_TYPE in kwargs else EmptyFieldParseType.all
+        # Compile the field filters once, membership is then tested against sets and resolved per tag only once
+        self._header_include_set = to_field_set(self.header_include_fields)
+        self._header_exclude_set = to_field_set(self.header_exclude_fields)
+        self._line_include_set = to_field_set(self.line_include_fields)
+        self._line_exclude_set = to_field_set(self.line_exclude_fields)
+        self._header_filter_table = {}
+        self._line_filter_table = {}
 
     def parse(self, payload_obj):
-        logger.debug("Parsing document for type: {}".format(self.type))
+        logger.debug("Parsing document for type: %s", self.type)
         if payload_obj:
             payload_str = payload_obj.get(PAYLOAD)
+            payload_format = sniff_payload_format(payload_str)
+            if payload_format == JSON_FORMAT:
+                return self._parse_json_stream(payload_str)
+            elif payload_format == XML_FORMAT:
+                return self._parse_xml_document(payload_str)
             try:
                 json_payload = json.loads(payload_str)
                 return self._parse_json_document(json_payload)
@@ -81,17 +95,59 @@ class DocumentFieldsParser:
             logger.error("Failed to find document header root to parse from payload: {}".format(self.document_header_root))
         return document_results_map
 
-    def _parse_single_json_document(self, document, document_index=1):
+    def _parse_json_stream(self, payload_str):
+        """Walks the documents and their lines one at a time rather than loading the whole payload"""
+        reader = IncrementalJsonReader(payload_str)
+        if reader.peek() != '{' or not self.document_header_root:
+            return self._parse_json_document(json.loads(payload_str))
+
+        document_results_map = {}
+        documents_list = []
+        document_results_map[DOCUMENTS] = documents_list
+        has_document_root = False
+        for key in reader.iter_object_keys():
+            if key != self.document_header_root:
+                continue
+            has_document_root = True
+            documents_list.clear()
+            if reader.peek() == '[':
+                for document_index, _ in enumerate(reader.iter_array_items(), 1):
+                    documents_list.append(self._parse_streamed_json_document(reader, document_index))
+            else:
+                documents_list.append(self._parse_streamed_json_document(reader, 1))
+        if not has_document_root:
+            logger.error("Failed to find document header root to parse from payload: {}".format(self.document_header_root))
+        return document_results_map
+
+    def _parse_streamed_json_document(self, reader, document_index):
+        if reader.peek() != '{' or not self.document_lines_root or not self._parse_lines():
+            return self._parse_single_json_document(reader.decode_value(), document_index)
+        document = {}
+        lines_result_map = None
+        for key in reader.iter_object_keys():
+            if key == self.document_lines_root and reader.peek() == '[':
+                lines_result_map = self._parse_json_document_lines(reader.iter_array_values())
+                # The header checks only need to know whether there were any lines
+                document[key] = range(reader.last_array_length)
+            else:
+                document[key] = reader.decode_value()
+        return self._parse_single_json_document(document, document_index, lines_result_map)
+
+    def _parse_single_json_document(self, document, document_index=1, lines_result_map=None):
         result_document_object = {INDEX: document_index}
         # Parse document header fields
-        empty_header_field_names = self._get_empty_json_header_fields(document)
-        result_document_object[HEADER_FIELDS] = empty_header_field_names
-        # Now parse document lines
-        if self.document_lines_root and self._parse_lines() and self.document_lines_root in document.keys():
+        result_document_object[HEADER_FIELDS] = self._get_json_header_fields(document)
+        # Now parse document lines, unless they have already been streamed
+        if lines_result_map is not None:
+            result_document_object[DOCUMENT_LINES] = lines_result_map
+        elif self.document_lines_root and self._parse_lines() and self.document_lines_root in document.keys():
             lines_result_map = self._parse_json_document_lines(document[self.document_lines_root])
             result_document_object[DOCUMENT_LINES] = lines_result_map
         return result_document_object
 
+    def _get_json_header_fields(self, document):
+        return self._get_empty_json_header_fields(document)
+
     def _get_empty_json_header_fields(self, document):
         """pulls out all the empty (or whatever test) fields and ensure that the document lines field name is not present"""
         empty_header_field_names = []
@@ -178,10 +234,20 @@ class DocumentFieldsParser:
         return result
 
     def _filter_header_fields(self, current_field):
-        return self._filter_field(current_field, self.header_include_fields, self.header_exclude_fields)
+        try:
+            return self._header_filter_table[current_field]
+        except KeyError:
+            result = self._filter_field(current_field, self._header_include_set, self._header_exclude_set)
+            self._header_filter_table[current_field] = result
+            return result
 
     def _filter_line_fields(self, current_field):
-        return self._filter_field(current_field, self.line_include_fields, self.line_exclude_fields)
+        try:
+            return self._line_filter_table[current_field]
+        except KeyError:
+            result = self._filter_field(current_field, self._line_include_set, self._line_exclude_set)
+            self._line_filter_table[current_field] = result
+            return result
 
     @staticmethod
     def _filter_field(current_field, include_list, exclude_list):
@@ -211,28 +277,23 @@ class DocumentMandatoryFieldsParser(DocumentFieldsParser):
         super().__init__(kwargs)
         self.document_header_mandatory_fields = kwargs["document_header_mandatory_fields"] if "document_header_mandatory_fields" in kwargs else None
         self.document_lines_mandatory_fields  = kwargs["document_lines_mandatory_fields"] if "document_lines_mandatory_fields" in kwargs else None
+        self._header_mandatory_set = to_field_set(self.document_header_mandatory_fields)
+        self._lines_mandatory_set = to_field_set(self.document_lines_mandatory_fields)
 
     def _field_predicate(self, field):
         return is_empty_data(field)
 
-    def _parse_single_json_document(self, document, document_index=1):
-        result_document_object = {INDEX: document_index}
+    def _get_json_header_fields(self, document):
         missing_mandatory_header_field_names = []
         if self._parse_header():
-            filtered_header_fields = [key for key in document.keys() if self._filter_header_fields(key)]
-            missing_mandatory_header_field_names = self.__get_missing_mandatory_fields(self.document_header_mandatory_fields, filtered_header_fields, document)
-        result_document_object[HEADER_FIELDS] = missing_mandatory_header_field_names
-        if self.document_lines_root and self._parse_lines() and self.document_lines_root in document.keys():
-            lines_result_map = self._parse_json_document_lines(document[self.document_lines_root])
-            result_document_object[DOCUMENT_LINES] = lines_result_map
-        return result_document_object
+            missing_mandatory_header_field_names = self.__get_missing_mandatory_fields(self.document_header_mandatory_fields, self._filter_header_fields, document)
+        return missing_mandatory_header_field_names
 
     def _parse_json_document_lines(self, document_lines):
         result_line_list = []
         for line_index, line in enumerate(document_lines, 1):
             line_object = {}
-            filtered_line_fields = [key for key in line.keys() if self._filter_line_fields(key)]
-            missing_mandatory_line_field_names = self.__get_missing_mandatory_fields(self.document_lines_mandatory_fields, filtered_line_fields, line)
+            missing_mandatory_line_field_names = self.__get_missing_mandatory_fields(self.document_lines_mandatory_fields, self._filter_line_fields, line)
             if missing_mandatory_line_field_names:
                 line_object[INDEX] = line_index
                 line_object[FIELDS] = missing_mandatory_line_field_names
@@ -242,13 +303,11 @@ class DocumentMandatoryFieldsParser(DocumentFieldsParser):
     def _parse_single_xml_document(self, document_node, document_index=1):
         result_document_object = {INDEX: document_index}
         missing_mandatory_header_field_names = []
-        document_fields = [header_field.tag for header_field in document_node]
+        mandatory_field_nodes, lines_node = self.__index_xml_fields(document_node, self._header_mandatory_set, self._filter_header_fields, self.document_lines_root)
         if self._parse_header():
-            filtered_header_fields = [header_field for header_field in document_fields if self._filter_header_fields(header_field)]
-            missing_mandatory_header_field_names = self.__get_missing_mandatory_fields_for_xml(self.document_header_mandatory_fields, filtered_header_fields, document_node)
+            missing_mandatory_header_field_names = self.__get_missing_mandatory_fields_for_xml(self.document_header_mandatory_fields, mandatory_field_nodes)
         result_document_object[HEADER_FIELDS] = missing_mandatory_header_field_names
-        if self.document_lines_root and self._parse_lines() and self.document_lines_root in document_fields:
-            lines_node = document_node.find(self.document_lines_root)
+        if self.document_lines_root and self._parse_lines() and lines_node is not None:
             lines_result_map = self._parse_xml_document_lines(lines_node)
             result_document_object[DOCUMENT_LINES] = lines_result_map
         return result_document_object
@@ -257,30 +316,43 @@ class DocumentMandatoryFieldsParser(DocumentFieldsParser):
         result_line_list = []
         for line_index, line_element in enumerate(document_lines_node, 1):
             line_object = {}
-            filtered_line_fields = [line_field.tag for line_field in line_element if self._filter_line_fields(line_field.tag)]
-            missing_mandatory_line_field_names = self.__get_missing_mandatory_fields_for_xml(self.document_lines_mandatory_fields, filtered_line_fields, line_element)
+            mandatory_field_nodes, _ = self.__index_xml_fields(line_element, self._lines_mandatory_set, self._filter_line_fields)
+            missing_mandatory_line_field_names = self.__get_missing_mandatory_fields_for_xml(self.document_lines_mandatory_fields, mandatory_field_nodes)
             if missing_mandatory_line_field_names:
                 line_object[INDEX] = line_index
                 line_object[FIELDS] = missing_mandatory_line_field_names
                 result_line_list.append(line_object)
         return result_line_list
 
-    def __get_missing_mandatory_fields(self, mandatory_fields_list, filtered_document_fields_list, document):
+    def __get_missing_mandatory_fields(self, mandatory_fields_list, field_filter, document):
         missing_mandatory_field_names = []
         if mandatory_fields_list:
             for mandatory_field in mandatory_fields_list:
-                if not mandatory_field in filtered_document_fields_list:
+                if mandatory_field not in document or not field_filter(mandatory_field):
                     missing_mandatory_field_names.append(mandatory_field)
                 elif self._field_predicate(document[mandatory_field]):
                     missing_mandatory_field_names.append(mandatory_field)
         return missing_mandatory_field_names
 
-    def __get_missing_mandatory_fields_for_xml(self, mandatory_fields_list, filtered_document_fields_list, document_line_node):
+    @staticmethod
+    def __index_xml_fields(node, mandatory_fields_set, field_filter, lines_root=None):
+        """Single pass over the child elements, returning the first filtered node per mandatory tag and the lines node"""
+        mandatory_field_nodes = {}
+        lines_node = None
+        for child_node in node:
+            tag = child_node.tag
+            if lines_root and lines_node is None and tag == lines_root:
+                lines_node = child_node
+            if mandatory_fields_set and tag in mandatory_fields_set and tag not in mandatory_field_nodes and field_filter(tag):
+                mandatory_field_nodes[tag] = child_node
+        return mandatory_field_nodes, lines_node
+
+    def __get_missing_mandatory_fields_for_xml(self, mandatory_fields_list, mandatory_field_nodes):
         missing_mandatory_field_names = []
         if mandatory_fields_list:
             for mandatory_field in mandatory_fields_list:
-                line_field = document_line_node.find(mandatory_field)
-                if not mandatory_field in filtered_document_fields_list:
+                line_field = mandatory_field_nodes.get(mandatory_field)
+                if line_field is None:
                     missing_mandatory_field_names.append(mandatory_field)
                 elif self._field_predicate(line_field.text):
                     missing_mandatory_field_names.append(mandatory_field)
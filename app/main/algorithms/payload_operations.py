@@ -1,14 +1,11 @@
 import json
 
 from main.algorithms.payload_predicates import payload_is_json_post_request
-from main.config.configuration import LOGGING_CONFIG_FILE
 from main.config.constants import PAYLOAD
 from collections import Counter, defaultdict
 
 from main.utils.utils import convert_timestamp_to_datetime
 import logging
-from logging.config import fileConfig
-fileConfig(LOGGING_CONFIG_FILE)
 logger = logging.getLogger('main')
 
 
@@ -1,10 +1,7 @@
 import logging
-from logging.config import fileConfig
 
-from main.config.configuration import LOGGING_CONFIG_FILE
 from main.config.constants import TRACKING_POINT, PAYLOAD, URL
 
-fileConfig(LOGGING_CONFIG_FILE)
 logger = logging.getLogger('parser')
 
 
@@ -1,43 +1,54 @@
 import logging
 import re
-from logging.config import fileConfig
+from concurrent.futures.thread import ThreadPoolExecutor
 
-from main.config.configuration import LOGGING_CONFIG_FILE
 from main.config.constants import VALIDATE, TRANSFORM
 from main.model.model_utils import translate_step_type_to_payload_type, \
     SuspectedMissingTransformsException, \
-    obtain_transform_details_from_payload_tracking_point, get_matching_transform_and_step
+    obtain_transform_details_from_payload_tracking_point, build_transform_index, lookup_transform_and_step
 
-fileConfig(LOGGING_CONFIG_FILE)
 logger = logging.getLogger('main')
 
+URL_VARIABLE_REGEX = re.compile(r'\$\{(\w+)\}')
+ENV_VARIABLE = "${ENV}"
+ENV_REPLACEMENT_VALUES = ["live", "PRD", "prd"]
+MAX_URL_RESOLUTION_WORKERS = 6
+
 
 class PayloadTransformMapper:
     HEADINGS = ["tracking-point", "type", "transform-step-name", "url", "transform-step-type"]
 
-    def __init__(self, payloads, transforms, cirrus_proxy):
+    def __init__(self, payloads, transforms, cirrus_proxy, resolved_url_cache=None):
         self.payloads = payloads
         self.transforms = transforms
+        self.transform_index = build_transform_index(transforms)
         self.mapping_records = []
         self.cirrus_proxy = cirrus_proxy
+        # Maps a url still containing ${ENV} to its probed url, can be shared between mappers
+        self.resolved_url_cache = resolved_url_cache if resolved_url_cache is not None else {}
 
     def reset(self, transforms):
         self.transforms = transforms
+        self.transform_index = build_transform_index(transforms)
         self.mapping_records = []
 
     def map(self):
         if not self.payloads:
             return
         missing_transforms = 0
+        matched_payloads = []
         for current_payload in self.payloads:
             transform_details_tuple = obtain_transform_details_from_payload_tracking_point(current_payload)
             if transform_details_tuple:
                 stage_type, transform_name, transform_step_name = transform_details_tuple
-                transform_obj, transform_step = get_matching_transform_and_step(self.transforms, stage_type, transform_name, transform_step_name)
+                transform_obj, transform_step = lookup_transform_and_step(self.transform_index, stage_type, transform_name, transform_step_name)
                 if not transform_step and stage_type in [TRANSFORM, VALIDATE]:
                     missing_transforms = missing_transforms + 1
             else:
                 transform_obj, transform_step = (None, None)
+            matched_payloads.append((current_payload, transform_obj, transform_step))
+        self._prefetch_env_resolved_urls(matched_payloads)
+        for current_payload, transform_obj, transform_step in matched_payloads:
             self.mapping_records.append(self._create_record(current_payload, transform_obj, transform_step))
         if missing_transforms:
             raise SuspectedMissingTransformsException()
@@ -54,15 +65,35 @@ class PayloadTransformMapper:
             new_record['transform-step-type'] = transform_step.get("transform-step-type")
         return new_record
 
+    def _prefetch_env_resolved_urls(self, matched_payloads):
+        """Probe all the distinct ${ENV} urls concurrently, rather than one HEAD request at a time per step"""
+        url_templates = []
+        for _, transform_obj, transform_step in matched_payloads:
+            if not transform_step or not transform_step.get("url"):
+                continue
+            url_template, has_env_variable = self._substitute_url_variables(transform_obj, transform_step.get("url"))
+            if has_env_variable and url_template not in self.resolved_url_cache and url_template not in url_templates:
+                url_templates.append(url_template)
+        if len(url_templates) > 1:
+            with ThreadPoolExecutor(max_workers=min(MAX_URL_RESOLUTION_WORKERS, len(url_templates))) as executor:
+                list(executor.map(self._resolve_env_variable, url_templates))
+
     def _get_variable_resolved_url(self, transform_obj, transform_step):
         """Cirrus transforms can have variable in their xsl/xsd files, so attempt to resolve them here"""
         current_url = transform_step.get("url")
-        if not current_url:
+        if not current_url or not URL_VARIABLE_REGEX.search(current_url):
             return current_url
-        variable_names = re.findall(r'\$\{(\w+)\}', current_url)
+        new_url_str, has_env_variable = self._substitute_url_variables(transform_obj, current_url)
+        # Now apply a targeted guess and issue a http head request to confirm
+        if has_env_variable:
+            new_url_str = self._resolve_env_variable(new_url_str)
+        logger.info("Resolved the following transform url: {} to {}".format(current_url, new_url_str))
+        return new_url_str
+
+    def _substitute_url_variables(self, transform_obj, current_url):
+        """Replaces the variables that have literal values, returning the url and whether ${ENV} still needs resolving"""
+        variable_names = URL_VARIABLE_REGEX.findall(current_url)
         variable_mappings = {}
-        if not variable_names:
-            return current_url
 
         # Create a map of variable name to variable value from the defined transform settings
         for current_variable in variable_names:
@@ -79,7 +110,7 @@ class PayloadTransformMapper:
                 if k == "ENV":
                     has_env_variable = True
                 pass
-            elif v == "${ENV}":
+            elif v == ENV_VARIABLE:
                 # Replace other variables and then try after
                 has_env_variable = True
                 pass
@@ -88,15 +119,22 @@ class PayloadTransformMapper:
                 pass
             else:
                 new_url_str = new_url_str.replace("${" + k + "}", v)
-        # Now apply a targeted guess and issue a http head request to confirm
-        if has_env_variable:
-            # for this we can guess the value given that we are only dealing with PRD
-            for replacement_variable in ["live", "PRD", "prd"]:
-                if self.cirrus_proxy.check_if_valid_url(new_url_str.replace("${ENV}", replacement_variable)):
-                    new_url_str = new_url_str.replace("${ENV}", replacement_variable)
-                    break
-        logger.info("Resolved the following transform url: {} to {}".format(current_url, new_url_str))
-        return new_url_str
+        return new_url_str, has_env_variable
+
+    def _resolve_env_variable(self, url_template):
+        """Guess the ${ENV} value given that we are only dealing with PRD, caching the outcome per url"""
+        try:
+            return self.resolved_url_cache[url_template]
+        except KeyError:
+            pass
+        resolved_url = url_template
+        for replacement_variable in ENV_REPLACEMENT_VALUES:
+            candidate_url = url_template.replace(ENV_VARIABLE, replacement_variable)
+            if self.cirrus_proxy.check_if_valid_url(candidate_url):
+                resolved_url = candidate_url
+                break
+        self.resolved_url_cache[url_template] = resolved_url
+        return resolved_url
 
     def _find_transform_metadata(self, transform_obj, transform_sub_list_name, variable_name):
         for item in transform_obj.get(transform_sub_list_name, []):
@@ -1,4 +1,6 @@
+import logging
 import operator
+from bisect import bisect_left, insort
 from functools import reduce
 
 from main.algorithms.empty_fields import DocumentEmptyFieldsParser, FlattenJsonOutputToCSV, \
@@ -17,7 +19,6 @@ TRANSFORM_STEPS = "transform-steps"
 TRANSFORM_NAME = "transform-name"
 TRANSFORM_CHANNEL = "transform-channel"
 
-fileConfig(LOGGING_CONFIG_FILE)
 logger = logging.getLogger('parser')
 
 """
@@ -60,7 +61,11 @@ class TransformStagesAnalyser:
     def __init__(self, payloads, transforms, cirrus_proxy, filter_options_dict=None):
         self.transform_stages = []
         self.payloads = payloads
+        self.payload_index_map = {}
+        self.first_transform_stage_position = None
         self.results_map = {}
+        # Sorted stage indexes of the results map, kept alongside it
+        self.result_stage_indexes = []
         self.xsl_parser = XSLParser(cirrus_proxy)
         self._is_verbose = filter_options_dict.get(VERBOSE) if filter_options_dict else True
         self._is_quiet = filter_options_dict.get(QUIET) if filter_options_dict else True
@@ -77,6 +82,7 @@ class TransformStagesAnalyser:
             return None
 
         self.transform_stages = []
+        self.payload_index_map = build_payload_index_map(payloads_list)
         current_channel = ""
         for current_transform in transforms_list:
             # current_stage = {}
@@ -91,6 +97,7 @@ class TransformStagesAnalyser:
                     continue
                 self._create_transform_stage(prefix, current_step)
         self._add_remaining_payloads(payloads_list)
+        self._index_transform_stages()
         if self._is_verbose:
             self._output_stage_struct()
     
@@ -117,23 +124,35 @@ class TransformStagesAnalyser:
         stage_name = "{} - {}({})".format(translated_type, prefix, step_name)
         self._create_step(stage_name, step)
 
+    def _new_stage(self, step_name, step=None):
+        return {NAME: step_name, PAYLOAD_INDEX: self.payload_index_map.get(step_name, -1), STEP: step}
+
     def _create_step(self, step_name, step=None):
-        self.transform_stages.append({NAME: step_name,
-                                      PAYLOAD_INDEX: get_payload_index(step_name, self.payloads),
-                                      STEP: step})
+        self.transform_stages.append(self._new_stage(step_name, step))
 
     def _upsert_step(self, step_name, step=None):
-        original_payload_position = get_payload_index(step_name, self.payloads)
-        new_transform_stage = {NAME: step_name, PAYLOAD_INDEX: original_payload_position, STEP: step}
-        transform_stage_payload_indexes = [x[PAYLOAD_INDEX] for x in self.transform_stages]
-        insert_position = 0
-        while insert_position < len(transform_stage_payload_indexes):
-            if original_payload_position > transform_stage_payload_indexes[insert_position]:
-                pass
-            else:
+        self._upsert_steps([self._new_stage(step_name, step)])
+
+    def _upsert_steps(self, new_transform_stages):
+        """Merges the new stages in, each going before the first existing stage with a payload index at least its own"""
+        pending_stages = sorted(new_transform_stages, key=lambda stage: stage[PAYLOAD_INDEX])
+        merged_stages = []
+        pending_position = 0
+        for existing_stage in self.transform_stages:
+            while pending_position < len(pending_stages) and pending_stages[pending_position][PAYLOAD_INDEX] <= existing_stage[PAYLOAD_INDEX]:
+                merged_stages.append(pending_stages[pending_position])
+                pending_position = pending_position + 1
+            merged_stages.append(existing_stage)
+        merged_stages.extend(pending_stages[pending_position:])
+        self.transform_stages = merged_stages
+
+    def _index_transform_stages(self):
+        """Once the stages are in their final order note the position (in reverse order) of the first xslt transform"""
+        self.first_transform_stage_position = None
+        for position, transform_stage in enumerate(reversed(self.transform_stages)):
+            if position > 0 and self._is_xslt_transform(transform_stage):
+                self.first_transform_stage_position = position
                 break
-            insert_position = insert_position + 1
-        self.transform_stages.insert(insert_position, new_transform_stage)
 
     def _get_transform_stage_names(self):
         return [x[NAME] for x in self.transform_stages]
@@ -230,7 +249,7 @@ class TransformStagesAnalyser:
                     return False
 
             else:
-                logger.debug("Ignoring transform stage: [{}]".format(transform_stage[NAME]))
+                logger.debug("Ignoring transform stage: [%s]", transform_stage[NAME])
         return True
 
     def _print_missing_movement_line_fields(self, fields_map):
@@ -250,7 +269,7 @@ class TransformStagesAnalyser:
         return as_list
 
     def _add_stage_results(self, data, stage):
-        logger.debug("Adding data for stage: {}, values: {}".format(stage, data))
+        logger.debug("Adding data for stage: %s, values: %s", stage, data)
         self.results_map[stage] = data
 
     def _add_mapped_stage_results(self, data_map, stage):
@@ -349,6 +368,7 @@ class ConfigurableTransformStagesAnalyser(TransformStagesAnalyser):
             return None
 
         self.transform_stages = []
+        self.payload_index_map = build_payload_index_map(payloads_list)
         current_channel = ""
         # Iterate through top level transforms (each transform can have a number of transform steps)
         for current_transform in transforms_list:
@@ -368,19 +388,23 @@ class ConfigurableTransformStagesAnalyser(TransformStagesAnalyser):
                     self._create_transform_stage(prefix, current_step)
         # Add any additional payloads as indicated by their tracking-points
         self._add_remaining_payloads(payloads_list)
+        self._index_transform_stages()
         if self._is_verbose:
             self._output_stage_struct()
 
     # Overridden
     def _add_remaining_payloads(self, payloads_list):
-        existing_payload_names = self._get_transform_stage_names()
+        existing_payload_names = set(self._get_transform_stage_names())
+        new_transform_stages = []
         for current_payload in payloads_list:
             if current_payload[TRACKING_POINT] in existing_payload_names:
                 continue
             if self.exclude_payloads and current_payload[TRACKING_POINT] in self.exclude_payloads:
                 continue
             if self.include_payloads and current_payload[TRACKING_POINT] in self.include_payloads:
-                self._upsert_step(current_payload[TRACKING_POINT])
+                new_transform_stages.append(self._new_stage(current_payload[TRACKING_POINT]))
+        if new_transform_stages:
+            self._upsert_steps(new_transform_stages)
 
     def _get_missing_fields_set_for_payload(self, payload_object):
         result = self.fields_parser.parse(payload_object)
@@ -405,6 +429,8 @@ class ConfigurableTransformStagesAnalyser(TransformStagesAnalyser):
         # Go through in reverse order
         self.processed_transform_stages = []
         self.processed_transform_stage_names = []
+        self.results_map = {}
+        self.result_stage_indexes = []
         first_payload_index = len(self.transform_stages) - 1
         for index, transform_stage in enumerate(reversed(self.transform_stages)):
             transform_stage_name = transform_stage.get(NAME)
@@ -473,17 +499,22 @@ class ConfigurableTransformStagesAnalyser(TransformStagesAnalyser):
                     return False
 
             else:
-                logger.debug("Ignoring transform stage: [{}], {}".format(transform_stage_name, index))
+                logger.debug("Ignoring transform stage: [%s], %s", transform_stage_name, index)
         return True
 
     def __add_mapped_stage_results_by_index(self, data_map, stage_index):
         fields = list(data_map.keys())
         # Sort the results for easier reading and to align results set
         fields.sort()
-        self.results_map[stage_index] = [data_map[key] for key in fields]
+        self.__set_stage_results_by_index([data_map[key] for key in fields], stage_index)
 
     def __add_stage_results_by_index(self, data, stage_index):
-        logger.debug("Adding data for stage: {}, values: {}".format(stage_index, data))
+        logger.debug("Adding data for stage: %s, values: %s", stage_index, data)
+        self.__set_stage_results_by_index(data, stage_index)
+
+    def __set_stage_results_by_index(self, data, stage_index):
+        if stage_index not in self.results_map:
+            insort(self.result_stage_indexes, stage_index)
         self.results_map[stage_index] = data
 
     def __get_stage_results_by_index(self, stage_index):
@@ -492,18 +523,14 @@ class ConfigurableTransformStagesAnalyser(TransformStagesAnalyser):
         return None
 
     def __get_previous_stage_index(self, index):
-        current_keys = list(self.results_map.keys())
-        current_keys.sort()
-        current_pos = 0
-        last_value = current_keys[0]
-        while current_pos < len(current_keys):
-            if current_keys[current_pos] < index:
-                pass
-            elif index >= current_keys[current_pos]:
-                return None if current_pos == 0 else last_value
-            last_value = current_keys[current_pos]
-            current_pos = current_pos + 1
-        return last_value
+        """The stage indexes are kept sorted as results are added, so this is the preceding index if the given index
+        has results, otherwise the last index with results"""
+        if not self.result_stage_indexes:
+            return None
+        if index in self.results_map:
+            current_pos = bisect_left(self.result_stage_indexes, index)
+            return None if current_pos == 0 else self.result_stage_indexes[current_pos - 1]
+        return self.result_stage_indexes[-1]
 
     def __get_previous_stage_results_by_index(self, index):
         """to get the previous index results from the given index"""
@@ -544,16 +571,10 @@ class ConfigurableTransformStagesAnalyser(TransformStagesAnalyser):
         return None
 
     def _is_first_transform_step(self, index, transform_stage):
-        # We don't consider the first item a transform step
+        # We don't consider the first item a transform step, initial non transforms are skipped over when indexing
         if index == 0:
             return False
-        # Skip over initial non transforms
-        reversed_transforms = list(reversed(self.transform_stages))
-        # reversed_transforms.reverse()
-        for x in range(1, len(self.transform_stages)):
-            if self._is_xslt_transform(reversed_transforms[x]):
-                return x == index
-        return False
+        return self.first_transform_stage_position == index
 
     # Overridden
     def get_results_records(self):
@@ -3,11 +3,9 @@ import re
 from lxml import etree
 from main.utils.utils import clear_quotes
 
-from main.config.configuration import LOGGING_CONFIG_FILE
+from main.config.configuration import configure_logging
 import logging
-from logging.config import fileConfig
 
-fileConfig(LOGGING_CONFIG_FILE)
 logger = logging.getLogger('main')
 
 
@@ -102,4 +100,5 @@ def main():
 
 
 if __name__ == '__main__':
+    configure_logging()
     main()
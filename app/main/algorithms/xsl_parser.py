@@ -1,14 +1,11 @@
 from bs4 import BeautifulSoup, Tag
 
 from main.algorithms.xpath_lookup import get_final_tag_from_xpath, get_attribute_for_tag, get_final_attribute_of_xpath
-from main.config.configuration import get_configuration_dict, ConfigSingleton
+from main.config.configuration import get_configuration_dict, ConfigSingleton, configure_logging
 from main.http.cirrus_proxy import CirrusProxy
 
-from main.config.configuration import LOGGING_CONFIG_FILE
 import logging
-from logging.config import fileConfig
 
-fileConfig(LOGGING_CONFIG_FILE)
 logger = logging.getLogger('main')
 
 SELECT = "select"
@@ -129,11 +126,11 @@ class XSLParser:
                         # attributes_of_children_list = list(filter(self.__is_attribute_with_name(attr), result.children))
                         attributes_of_children_list = [x for x in result.children if self.__is_attribute_with_name(x, attr)]
                         for child in attributes_of_children_list:
-                            logger.debug("Processing potential match from xsl: {}, with attr: {}".format(child.name, child.attrs))
+                            logger.debug("Processing potential match from xsl: %s, with attr: %s", child.name, child.attrs)
                             child_value = self.__get_tag_value_str(child)
-                            logger.debug("Matched child having required attribute, attempting to match values: {} with {}".format(child_value, attr_dict[attr]))
+                            logger.debug("Matched child having required attribute, attempting to match values: %s with %s", child_value, attr_dict[attr])
                             if child_value == attr_dict[attr]:
-                                logger.debug("Found matching result from xsl that has match child attr value: {}:{}".format(attr, attr_dict[attr]))
+                                logger.debug("Found matching result from xsl that has match child attr value: %s:%s", attr, attr_dict[attr])
                                 xpath_lookup_value = get_final_attribute_of_xpath(xpath)
                                 if xpath_lookup_value == search_tag:
                                     return self.__find_xpath(result)
@@ -157,4 +154,5 @@ def main():
 
 
 if __name__ == '__main__':
+    configure_logging()
     main()
@@ -1,16 +1,15 @@
 import argparse
 
-from main.config.constants import FUNCTION, UID, TIME, CSV, JSON, TABLE, RULE, OPTIONS, OUTPUT, START_DATETIME, \
-    END_DATETIME, LIMIT, FILE, ICE, CIRRUS, SYSTEM, REGION, PROJECT, GROUP, PROJECTS, GROUPS, PROJECTS_FOR_TEAM, ENTITY, \
-    BRANCHES, TAGS, COMMITS, PARAMETERS, US, EU, DEV, OAT, PRD, ICE_CFG, QUERY, TEST, PRE
+from main.config.constants import FUNCTION, UID, TIME, CSV, JSON, NDJSON, TABLE, RULE, OPTIONS, OUTPUT, START_DATETIME, \
+    END_DATETIME, LIMIT, UID_FILE, FILE, ICE, CIRRUS, SYSTEM, REGION, PROJECT, GROUP, PROJECTS, GROUPS, PROJECTS_FOR_TEAM, ENTITY, \
+    BRANCHES, TAGS, COMMITS, PARAMETERS, US, EU, DEV, OAT, PRD, ICE_CFG, QUERY, TEST, PRE, REGIONS, CIRRUS_CFG, ADM_CFG, SINCE, UNTIL, \
+    REF_NAME
 
-from main.config.configuration import ConfigSingleton, LOGGING_CONFIG_FILE
+from main.config.configuration import ConfigSingleton
 import logging
-from logging.config import fileConfig
 
 from main.utils.utils import error_and_exit
 
-fileConfig(LOGGING_CONFIG_FILE)
 logger = logging.getLogger('main')
 message_logger = logging.getLogger('message')
 
@@ -25,7 +24,7 @@ DETAIL = 'detail'
 GET_LOGS = "get-logs"
 WEBPACK = "webpack"
 
-output_types_list = [CSV, JSON, TABLE, FILE]
+output_types_list = [CSV, JSON, NDJSON, TABLE, FILE]
 
 environments_list = [PRD, PRE, OAT, TEST, DEV]
 regions_list = [EU, US]
@@ -50,7 +49,11 @@ CONFIGS = "configs"
 VERSIONS = "versions"
 SCRIPTS = "scripts"
 ARTIFACTS = "artifacts"
+SNAPSHOT = "snapshot"
 CLI_TYPE = "cli-type"
+SERVE = "SERVE"
+LOGIN = "LOGIN"
+PORT = "port"
 
 
 ###
@@ -73,6 +76,7 @@ def create_command_parser(parent_parser):
     help_str = "List command directives: {}".format(",".join(list_commands))
     command_parser.add_argument("command_parameters", metavar='N', nargs='?', help=help_str)
     command_parser.add_argument("--uid", help="Specify the message unique id")
+    command_parser.add_argument("--uid-file", dest="uid_file", help="File of message unique ids to detail, one per line, use - to read them from stdin")
     command_parser.add_argument("--rule", help="Specify the processing rule to use")
     command_parser.add_argument("--time", help="Specify the time window to filter on eg today, yesterday, 1d, 3h")
     command_parser.add_argument("--start-datetime", dest="start_datetime", help="Specify the start date time: 2020-05-17T10:30:08.877Z")
@@ -85,7 +89,7 @@ def create_command_parser(parent_parser):
 
 def create_adm_parser(parent_parser):
     adm_parser = argparse.ArgumentParser(description="ADM Interface commands", parents=[parent_parser])
-    adm_parser.add_argument("command", choices=[LOCATIONS, CONFIGS, VERSIONS, SCRIPTS, ARTIFACTS])
+    adm_parser.add_argument("command", choices=[LOCATIONS, CONFIGS, VERSIONS, SCRIPTS, ARTIFACTS, SNAPSHOT])
     adm_parser.add_argument("--group", help="The parent project group name")
     adm_parser.add_argument("--project", help="The project name")
     return adm_parser
@@ -99,12 +103,26 @@ def create_git_parser(parent_parser):
     git_parser.add_argument("command_parameters", metavar='N', nargs='?', help="search string in single quotes")
     git_parser.add_argument("--group", help="The parent project group name")
     git_parser.add_argument("--project", help="The project name")
+    git_parser.add_argument("--since", help="Only commits after this date: 2020-05-17T10:30:08Z")
+    git_parser.add_argument("--until", help="Only commits before this date: 2020-05-17T10:30:08Z")
+    git_parser.add_argument("--ref", dest="ref_name", help="Only commits on this branch or tag")
     return git_parser
 
 
+def parse_regions(regions_str):
+    """Comma separated list of regions, eg EU,US"""
+    regions = [region.strip() for region in regions_str.split(",") if region.strip()]
+    invalid_regions = [region for region in regions if region not in regions_list]
+    if not regions or invalid_regions:
+        raise argparse.ArgumentTypeError("invalid region(s): '{}', choose from: {}".format(regions_str, ",".join(regions_list)))
+    return list(dict.fromkeys(regions))
+
+
 def create_ice_parser(parent_parser):
-    ice_parser = argparse.ArgumentParser(description="ICE Interface commands", parents=[parent_parser])
+    # ICE accepts several regions, so the single region option of the parent parser is replaced
+    ice_parser = argparse.ArgumentParser(description="ICE Interface commands", parents=[parent_parser], conflict_handler="resolve")
     ice_parser.add_argument("command", choices=[DASHBOARD, MESSAGES])
+    ice_parser.add_argument("--region", type=parse_regions, default=[EU], help="Target region(s), comma separated eg EU,US")
     return ice_parser
 
 
@@ -117,6 +135,19 @@ def create_loki_parser(parent_parser):
     return loki_parser
 
 
+def create_login_parser(parent_parser):
+    parent_parser.add_argument("-a", "--all", action="store_true", default=False, help="Log into every configured system, environment and region")
+    login_parser = argparse.ArgumentParser(description="Log into the sites ahead of running commands, caching the session cookies", parents=[parent_parser])
+    login_parser.add_argument("--system", choices=[CIRRUS_CFG, ADM_CFG, ICE_CFG], default=CIRRUS_CFG, help="The system to log into")
+    return login_parser
+
+
+def create_serve_parser():
+    serve_parser = argparse.ArgumentParser(description="Run cmc as a local daemon, keeping config, caches and sessions warm between commands")
+    serve_parser.add_argument("--port", type=int, default=0, help="Local port to listen on, defaults to any free port")
+    return serve_parser
+
+
 def create_processing_options(args, parse_all=False):
     """Generates an options dict which contain input and output command processing options"""
     options = {'env': args.env, 'output': args.output, 'quiet': args.quiet, 'verbose': args.verbose, 'region': args.region}
@@ -128,7 +159,17 @@ def create_processing_options(args, parse_all=False):
 def parse_command_line_statement(arguments_list):
     """Takes the cli statement, parses and validates it and returns a dict detailing the command"""
     parent_parser = create_parent_parser()
-    if len(arguments_list) > 2 and arguments_list[1].upper() == ADM:
+    if len(arguments_list) > 1 and arguments_list[1].upper() == SERVE:
+        serve_args = create_serve_parser().parse_args(arguments_list[2:])
+        return {CLI_TYPE: SERVE, OPTIONS: {PORT: serve_args.port}}
+
+    elif len(arguments_list) > 1 and arguments_list[1].upper() == LOGIN:
+        login_parser = create_login_parser(parent_parser)
+        login_args = login_parser.parse_args(arguments_list[2:])
+        options = create_processing_options(login_args, True)
+        return {CLI_TYPE: LOGIN, OPTIONS: options, SYSTEM: login_args.system}
+
+    elif len(arguments_list) > 2 and arguments_list[1].upper() == ADM:
         adm_parser = create_adm_parser(parent_parser)
         adm_args = adm_parser.parse_args(arguments_list[2:])
         options = create_processing_options(adm_args)
@@ -186,6 +227,8 @@ def _handle_command_parameters(result_map, command_args):
         result_map[END_DATETIME] = command_args.end_datetime
     if command_args.uid:
         result_map[UID] = command_args.uid
+    if command_args.uid_file:
+        result_map[UID_FILE] = command_args.uid_file
     if command_args.limit:
         result_map[LIMIT] = command_args.limit
     if command_args.system:
@@ -220,12 +263,21 @@ def _handle_git_parameters(result_map, args):
         result_map[GROUP] = args.group
     if args.command_parameters:
         result_map[PARAMETERS] = args.command_parameters.encode().decode('unicode_escape')
+    if args.since:
+        result_map[SINCE] = args.since
+    if args.until:
+        result_map[UNTIL] = args.until
+    if args.ref_name:
+        result_map[REF_NAME] = args.ref_name
     log_requested_command(result_map)
     return result_map
 
 
 def _handle_ice_parameters(result_map, args):
     result_map[CLI_TYPE] = ICE
+    # The first region is used for the site login, the failed messages are fetched for all of them
+    result_map[OPTIONS][REGION] = args.region[0]
+    result_map[REGIONS] = args.region
     if args.command:
         result_map[FUNCTION] = args.command
     log_requested_command(result_map)
@@ -262,6 +314,8 @@ def log_requested_command(cli_map):
                 output_str = output_str + "& end datetime: {}".format(cli_map[END_DATETIME])
         if UID in cli_map:
             output_str = output_str + ", with msg uid: {}".format(cli_map[UID])
+        if UID_FILE in cli_map:
+            output_str = output_str + ", with msg uids from: {}".format(cli_map[UID_FILE])
         message_logger.info(output_str + " & output={}".format(cli_map[OPTIONS][OUTPUT]))
     elif cli_map[CLI_TYPE] == ADM:
         adm_object = ""
@@ -0,0 +1,116 @@
+import contextlib
+import hmac
+import io
+import json
+import logging
+import os
+import secrets
+import sys
+import threading
+from http.server import HTTPServer, BaseHTTPRequestHandler
+
+from main.cli.daemon_client import DAEMON_INFO_FILE, DAEMON_HOST, DAEMON_COMMAND_PATH, TOKEN_HEADER, ARGUMENTS, \
+    WORKING_DIR, EXIT_CODE, STDOUT, STDERR, write_daemon_info, remove_daemon_info
+from main.config.configuration import get_console_handlers
+
+logger = logging.getLogger('main')
+
+
+@contextlib.contextmanager
+def redirect_console_handlers(stream):
+    """Points the console handlers of the logging config at the stream, as they hold the stderr of when logging was configured
+
+    Command output is written through the message logger, so this is what sends it back to the client.
+    """
+    previous_streams = {handler: handler.setStream(stream) for handler in get_console_handlers()}
+    try:
+        yield
+    finally:
+        for handler, previous_stream in previous_streams.items():
+            handler.setStream(previous_stream)
+
+
+class CommandServer(HTTPServer):
+    """Local http server that runs one cli command at a time through the given command handler
+
+    Commands run sequentially as stdout, stderr, the console log handlers and the working directory are swapped for
+    the duration of each one.
+    """
+
+    def __init__(self, command_handler, port=0, token=None):
+        HTTPServer.__init__(self, (DAEMON_HOST, port), CommandRequestHandler)
+        self.command_handler = command_handler
+        self.token = token if token else secrets.token_hex(16)
+        self.command_lock = threading.Lock()
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def run_command(self, arguments_list, working_dir):
+        with self.command_lock:
+            return self._run_command(arguments_list, working_dir)
+
+    def _run_command(self, arguments_list, working_dir):
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        exit_code = 0
+        current_dir = os.getcwd()
+        try:
+            if working_dir:
+                os.chdir(working_dir)
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr), redirect_console_handlers(stderr):
+                self.command_handler(arguments_list)
+        except SystemExit as e:
+            exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            if isinstance(e.code, str):
+                stderr.write(e.code + "\n")
+        except Exception as e:
+            logger.exception("Failed to run command: {}".format(" ".join(arguments_list)))
+            stderr.write("Daemon failed to run command: {}\n".format(e))
+            exit_code = 1
+        finally:
+            os.chdir(current_dir)
+        return {EXIT_CODE: exit_code, STDOUT: stdout.getvalue(), STDERR: stderr.getvalue()}
+
+
+class CommandRequestHandler(BaseHTTPRequestHandler):
+
+    def do_POST(self):
+        if self.path != DAEMON_COMMAND_PATH:
+            self.send_error(404)
+            return
+        if not hmac.compare_digest(self.headers.get(TOKEN_HEADER, ""), self.server.token):
+            self.send_error(403)
+            return
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))).decode("utf-8"))
+            arguments_list = request[ARGUMENTS]
+        except (ValueError, KeyError, TypeError):
+            self.send_error(400)
+            return
+        logger.info("Daemon running command: {}".format(" ".join(arguments_list[1:])))
+        result = self.server.run_command(arguments_list, request.get(WORKING_DIR))
+        body = json.dumps(result).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+
+def serve_commands(command_handler, port=0, daemon_info_file=DAEMON_INFO_FILE):
+    """Runs the daemon until interrupted, command_handler is called with the cli arguments list of each request"""
+    server = CommandServer(command_handler, port)
+    write_daemon_info(server.port, server.token, daemon_info_file)
+    print("cmc daemon listening on {}:{}, press Ctrl-C to stop".format(DAEMON_HOST, server.port), file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Daemon stopped")
+    finally:
+        server.server_close()
+        remove_daemon_info(daemon_info_file)
@@ -0,0 +1,95 @@
+import json
+import logging
+import os
+import sys
+
+from main.cli.cli_parser import LIST, ANALYSE, DETAIL, GET_LOGS, ADM, GIT, ICE, LOKI
+
+logger = logging.getLogger('main')
+
+# Written by the running daemon, it holds the port and the token clients must present
+DAEMON_INFO_FILE = os.path.join(os.path.dirname(__file__), '../../../cache/daemon.json')
+DAEMON_HOST = "127.0.0.1"
+DAEMON_COMMAND_PATH = "/command"
+TOKEN_HEADER = "X-CMC-Token"
+# Set this to run commands locally even when a daemon is running
+NO_DAEMON_ENV_VAR = "CMC_NO_DAEMON"
+DAEMON_COMMANDS = [LIST, ANALYSE, DETAIL, GET_LOGS]
+# Options of the cirrus command parser that are followed by a value, so that value is not taken as the command
+VALUE_OPTIONS = ["-o", "--output", "--env", "--region", "--uid", "--uid-file", "--rule", "--time", "--start-datetime",
+                 "--end-datetime", "--limit", "--system"]
+
+ARGUMENTS = "arguments"
+WORKING_DIR = "cwd"
+EXIT_CODE = "exit_code"
+STDOUT = "stdout"
+STDERR = "stderr"
+
+
+def write_daemon_info(port, token, daemon_info_file=DAEMON_INFO_FILE):
+    """The info file holds the access token so it is only readable by the current user"""
+    os.makedirs(os.path.dirname(daemon_info_file), exist_ok=True)
+    file_descriptor = os.open(daemon_info_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(file_descriptor, 'w') as info_handler:
+        json.dump({"port": port, "token": token, "pid": os.getpid()}, info_handler)
+
+
+def read_daemon_info(daemon_info_file=DAEMON_INFO_FILE):
+    try:
+        with open(daemon_info_file, 'r') as info_handler:
+            return json.load(info_handler)
+    except (OSError, ValueError):
+        return None
+
+
+def remove_daemon_info(daemon_info_file=DAEMON_INFO_FILE):
+    daemon_info = read_daemon_info(daemon_info_file)
+    if daemon_info and daemon_info.get("pid") == os.getpid():
+        os.remove(daemon_info_file)
+
+
+def is_daemon_command(arguments_list):
+    """Only the cirrus message commands are forwarded to a daemon"""
+    if len(arguments_list) < 2 or arguments_list[1].upper() in [ADM, GIT, ICE, LOKI]:
+        return False
+    # Input piped to stdin can't be forwarded
+    if "-" in arguments_list:
+        return False
+    return get_command(arguments_list) in DAEMON_COMMANDS
+
+
+def get_command(arguments_list):
+    """The command is the first positional argument, eg list within: cmc.py --env OAT list messages"""
+    arguments = iter(arguments_list[1:])
+    for argument in arguments:
+        if argument in VALUE_OPTIONS:
+            next(arguments, None)
+        elif not argument.startswith("-"):
+            return argument
+    return None
+
+
+def forward_to_daemon(arguments_list, daemon_info_file=DAEMON_INFO_FILE):
+    """Runs the command on a running daemon, returns its exit code or None when there is no daemon to run it"""
+    if os.environ.get(NO_DAEMON_ENV_VAR) or not is_daemon_command(arguments_list):
+        return None
+    daemon_info = read_daemon_info(daemon_info_file)
+    if not daemon_info:
+        return None
+    # Only loaded when a daemon is running, so plain local runs don't pay for the http client
+    import urllib.error
+    import urllib.request
+    url = "http://{}:{}{}".format(DAEMON_HOST, daemon_info.get("port"), DAEMON_COMMAND_PATH)
+    request_body = json.dumps({ARGUMENTS: arguments_list, WORKING_DIR: os.getcwd()}).encode("utf-8")
+    request = urllib.request.Request(url, data=request_body, headers={TOKEN_HEADER: daemon_info.get("token", ""), "Content-Type": "application/json"})
+    # Never route the local daemon connection through a configured http proxy
+    opener = urllib.request.build_opener(urllib.request.ProxyHandler({}))
+    try:
+        with opener.open(request) as response:
+            result = json.loads(response.read().decode("utf-8"))
+    except (urllib.error.URLError, OSError, ValueError) as e:
+        logger.debug("Unable to use cmc daemon, running command locally: %s", e)
+        return None
+    sys.stdout.write(result.get(STDOUT, ""))
+    sys.stderr.write(result.get(STDERR, ""))
+    return result.get(EXIT_CODE, 0)
@@ -0,0 +1,73 @@
+from main.config.constants import APPLICATIONS, CREDENTIALS, ENV, NAME, ENDPOINTS, WILDCARD, REGION
+
+CONFIG_INDEX = "config-index"
+
+
+class EnvironmentIndex:
+    """Indexes the env entries of a list of applications so (app, env, region) lookups avoid rescanning the config
+
+    Resolution matches the original config scan: entries for the given env or the wildcard env are considered, those
+    for the requested region are returned if any exist, otherwise the wildcard region entries are returned. When an
+    app is listed more than once its last listing wins, as it did with the scan.
+    """
+
+    def __init__(self, app_list):
+        self._app_envs = {single_app.get(NAME): tuple(single_app.get(ENV) or []) for single_app in app_list or []}
+        self._resolved = {}
+
+    def has_app(self, app):
+        return app in self._app_envs
+
+    def get_envs(self, app):
+        """All env entries configured for the app"""
+        return self._app_envs.get(app, ())
+
+    def resolve(self, app, env, region):
+        """Returns a tuple of the matching env entries or None when the app has no entries for the env and region"""
+        key = (app, env, region)
+        try:
+            return self._resolved[key]
+        except KeyError:
+            pass
+        env_config_list = [e for e in self._app_envs.get(app, ()) if e.get(NAME) in (env, WILDCARD)]
+        result = tuple(e for e in env_config_list if e.get(REGION) == region)
+        if not result:
+            result = tuple(e for e in env_config_list if e.get(REGION) == WILDCARD)
+        if not result:
+            return None
+        # Results are immutable, a concurrent thread storing the same key stores an equal value
+        self._resolved[key] = result
+        return result
+
+
+class ConfigIndex:
+    """Read only view over the loaded configuration, built once and shared across threads"""
+
+    def __init__(self, configuration):
+        self.applications = EnvironmentIndex(configuration.get(APPLICATIONS))
+        credentials_cfg = configuration.get(CREDENTIALS) or {}
+        self.credentials = EnvironmentIndex(credentials_cfg.get(APPLICATIONS))
+        # Endpoints come from the first listing of an app, as get_config_endpoint did
+        endpoints = {}
+        first_app_listings = {}
+        for single_app in configuration.get(APPLICATIONS) or []:
+            first_app_listings.setdefault(single_app.get(NAME), single_app)
+        for app, single_app in first_app_listings.items():
+            for endpoint in single_app.get(ENDPOINTS) or []:
+                endpoints.setdefault((app, endpoint.get(NAME)), []).append(endpoint)
+        self._endpoints = {key: tuple(endpoint_list) for key, endpoint_list in endpoints.items()}
+
+    def get_endpoints(self, app, endpoint_name):
+        return self._endpoints.get((app, endpoint_name), ())
+
+
+def get_config_index(configuration):
+    """Returns the index for the configuration, building and storing it on the shared config or plain dict on first use"""
+    config_index = configuration.get(CONFIG_INDEX)
+    if config_index is None:
+        config_index = ConfigIndex(configuration)
+        if isinstance(configuration, dict):
+            configuration[CONFIG_INDEX] = config_index
+        else:
+            configuration.set(CONFIG_INDEX, config_index)
+    return config_index
@@ -1,13 +1,31 @@
+import json
+import logging
 import os
+import pickle
+from logging.config import fileConfig
 
+from main.config.config_index import CONFIG_INDEX
 from main.config.constants import CREDENTIALS, RULES, CHROME_DRIVER_FOLDER, PASSWORD, USERNAME, CIRRUS_USERNAME, \
     CIRRUS_PASSWORD, CIRRUS_CREDENTIALS
-from main.utils.utils import parse_json_from_file, parse_yaml_from_file
+from main.utils.utils import parse_json_from_file, parse_yaml_from_file, get_resource_file_path
 
 CONFIGURATION_FILE = "resources/configuration.yaml"
 CREDENTIALS_FILE   = "resources/credentials.yaml"
 RULES_FILE         = "resources/rules.json"
+# Parsed config files are stored in a pickle snapshot, rebuilt when any of the source files change
+CONFIG_SNAPSHOT_FILE = os.path.join(os.path.dirname(__file__), '../../../cache/config_snapshot.pickle')
+CONFIG_SNAPSHOT_SOURCE_FILES = [CONFIGURATION_FILE, CREDENTIALS_FILE, RULES_FILE]
+CONFIG_SNAPSHOT_VERSION = 1
+_config_snapshot_data = None
 LOGGING_CONFIG_FILE = os.path.join(os.path.dirname(__file__), '../../resources/logging_config.ini')
+LOG_FORMAT_ENV_VAR = "CMC_LOG_FORMAT"
+JSON_LOG_FORMAT = "json"
+# Handlers (as named in the logging config) whose output is switched to json lines in json mode
+JSON_LOG_HANDLERS = ["console_handler", "rotating_file_handler"]
+# Handlers writing to the terminal, a daemon points these at the client of each command
+CONSOLE_LOG_HANDLERS = ["console_handler"]
+_console_handlers = []
+_logging_configured = False
 
 # MAP env variable to conf variable key, just a change of case currently
 environment_vars_map = {CHROME_DRIVER_FOLDER.upper(): CHROME_DRIVER_FOLDER}
@@ -25,6 +43,9 @@ class Borg:
 
 class ConfigSingleton(Borg):
     def __init__(self, config_dict=None):
+        if config_dict is not None:
+            # Loading new config invalidates the lookup index built from the previous one
+            self._shared_state.pop(CONFIG_INDEX, None)
         Borg.__init__(self, config_dict)
 
     def get(self, key):
@@ -42,6 +63,45 @@ class ConfigSingleton(Borg):
         self._shared_state[key] = value
 
 
+class JsonLogFormatter(logging.Formatter):
+    """Writes each log record as a single json line"""
+
+    def format(self, record):
+        log_record = {"time": self.formatTime(record), "logger": record.name, "level": record.levelname, "message": record.getMessage()}
+        if record.exc_info:
+            log_record["exception"] = self.formatException(record.exc_info)
+        return json.dumps(log_record)
+
+
+def configure_logging(log_format=None):
+    """Configure logging once per process from the entry point, modules should only call logging.getLogger"""
+    global _logging_configured
+    if _logging_configured:
+        return
+    fileConfig(LOGGING_CONFIG_FILE)
+    configured_handlers = _get_configured_handlers()
+    _console_handlers.extend(handler for handler in configured_handlers if handler.name in CONSOLE_LOG_HANDLERS)
+    log_format = log_format if log_format else os.environ.get(LOG_FORMAT_ENV_VAR)
+    if log_format and log_format.lower() == JSON_LOG_FORMAT:
+        json_formatter = JsonLogFormatter()
+        for handler in configured_handlers:
+            if handler.name in JSON_LOG_HANDLERS:
+                handler.setFormatter(json_formatter)
+    _logging_configured = True
+
+
+def get_console_handlers():
+    """The console handlers installed by configure_logging"""
+    return list(_console_handlers)
+
+
+def _get_configured_handlers():
+    handlers = set(logging.getLogger().handlers)
+    for logger_name in list(logging.root.manager.loggerDict):
+        handlers.update(getattr(logging.getLogger(logger_name), "handlers", []))
+    return handlers
+
+
 def read_configuration_file_into_map():
     main_config = parse_yaml_from_file(CONFIGURATION_FILE)
     credentials = parse_yaml_from_file(CREDENTIALS_FILE)
@@ -65,8 +125,57 @@ def read_environment_variables(main_config):
             main_config[CREDENTIALS][CIRRUS_CREDENTIALS][conf_var] = env_value
 
 
+def get_config_snapshot_stamp(source_files):
+    """Identifies the current version of the source files by their modification time and size"""
+    stamp = []
+    for source_file in source_files:
+        file_stat = os.stat(get_resource_file_path(source_file))
+        stamp.append((source_file, file_stat.st_mtime_ns, file_stat.st_size))
+    return stamp
+
+
+def read_config_snapshot(snapshot_file, stamp):
+    """Returns the pickled configuration from the snapshot file or None if it is missing or out of date"""
+    try:
+        with open(snapshot_file, 'rb') as snapshot_handler:
+            snapshot = pickle.load(snapshot_handler)
+    except (OSError, EOFError, pickle.UnpicklingError, ValueError, TypeError, AttributeError):
+        return None
+    if not isinstance(snapshot, dict) or snapshot.get("version") != CONFIG_SNAPSHOT_VERSION or snapshot.get("stamp") != stamp:
+        return None
+    return snapshot.get("config")
+
+
+def write_config_snapshot(snapshot_file, stamp, config_data):
+    """Atomically replaces the snapshot, it contains credentials so is only readable by the current user"""
+    snapshot_tmp_file = "{}.{}.tmp".format(snapshot_file, os.getpid())
+    try:
+        os.makedirs(os.path.dirname(snapshot_file), exist_ok=True)
+        file_descriptor = os.open(snapshot_tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(file_descriptor, 'wb') as snapshot_handler:
+            pickle.dump({"version": CONFIG_SNAPSHOT_VERSION, "stamp": stamp, "config": config_data}, snapshot_handler, pickle.HIGHEST_PROTOCOL)
+        os.replace(snapshot_tmp_file, snapshot_file)
+    except OSError as e:
+        logging.getLogger('main').debug("Unable to write configuration snapshot: %s", e)
+        if os.path.exists(snapshot_tmp_file):
+            os.remove(snapshot_tmp_file)
+
+
+def load_configuration_snapshot(snapshot_file=CONFIG_SNAPSHOT_FILE):
+    """Returns a fresh copy of the parsed config files, these are only read and parsed when the snapshot is stale"""
+    global _config_snapshot_data
+    if _config_snapshot_data is None:
+        stamp = get_config_snapshot_stamp(CONFIG_SNAPSHOT_SOURCE_FILES)
+        config_data = read_config_snapshot(snapshot_file, stamp)
+        if config_data is None:
+            config_data = pickle.dumps(read_configuration_file_into_map(), pickle.HIGHEST_PROTOCOL)
+            write_config_snapshot(snapshot_file, stamp, config_data)
+        _config_snapshot_data = config_data
+    return pickle.loads(_config_snapshot_data)
+
+
 def get_configuration_dict():
-    main_config = read_configuration_file_into_map()
+    main_config = load_configuration_snapshot()
     read_environment_variables(main_config)
     return main_config
 
@@ -18,6 +18,7 @@ VERBOSE = 'verbose'
 
 CSV = 'csv'
 JSON = 'json'
+NDJSON = 'ndjson'
 TABLE = 'table'
 FILE = 'file'
 
@@ -57,6 +58,7 @@ ENTITY = 'entity'
 RULE = 'rule'
 TIME = 'time'
 UID = 'uid'
+UID_FILE = 'uid-file'
 OPTIONS = 'options'
 LIMIT = "limit"
 PROJECT = 'project'
@@ -67,6 +69,9 @@ COMMITS = 'commits'
 TAGS = 'tags'
 BRANCHES = 'branches'
 PARAMETERS = 'parameters'
+SINCE = 'since'
+UNTIL = 'until'
+REF_NAME = 'ref_name'
 QUERY = 'query'
 TODAY = "today"
 YESTERDAY = "yesterday"
@@ -106,6 +111,7 @@ CACHE_REF = "cache-ref"
 CACHED_COOKIE = "cached-cookie"
 # Cache expire constants
 SEC_30 = 30
+MIN_5 = 60 * 5
 MIN_30 = 60 * 30
 HOUR_1 = 3600
 DAY_1 = HOUR_1 * 24
@@ -133,6 +139,7 @@ ELASTICSEARCH_SECONDS_MARGIN = "elasticsearch_seconds_margin"
 ELASTICSEARCH_SECONDS_MARGIN_FOR_ICE = "elasticsearch_seconds_margin_for_ice"
 ELASTICSEARCH_EXCLUDE_LOG_FILES = "elasticsearch_exclude_log_files"
 ELASTICSEARCH_RETAIN_SERVER_OUTPUT = "elasticsearch_retain_server_output"
+ELASTICSEARCH_AGGREGATE_DISCOVERY = "elasticsearch_aggregate_discovery"
 
 HOST = "host"
 LOGFILE = "logfile"
@@ -167,6 +174,7 @@ ELASTIC_CFG = 'ELASTICSEARCH'
 LOKI_CFG = "LOKI"
 
 REGION = "region"
+REGIONS = "regions"
 ADAPTER_ID = "adapter_id"
 
 BASE_URL = "base_url"
@@ -223,6 +231,8 @@ class DataType(Enum):
     git_tags = 28
     git_commits = 29
     loki_logs = 30
+    git_group_commits = 31
+    git_group_tags = 32
 
 
 class DataRequisites(Enum):
@@ -245,6 +255,7 @@ class OutputFormat(Enum):
     table = 1
     csv = 2
     file = 3
+    ndjson = 4
 
 
 class LogSearchDirection(Enum):
@@ -265,5 +276,6 @@ output_formats_to_extention_map = {
     OutputFormat.json: ".json",
     OutputFormat.csv: ".csv",
     OutputFormat.table: ".txt",
-    OutputFormat.file: ".json"
+    OutputFormat.file: ".json",
+    OutputFormat.ndjson: ".ndjson"
 }
@@ -1,17 +1,17 @@
 import logging
 import re
-from logging.config import fileConfig
+from concurrent.futures.thread import ThreadPoolExecutor
 from urllib.parse import urlparse
 
-from main.config.configuration import LOGGING_CONFIG_FILE
 from main.config.constants import DataType, OUTPUT, OutputFormat, MESSAGE_ID, HOST_LOG_CORRELATION_ID, \
     LOG_STATEMENT_FOUND, LOG_LINE_STATS, HOST_LOG_MAPPINGS, FILE, CSV, JSON
 from main.utils.utils import convert_output_option_to_enum
 
-fileConfig(LOGGING_CONFIG_FILE)
 logger = logging.getLogger('main')
 message_logger = logging.getLogger('message')
 
+MAX_XSL_DOWNLOAD_WORKERS = 6
+
 
 def make_safe_for_filename(tracking_point):
     return tracking_point.replace(' ', '_')
@@ -22,6 +22,8 @@ class LogAndFileFormatter:
         self.formatter = formatter
         self.file_generator = file_generator
         self.cirrus_proxy = proxy
+        # Messages of the same channel share xsl files, so these are only fetched once per run
+        self.xsl_cache = {}
 
     def _format_to_log_and_file(self, message_uid, data_type, data, options):
         if data:
@@ -128,20 +130,31 @@ class LogAndFileFormatter:
             message_logger.info("\nNo server logs found on elasticsearch server")
 
     def _download_xsl_files(self, message_uid, xsl_urls_list):
-        """Downloads each xsl file from the given list to the output folder"""
-        for url in xsl_urls_list:
-            logger.debug("Fetching xsl file: {}".format(url))
+        """Downloads each xsl file from the given list to the output folder, fetching them concurrently"""
+        download_files = {}
+        # Only fetch each url once
+        for url in dict.fromkeys(xsl_urls_list):
             # Check for invalid characters
             if self.has_invalid_url_character(url):
                 continue
-            xsl_data = self.cirrus_proxy.get(url)
             # generate filename within output folder
             parsed_link = urlparse(url)
             base_filename = parsed_link.path.split('/')[-1]
             if base_filename and (base_filename.endswith(".xsl") or base_filename.endswith(".xsd")):
-                self.file_generator.output_text_to_file(message_uid, base_filename, xsl_data, "transform")
+                download_files[url] = base_filename
             else:
                 logger.error("Unable to download url to file as file name is invalid: [{}]".format(base_filename))
+        if not download_files:
+            return
+        with ThreadPoolExecutor(max_workers=min(MAX_XSL_DOWNLOAD_WORKERS, len(download_files))) as executor:
+            for url, xsl_data in zip(download_files.keys(), executor.map(self._fetch_xsl_file, download_files.keys())):
+                self.file_generator.output_text_to_file(message_uid, download_files[url], xsl_data, "transform")
+
+    def _fetch_xsl_file(self, url):
+        if url not in self.xsl_cache:
+            logger.debug("Fetching xsl file: %s", url)
+            self.xsl_cache[url] = self.cirrus_proxy.get(url)
+        return self.xsl_cache[url]
 
     def download_payload_files(self, message_uid, data):
         """Writes each of the payload data items to file"""
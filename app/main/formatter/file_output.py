@@ -1,23 +1,23 @@
 import datetime
 import os.path
-from collections import Generator
+from collections.abc import Generator
 from os import path
 import logging
-from logging.config import fileConfig
 
-from main.config.configuration import get_configuration_dict, ConfigSingleton, LOGGING_CONFIG_FILE
-from main.config.constants import OUTPUT_FOLDER, DataType, LOGFILE, TOTAL_COUNT, ERROR_COUNT, HOST, LOG_CORRELATION_ID, \
+from main.config.configuration import get_configuration_dict, ConfigSingleton, configure_logging
+from main.config.constants import APPLICATIONS, OUTPUT_FOLDER, DataType, LOGFILE, TOTAL_COUNT, ERROR_COUNT, HOST, LOG_CORRELATION_ID, \
     ELASTICSEARCH_EXCLUDE_LOG_FILES, output_formats_to_extention_map, MISC_CFG, CONFIG
 from main.utils.utils import write_json_to_file, write_text_to_file, write_single_text_to_file, \
     get_configuration_for_app, unpack_config
 
-fileConfig(LOGGING_CONFIG_FILE)
 logger = logging.getLogger('main')
 
 
 class FileOutputFormatter:
     def __init__(self):
-        self.configuration = ConfigSingleton(get_configuration_dict())
+        self.configuration = ConfigSingleton()
+        if not self.configuration.has_key(APPLICATIONS):
+            self.configuration = ConfigSingleton(get_configuration_dict())
         app_cfg = get_configuration_for_app(self.configuration, MISC_CFG, "*", "*")
         # output_folder_str = self.configuration.get(OUTPUT_FOLDER)
         output_folder_str = unpack_config(app_cfg, MISC_CFG, CONFIG, OUTPUT_FOLDER)
@@ -173,4 +173,5 @@ def main():
 
 
 if __name__ == '__main__':
+    configure_logging()
     main()
@@ -2,14 +2,12 @@ import json
 import logging
 import operator
 from functools import reduce
-from logging.config import fileConfig
 
 from tabulate import tabulate
 
 from main.algorithms.empty_fields import FlattenJsonOutputToCSV
 from main.algorithms.payload_transform_mapper import PayloadTransformMapper
-from main.config.configuration import LOGGING_CONFIG_FILE
-from main.config.constants import OUTPUT, JSON, DataType, NAME, QUIET, \
+from main.config.constants import OUTPUT, JSON, NDJSON, DataType, NAME, QUIET, \
     YARA_MOVEMENT_POST_JSON_ALGO, HAS_EMPTY_FIELDS_FOR_PAYLOAD, HAS_MANDATORY_FIELDS_FOR_PAYLOAD, \
     TRANSFORM_BACKTRACE_FIELDS, HOST, LOGFILE, LEVEL, LOG_CORRELATION_ID, LINE, \
     TIME, TOTAL_COUNT, ERROR_COUNT, \
@@ -18,13 +16,12 @@ from main.model.model_utils import enrich_message_analysis_status_results, get_a
     prefix_message_id_to_lines, get_data_type_for_algorithm, get_algorithm_name_from_data_type
 from main.utils.utils import convert_output_option_to_enum, convert_timestamp_to_datetime_str
 
-fileConfig(LOGGING_CONFIG_FILE)
 logger = logging.getLogger('main')
 message_logger = logging.getLogger('message')
 
 
 class Formatter:
-    """Formats out collected data to the specified output format: JSON|CSV|TABLE"""
+    """Formats out collected data to the specified output format: JSON|NDJSON|CSV|TABLE"""
 
     def format(self, data_type, data, options):
         self._format(data_type, data, options, True)
@@ -43,10 +40,33 @@ class Formatter:
             self._format_to_table(data_records, self._get_headings(data_type, options))
         elif output_type == OutputFormat.csv:
             self._format_to_csv(data_records, self._get_headings(data_type, options))
+        elif output_type == OutputFormat.ndjson:
+            self._format_to_ndjson(data_records)
+
+    def format_stream(self, data_type, data_rows, options):
+        """Outputs rows as they are produced rather than collecting them first, for the line based outputs
+
+        Table and json outputs need the full data set so the rows are collected for those.
+        """
+        output_type = convert_output_option_to_enum(options)
+        headings = self._get_headings(data_type, options)
+        if output_type == OutputFormat.ndjson:
+            self._format_to_ndjson(dict(zip(headings, row)) for row in data_rows)
+        elif output_type == OutputFormat.csv:
+            self._format_to_csv(data_rows, headings)
+        else:
+            self.format(data_type, list(data_rows), options)
 
     def _format_to_json(self, data_records):
         message_logger.info(json.dumps(data_records))
 
+    def _format_to_ndjson(self, data_records):
+        # Some commands output a single dict rather than a list of records
+        if isinstance(data_records, (dict, str)):
+            data_records = [data_records]
+        for record in data_records:
+            message_logger.info(json.dumps(record))
+
     def _format_to_table(self, data_records, headings):
         message_logger.info(self._create_table_data_str(data_records, headings))
 
@@ -123,6 +143,8 @@ class Formatter:
         if data_type == DataType.ice_dashboard:
             return ['Community', 'In Progress Messages', 'Failed Event Messages', 'Heartbeat Failures', 'CALM Alerts']
 
+        if data_type in [DataType.git_group_commits, DataType.git_group_tags]:
+            return self._get_dynamic_headings(data_type, options)
         if data_type in [DataType.git_projects]:
             return ["ID", "Name", "visibility", "description", "archived"]
         if data_type == DataType.git_groups:
@@ -209,7 +231,7 @@ class Formatter:
 
     def format_transform_sub_lists(self, transform_data, options):
         # We don't need to do this for JSON output
-        if options.get(OUTPUT) == JSON:
+        if options.get(OUTPUT) in [JSON, NDJSON]:
             return None
         all_records = []
         for current_transform in transform_data:
@@ -292,6 +314,12 @@ class DynamicFormatter(Formatter):
             else:
                 return ["Name"]
 
+        if data_type == DataType.git_group_commits:
+            return ["Project", "Committed_date"] + self._get_dynamic_headings(DataType.git_commits, options)
+
+        if data_type == DataType.git_group_tags:
+            return ["Project"] + self._get_dynamic_headings(DataType.git_tags, options)
+
         if data_type == DataType.loki_logs:
             if is_verbose:
                 return ["time", "pod", "log"]
@@ -300,7 +328,7 @@ class DynamicFormatter(Formatter):
         return None
 
     def _format_data_via_conversion(self, data_type, data, options):
-        if options.get(OUTPUT) == JSON:
+        if options.get(OUTPUT) in [JSON, NDJSON]:
             headings = self._get_headings(data_type, options)
             json_data = self.convert_array_to_json(headings, data)
             output_data = json_data
@@ -318,7 +346,8 @@ class DynamicFormatter(Formatter):
                 super()._format_to_table(data, headings)
             else:
                 logger.warning("no data to output for type: {}".format(data_type))
-        elif data_type in [DataType.git_projects, DataType.git_groups, DataType.git_branches, DataType.git_commits, DataType.git_tags]:
+        elif data_type in [DataType.git_projects, DataType.git_groups, DataType.git_branches, DataType.git_commits, DataType.git_tags,
+                           DataType.git_group_commits, DataType.git_group_tags]:
             logger.debug("formatting list of git data")
             if data:
                 # headings = data.pop(0)
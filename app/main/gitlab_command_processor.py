@@ -1,18 +1,16 @@
 import json
 import re
 import logging
-from logging.config import fileConfig
 
 from main.cli.cli_parser import LIST, SEARCH
-from main.config.configuration import ConfigSingleton, LOGGING_CONFIG_FILE
+from main.config.configuration import ConfigSingleton
 from main.config.constants import FUNCTION, PROJECT, GROUP, OPTIONS, DataType, OUTPUT, TABLE, ENTITY, PROJECTS, GROUPS, \
-    VERBOSE, BRANCHES, TAGS, COMMITS, PARAMETERS
+    VERBOSE, BRANCHES, TAGS, COMMITS, PARAMETERS, SINCE, UNTIL, REF_NAME
 from main.formatter.formatter import Formatter, DynamicFormatter
 from main.http.gitlab_proxy import GitlabProxy
 
 from main.utils.utils import error_and_exit
 
-fileConfig(LOGGING_CONFIG_FILE)
 logger = logging.getLogger('main')
 
 
@@ -33,12 +31,18 @@ class GitLabCommandProcessor:
         parameters = cli_dict.get(PARAMETERS, None)
         group = cli_dict.get(GROUP, None)
         options = cli_dict.get(OPTIONS)
-        # forcing output to table intitially. Git does support json.
-        options[OUTPUT] = TABLE
+        commit_filters = get_commit_filters(cli_dict)
 
         if not entity_to_list:
             error_and_exit("Please specific an entity to find for GIT eg projects")
 
+        # Group wide commits and tags are streamed, so these keep the requested output
+        if function_to_call == LIST and entity_to_list in [COMMITS, TAGS] and group and not project:
+            self.list_for_group(entity_to_list, group, options, commit_filters)
+            return
+
+        # forcing output to table intitially. Git does support json.
+        options[OUTPUT] = TABLE
 
         logger.info("Received CLI request to list git: {}".format(entity_to_list))
         logger.debug("CLI command is: {}".format(str(cli_dict)))
@@ -73,7 +77,7 @@ class GitLabCommandProcessor:
 
             elif entity_to_list == COMMITS:
                 assert_that_project_id_given(project)
-                result = self.git_proxy.list_commits_for_project(project, options)
+                result = self.git_proxy.list_commits_for_project(project, options, commit_filters)
                 data_type = DataType.git_commits
                 reformated_data = flatten_commit_list(result, options)
 
@@ -87,20 +91,20 @@ class GitLabCommandProcessor:
             unquoted_search_str = chomp_quotes(parameters)
             p = re.compile(unquoted_search_str)
 
+            # Projects and groups are searched within the whole local index
             if entity_to_list == PROJECTS:
                 if group:
-                    result = self.git_proxy.list_projects_for_group(group, options)
+                    result = filter_projects_by_name(self.git_proxy.list_projects_for_group(group, {**options, 'all': True}), p)
                 else:
-                    result = self.git_proxy.list_projects(options)
-                    # result = self.git_proxy.search_projects(unquoted_search_str, options)
+                    result = self.git_proxy.search_project(p, options)
                 data_type = DataType.git_projects
-                reformated_data = flatten_project_list(filter_projects_by_name(result, p), options)
+                reformated_data = flatten_project_list(result, options)
 
             elif entity_to_list == GROUPS:
-                result = self.git_proxy.list_groups(options)
+                result = self.git_proxy.search_group(p, options)
                 data_type = DataType.git_groups
-                # now filter and explode out data fields
-                reformated_data = flatten_group_list(filter_groups_by_name(result, p), options)
+                # now explode out data fields
+                reformated_data = flatten_group_list(result, options)
 
             elif entity_to_list == BRANCHES:
                 assert_that_project_id_given(project)
@@ -118,7 +122,7 @@ class GitLabCommandProcessor:
 
             elif entity_to_list == COMMITS:
                 assert_that_project_id_given(project)
-                result = self.git_proxy.list_commits_for_project(project, options)
+                result = self.git_proxy.list_commits_for_project(project, options, commit_filters)
                 data_type = DataType.git_commits
                 # now filter
                 reformated_data = flatten_group_list(filter_commits_by_name(result, p), options)
@@ -129,6 +133,18 @@ class GitLabCommandProcessor:
 
         self.formatter.format(data_type, reformated_data, options)
 
+    def list_for_group(self, entity_to_list, group, options, commit_filters):
+        """Commits, newest first, or tags of all the projects in the group, output as they arrive"""
+        logger.info("Listing git {} for all projects in group: {}".format(entity_to_list, group))
+        if entity_to_list == COMMITS:
+            data_type = DataType.git_group_commits
+            rows = ([project.name, commit.committed_date] + convert_commit_to_list(commit, options)
+                    for project, commit in self.git_proxy.iter_commits_for_group(group, options, commit_filters))
+        else:
+            data_type = DataType.git_group_tags
+            rows = ([project.name] + convert_tag_to_list(tag, options) for project, tag in self.git_proxy.iter_tags_for_group(group, options))
+        self.formatter.format_stream(data_type, rows, options)
+
 
 def chomp_quotes(search_string):
     if search_string and search_string[0] == r"'" and search_string[-1] == r"'":
@@ -136,6 +152,11 @@ def chomp_quotes(search_string):
     return search_string
 
 
+def get_commit_filters(cli_dict):
+    """The since, until and ref_name commit filters given on the command line, these are applied by GitLab"""
+    return {commit_filter: cli_dict[commit_filter] for commit_filter in [SINCE, UNTIL, REF_NAME] if cli_dict.get(commit_filter)}
+
+
 def assert_that_project_id_given(project):
     if not project:
         error_and_exit(f"The given GIT command requires the project id to be passed in eg --project 15")
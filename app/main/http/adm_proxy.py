@@ -1,6 +1,7 @@
 import urllib3
 
 from main.config.constants import *
+from main.http.html_tables import extract_table, TABLE_HEADER, TABLE_ROWS
 from main.http.webpage_proxy import WebPageParser, ADM_PROJECTS
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -8,18 +9,16 @@ import ssl
 ssl._create_default_https_context = ssl._create_unverified_context
 
 import logging
-from logging.config import fileConfig
 
 headers = {'User-Agent': 'Mozilla/5.0 (X11; Linux i686; rv:7.0.1) Gecko/20100101 Firefox/7.0.1'}
 
-LOGGING_CONFIG_FILE = os.path.join(os.path.dirname(__file__), '../../resources/logging_config.ini')
-fileConfig(LOGGING_CONFIG_FILE)
 logger = logging.getLogger('requester')
 
 
 class ADMProxy(WebPageParser):
     """All fetch functionality for ADM access"""
     ADM_FILTER_COLUMN_FOR_PROJECT_DICT = {ADM_LOCATIONS: 0, ADM_CONFIGS: 0, ADM_VERSIONS: 0, ADM_SCRIPTS: 1, ADM_ARTIFACTS: 1}
+    ADM_SNAPSHOT_PAGES = [ADM_LOCATIONS, ADM_CONFIGS, ADM_VERSIONS, ADM_SCRIPTS, ADM_ARTIFACTS]
 
     def __init__(self):
         WebPageParser.__init__(self, ADM_CFG)
@@ -31,96 +30,68 @@ class ADMProxy(WebPageParser):
     #     url = self.get_app_endpoint_url2(ADM_LOCATIONS, options)
     #     soup = self.parse_data_page(url)
 
-    def fetch_header_data(self, soup):
-        thead = soup.find("thead")
-        if thead is None:
+    def extract_adm_table(self, document, process_all_rows=False):
+        table = extract_table(document, all_rows=process_all_rows)
+        if table[TABLE_HEADER] is None:
             logger.error("Failed to find thead tag in page!")
-            return []
-        header_row = thead.findChildren("tr")[0]
-        return [td.get_text() for td in header_row.findChildren("td")]
-
-    def fetch_project_fields(self, soup, filter_column, project_name, get_all=False, process_all_rows=False):
-        result = []
-        tbody = soup.find("tbody")
-        if tbody is None:
+            table[TABLE_HEADER] = []
+        if table[TABLE_ROWS] is None:
             logger.error("Failed to find tbody tag in page!")
-            return []
-        # For page with dynamic table we need to fetch to rows from the top level not from the tbody
-        # currently only an issues for adm configs page
-        if process_all_rows:
-            table_rows = soup.find_all("tr")
-        else:
-            table_rows = tbody.findChildren("tr")
-        for row in table_rows:
-            td_list = row.findChildren("td")
-            parent_element_name = row.parent.name
-            if row.parent.name != "thead":
-                if get_all or td_list[filter_column].get_text() == project_name:
-                    result.append([td.get_text() for td in td_list])
-        return result
-
-    def fetch_project_fields_for_project_group(self, soup, filter_column, project_names_list, process_all_rows=False):
-        result = []
-        tbody = soup.find("tbody")
-        if tbody is None:
-            logger.error("Failed to find tbody tag in page!")
-            return []
+            table[TABLE_ROWS] = []
+        return table
+
+    def _get_table_request(self, url_key, merged_app_cfg):
+        """The url and table parser of the given ADM page"""
+        url = self.get_app_endpoint_url2(url_key, merged_app_cfg)
         # For page with dynamic table we need to fetch to rows from the top level not from the tbody
         # currently only an issues for adm configs page
-        if process_all_rows:
-            table_rows = soup.find_all("tr")
-        else:
-            table_rows = tbody.findChildren("tr")
-        for row in table_rows:
-            td_list = row.findChildren("td")
-            parent_element_name = row.parent.name
-            if row.parent.name != "thead":
-                if td_list[filter_column].get_text() in project_names_list:
-                    result.append([td.get_text() for td in td_list])
-        return result
+        return url, lambda document: self.extract_adm_table(document, url_key == ADM_CONFIGS)
+
+    def get_table(self, url_key, merged_app_cfg):
+        """Header and rows of the given ADM page, the extracted rows are cached so the project and group filters reuse them"""
+        url, table_parser = self._get_table_request(url_key, merged_app_cfg)
+        return self.get_page_table(url, merged_app_cfg, table_parser)
+
+    def iter_snapshot(self, merged_app_cfg, project_names=None):
+        """Fetches every ADM page concurrently, yielding (url_key, data) as each page arrives
+
+        The data is filtered down to the given project names when supplied.
+        """
+        page_requests = {url_key: self._get_table_request(url_key, merged_app_cfg) for url_key in self.ADM_SNAPSHOT_PAGES}
+        for url_key, table in self.iter_page_tables(page_requests, merged_app_cfg):
+            if project_names is None:
+                yield url_key, [table[TABLE_HEADER]] + table[TABLE_ROWS]
+            else:
+                filter_column = self.ADM_FILTER_COLUMN_FOR_PROJECT_DICT[url_key]
+                yield url_key, [table[TABLE_HEADER]] + self.filter_project_rows(table[TABLE_ROWS], filter_column, project_names)
+
+    def get_all_data(self, url_key, merged_app_cfg):
+        table = self.get_table(url_key, merged_app_cfg)
+        return [table[TABLE_HEADER]] + table[TABLE_ROWS]
+
+    @staticmethod
+    def filter_project_rows(table_rows, filter_column, project_names):
+        return [row for row in table_rows if len(row) > filter_column and row[filter_column] in project_names]
 
     def get_data_for_project(self, url_key, project_name, merged_app_cfg):
-        url = self.get_app_endpoint_url2(url_key, merged_app_cfg)
-        soup = self.parse_data_page(url, merged_app_cfg)
+        table = self.get_table(url_key, merged_app_cfg)
         filter_column = self.ADM_FILTER_COLUMN_FOR_PROJECT_DICT[url_key]
-        data = self.fetch_project_fields(soup, filter_column, project_name, False, url_key == ADM_CONFIGS)
-        data.insert(0, self.fetch_header_data(soup))
-        return data
+        return [table[TABLE_HEADER]] + self.filter_project_rows(table[TABLE_ROWS], filter_column, {project_name})
 
     def get_configs(self, merged_app_cfg):
-        url = self.get_app_endpoint_url2(ADM_CONFIGS, merged_app_cfg)
-        soup = self.parse_data_page(url, merged_app_cfg)
-        data = self.fetch_project_fields(soup, -1, None, True, True)
-        data.insert(0, self.fetch_header_data(soup))
-        return data
+        return self.get_all_data(ADM_CONFIGS, merged_app_cfg)
 
     def get_locations(self, merged_app_cfg):
-        url = self.get_app_endpoint_url2(ADM_LOCATIONS, merged_app_cfg)
-        soup = self.parse_data_page(url, merged_app_cfg)
-        data = self.fetch_project_fields(soup, -1, None, True)
-        data.insert(0, self.fetch_header_data(soup))
-        return data
+        return self.get_all_data(ADM_LOCATIONS, merged_app_cfg)
 
     def get_versions(self, merged_app_cfg):
-        url = self.get_app_endpoint_url2(ADM_VERSIONS, merged_app_cfg)
-        soup = self.parse_data_page(url, merged_app_cfg)
-        data = self.fetch_project_fields(soup, -1, None, True)
-        data.insert(0, self.fetch_header_data(soup))
-        return data
+        return self.get_all_data(ADM_VERSIONS, merged_app_cfg)
 
     def get_scripts(self, merged_app_cfg):
-        url = self.get_app_endpoint_url2(ADM_SCRIPTS, merged_app_cfg)
-        soup = self.parse_data_page(url, merged_app_cfg)
-        data = self.fetch_project_fields(soup, -1, None, True)
-        data.insert(0, self.fetch_header_data(soup))
-        return data
+        return self.get_all_data(ADM_SCRIPTS, merged_app_cfg)
 
     def get_artifacts(self, merged_app_cfg):
-        url = self.get_app_endpoint_url2(ADM_ARTIFACTS, merged_app_cfg)
-        soup = self.parse_data_page(url, merged_app_cfg)
-        data = self.fetch_project_fields(soup, -1, None, True)
-        data.insert(0, self.fetch_header_data(soup))
-        return data
+        return self.get_all_data(ADM_ARTIFACTS, merged_app_cfg)
 
     def get_locations_for_project(self, project_name, merged_app_cfg):
         return self.get_data_for_project(ADM_LOCATIONS, project_name, merged_app_cfg)
@@ -152,15 +123,15 @@ class ADMProxy(WebPageParser):
     def get_artifacts_for_group(self, group_name, merged_app_cfg):
         return self.get_data_for_group(ADM_ARTIFACTS, group_name, merged_app_cfg)
 
+    def get_group_projects(self, group_name):
+        return [group[PROJECTS] for group in self.configuration.get(ADM_PROJECTS) if group[NAME] == group_name][0]
+
     def get_data_for_group(self, url_key, group_name, merged_app_cfg):
-        url = self.get_app_endpoint_url2(url_key, merged_app_cfg)
-        soup = self.parse_data_page(url, merged_app_cfg)
-        requested_group_projects = [group[PROJECTS] for group in self.configuration.get(ADM_PROJECTS) if group[NAME] == group_name][0]
+        requested_group_projects = self.get_group_projects(group_name)
         filter_column = self.ADM_FILTER_COLUMN_FOR_PROJECT_DICT[url_key]
         if requested_group_projects:
-            header_line = self.fetch_header_data(soup)
-            data_lines = self.fetch_project_fields_for_project_group(soup, filter_column, requested_group_projects, url_key == ADM_CONFIGS)
-            return [header_line] + data_lines
+            table = self.get_table(url_key, merged_app_cfg)
+            return [table[TABLE_HEADER]] + self.filter_project_rows(table[TABLE_ROWS], filter_column, set(requested_group_projects))
         else:
             logger.error("The given group: {} could not be found in the config".format(group_name))
         return None
@@ -0,0 +1,186 @@
+import logging
+import re
+import threading
+from urllib.parse import urljoin
+
+import requests
+import urllib3
+
+from main.config.configuration import ConfigSingleton
+from main.config.constants import CREDENTIALS, USERNAME, PASSWORD, CIRRUS_CFG, LOGIN, OPTIONS, ENV, REGION, MISC_CFG, \
+    CONFIG, ENABLE_SELENIUM_LOGIN, MIN_5
+from main.http.html_tables import parse_html_document
+from main.utils.utils import error_and_exit, unpack_config, get_endpoint_url, write_cookies_to_file_cache, \
+    get_configuration_for_app, get_cookie_time_to_expiry, generate_cookie_key
+
+urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+logger = logging.getLogger('requester')
+
+headers = {'User-Agent': 'Mozilla/5.0 (X11; Linux i686; rv:7.0.1) Gecko/20100101 Firefox/7.0.1'}
+
+USERNAME_FIELD = "j_username"
+PASSWORD_FIELD = "j_password"
+SUPER_USER_LINK_TEXT = "Switch to Super"
+USER_MENU_BUTTON_ID = "topMenuForm:j_idt17_button"
+# The parameters a PrimeFaces menu item link adds to its form on submit, eg PrimeFaces.addSubmitParam('topMenuForm',{'topMenuForm:j_idt18':'topMenuForm:j_idt18'})
+SUBMIT_PARAMS_REGEX = re.compile(r"addSubmitParam\('[^']*',\{([^}]*)\}")
+SUBMIT_PARAM_REGEX = re.compile(r"'([^']+)':'([^']*)'")
+# Refresh the cookie this long before it expires so that long runs never wait on a login
+COOKIE_REFRESH_MARGIN = MIN_5
+
+# One lock per cookie key, so logins for different environments and regions run in parallel
+_login_locks = {}
+_login_locks_lock = threading.Lock()
+
+
+class CirrusLoginFailed(Exception):
+    def __init__(self, reason):
+        Exception.__init__(self, "Failed to login to Cirrus over http, {}".format(reason))
+
+
+def find_form_with_field(document, field_name):
+    if document is None:
+        return None
+    return next((form for form in document.forms if field_name in form.fields), None)
+
+
+def find_link_by_text(document, link_text):
+    if document is None:
+        return None
+    return next((link for link in document.iterdescendants("a") if link.text_content().strip() == link_text), None)
+
+
+def get_link_submit_params(link):
+    """The request parameters that clicking the JSF link submits along with its form"""
+    submit_params_match = SUBMIT_PARAMS_REGEX.search(link.get("onclick", ""))
+    if submit_params_match:
+        return dict(SUBMIT_PARAM_REGEX.findall(submit_params_match.group(1)))
+    link_id = link.get("id")
+    return {link_id: link_id} if link_id else {}
+
+
+def is_super_user(document, username):
+    """Checks the user menu now shows the super user, as the selenium login does"""
+    if document is None:
+        return False
+    user_menu_button = document.get_element_by_id(USER_MENU_BUTTON_ID, None)
+    if user_menu_button is None:
+        return False
+    button_text = user_menu_button.text_content()
+    return "Super" in button_text and username in button_text
+
+
+def _fetch_document(session, url):
+    response = session.get(url, verify=False)
+    if response.status_code != requests.codes["ok"]:
+        raise CirrusLoginFailed("status code: {} from: {}".format(response.status_code, url))
+    return response.url, parse_html_document(response.text)
+
+
+def _submit_form(session, page_url, form, fields):
+    form_data = dict(form.form_values())
+    form_data.update(fields)
+    action_url = urljoin(page_url, form.get("action") or page_url)
+    response = session.post(action_url, data=form_data, verify=False)
+    if response.status_code != requests.codes["ok"]:
+        raise CirrusLoginFailed("status code: {} from: {}".format(response.status_code, action_url))
+    return response.url, parse_html_document(response.text)
+
+
+def login_to_cirrus_with_requests(merged_app_cfg, session=None):
+    """Replays the Cirrus login form and the switch to super user, returning the logged in session
+
+    Raises CirrusLoginFailed when a page is not as expected.
+    """
+    session = session or requests.Session()
+    session.headers.update(headers)
+    username = unpack_config(merged_app_cfg, CIRRUS_CFG, CREDENTIALS, USERNAME)
+    password = unpack_config(merged_app_cfg, CIRRUS_CFG, CREDENTIALS, PASSWORD)
+    login_url = get_endpoint_url(ConfigSingleton(), merged_app_cfg, CIRRUS_CFG, LOGIN)
+
+    logger.debug("Logging into Cirrus with username: [{}] and password: [******]".format(username))
+    page_url, document = _fetch_document(session, login_url)
+    login_form = find_form_with_field(document, USERNAME_FIELD)
+    if login_form is None:
+        raise CirrusLoginFailed("no login form found at: {}".format(page_url))
+    page_url, document = _submit_form(session, page_url, login_form, {USERNAME_FIELD: username, PASSWORD_FIELD: password})
+
+    logger.debug("Login successful, attempting to switch to super user")
+    super_user_link = find_link_by_text(document, SUPER_USER_LINK_TEXT)
+    if super_user_link is None:
+        raise CirrusLoginFailed("the login was rejected or the super user link is missing")
+    menu_form = next(super_user_link.iterancestors("form"), None)
+    if menu_form is None:
+        raise CirrusLoginFailed("no form found for the super user link")
+    _submit_form(session, page_url, menu_form, get_link_submit_params(super_user_link))
+
+    _, document = _fetch_document(session, login_url)
+    if not is_super_user(document, username):
+        raise CirrusLoginFailed("unable to confirm the switch to super user")
+    logger.info("Successfully switched to superuser")
+    return session
+
+
+def capture_cirrus_cookies_from_session(config, session, merged_app_cfg):
+    cirrus_super_user_cookie = "; ".join(["{}={}".format(cookie.name, cookie.value) for cookie in session.cookies])
+    logger.info("Successfully obtained super user cookie for Cirrus API access")
+    cli_env = unpack_config(merged_app_cfg, CIRRUS_CFG, OPTIONS, ENV)
+    cli_region = unpack_config(merged_app_cfg, CIRRUS_CFG, OPTIONS, REGION)
+    write_cookies_to_file_cache(config, CIRRUS_CFG, cli_env, cli_region, cirrus_super_user_cookie)
+
+
+def obtain_cirrus_cookies(merged_app_cfg):
+    """Logs into Cirrus over http, falling back to a headless Chrome login when that fails"""
+    config = ConfigSingleton()
+    try:
+        session = login_to_cirrus_with_requests(merged_app_cfg)
+        capture_cirrus_cookies_from_session(config, session, merged_app_cfg)
+        return
+    except (CirrusLoginFailed, requests.RequestException) as ex:
+        logger.warning("{}, falling back to the selenium login".format(ex))
+
+    app_cfg = get_configuration_for_app(config, MISC_CFG, "*", "*")
+    if not bool(unpack_config(app_cfg, MISC_CFG, CONFIG, ENABLE_SELENIUM_LOGIN)):
+        error_and_exit("Failed to login to Cirrus and the selenium login is disabled within the configuration")
+    # Selenium is only imported when it is needed
+    from main.http.cirrus_session_proxy import obtain_cookies_from_cirrus_driver
+    obtain_cookies_from_cirrus_driver(merged_app_cfg, headless=True)
+
+
+def _get_login_lock(env, region):
+    cookie_key = generate_cookie_key(CIRRUS_CFG, env, region)
+    with _login_locks_lock:
+        return _login_locks.setdefault(cookie_key, threading.Lock())
+
+
+def login_to_cirrus(merged_app_cfg):
+    """Logs in afresh, replacing any cached cookie for the env and region"""
+    env = unpack_config(merged_app_cfg, CIRRUS_CFG, OPTIONS, ENV)
+    region = unpack_config(merged_app_cfg, CIRRUS_CFG, OPTIONS, REGION)
+    with _get_login_lock(env, region):
+        obtain_cirrus_cookies(merged_app_cfg)
+
+
+def _refresh_cirrus_cookies(merged_app_cfg, refresh_margin):
+    """Logs in unless another thread has already refreshed the cookie"""
+    env = unpack_config(merged_app_cfg, CIRRUS_CFG, OPTIONS, ENV)
+    region = unpack_config(merged_app_cfg, CIRRUS_CFG, OPTIONS, REGION)
+    with _get_login_lock(env, region):
+        time_to_expiry = get_cookie_time_to_expiry(ConfigSingleton(), CIRRUS_CFG, env, region)
+        if time_to_expiry is not None and time_to_expiry > refresh_margin:
+            return
+        obtain_cirrus_cookies(merged_app_cfg)
+
+
+def ensure_cirrus_cookies(merged_app_cfg):
+    """Logs in when there is no Cirrus cookie, a cookie close to expiry is refreshed in the background while it is still used"""
+    env = unpack_config(merged_app_cfg, CIRRUS_CFG, OPTIONS, ENV)
+    region = unpack_config(merged_app_cfg, CIRRUS_CFG, OPTIONS, REGION)
+    time_to_expiry = get_cookie_time_to_expiry(ConfigSingleton(), CIRRUS_CFG, env, region)
+    if time_to_expiry is None:
+        logger.debug("No Cirrus cookie found, logging in")
+        _refresh_cirrus_cookies(merged_app_cfg, 0)
+    elif time_to_expiry <= COOKIE_REFRESH_MARGIN and not _get_login_lock(env, region).locked():
+        logger.debug("Cirrus cookie expires in {:.0f} seconds, refreshing it".format(time_to_expiry))
+        threading.Thread(target=_refresh_cirrus_cookies, args=(merged_app_cfg, COOKIE_REFRESH_MARGIN), daemon=True).start()
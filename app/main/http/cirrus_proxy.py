@@ -1,12 +1,14 @@
 import base64
 import json
+from http.cookiejar import DefaultCookiePolicy
 
 import requests
 import urllib3
 
-from main.config.configuration import ConfigSingleton, LOGGING_CONFIG_FILE
+from main.config.configuration import ConfigSingleton
 from main.config.constants import CREDENTIALS, USERNAME, PASSWORD, NAME, TYPE, POST, DATA_DICT, MSG_UID, WEEK, DAY_1, \
     MESSAGE_STATUS, DESTINATION, SOURCE, CIRRUS, CIRRUS_CFG, CONFIG, ENV, OPTIONS, REGION, PRD, DEV
+from main.http.cirrus_login_proxy import ensure_cirrus_cookies
 from main.http.proxy_cache import ProxyCache, FailedToCommunicateWithSystem
 from main.model.model_utils import CacheMissException
 from main.utils.utils import get_config_endpoint, unpack_endpoint_cfg, form_system_url, unpack_config, read_cookies_file
@@ -17,9 +19,7 @@ import ssl
 ssl._create_default_https_context = ssl._create_unverified_context
 
 import logging
-from logging.config import fileConfig
 
-fileConfig(LOGGING_CONFIG_FILE)
 logger = logging.getLogger('requester')
 
 VALID_CIRRUS_SEARCH_FIELDS = [SOURCE, DESTINATION, TYPE, MESSAGE_STATUS]
@@ -30,6 +30,9 @@ class CirrusProxy:
     def __init__(self):
         self.configuration = ConfigSingleton()
         self.cache = ProxyCache()
+        # Pooled connections are reused across requests, cookies are always sent explicitly so none are stored
+        self.session = requests.Session()
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
 
     def __get_headers(self, merged_app_cfg):
         env = unpack_config(merged_app_cfg, CIRRUS_CFG, OPTIONS, ENV)
@@ -56,7 +59,7 @@ class CirrusProxy:
             return self.cache.get_cache_result(url)
         except CacheMissException as ce:
             logger.debug(str(ce))
-        response = requests.get(url)
+        response = self.session.get(url)
         if response.status_code != requests.codes["ok"]:
             logger.error("Failed get url: {}, status code: {}".format(url, response.status_code))
             raise FailedToCommunicateWithSystem(CIRRUS, url, response.status_code)
@@ -66,7 +69,7 @@ class CirrusProxy:
     def check_if_valid_url(self, url):
         """This is a HEAD request to a given url to make sure it exists"""
         logger.debug("Issuing simple head request: {}".format(url))
-        response = requests.head(url)
+        response = self.session.head(url)
         return response.status_code == requests.codes["ok"]
 
     def __issue_cirrus_get_request(self, url, merged_app_cfg):
@@ -75,7 +78,7 @@ class CirrusProxy:
             return self.cache.get_cache_result(url)
         except CacheMissException as ce:
             logger.debug(str(ce))
-        response = requests.get(url, headers=self.__get_headers(merged_app_cfg))
+        response = self.session.get(url, headers=self.__get_headers(merged_app_cfg))
         if response.status_code != requests.codes["ok"]:
             logger.error("Failed get webpage: {}, status code: {}".format(url, response.status_code))
             raise FailedToCommunicateWithSystem(CIRRUS, url, response.status_code)
@@ -94,7 +97,7 @@ class CirrusProxy:
             logger.debug(str(ce))
         form_data = json.dumps(data_dict)
         logger.debug("Request data is: {}".format(form_data))
-        response = requests.post(url, data=form_data, headers=headers, verify=False)
+        response = self.session.post(url, data=form_data, headers=headers, verify=False)
         if response.status_code != requests.codes["ok"]:
             logger.error("Failed to issue post request to: {}, received error code: {}".format(url, response.status_code))
             if response.text:
@@ -174,6 +177,8 @@ class CirrusProxy:
         return "Basic {}".format(base64_message)
 
     def __get_cached_cookies(self, merged_app_cfg):
+        # Logs in again if the cookie has expired and refreshes it ahead of expiry during long runs
+        ensure_cirrus_cookies(merged_app_cfg)
         env = unpack_config(merged_app_cfg, CIRRUS_CFG, OPTIONS, ENV)
         region = unpack_config(merged_app_cfg, CIRRUS_CFG, OPTIONS, REGION)
         return read_cookies_file(self.configuration, CIRRUS_CFG, env, region)
@@ -2,7 +2,6 @@ import logging
 import os
 import pathlib
 import time
-from logging.config import fileConfig
 
 from selenium import webdriver
 from selenium.common.exceptions import ElementClickInterceptedException, TimeoutException, SessionNotCreatedException
@@ -11,7 +10,7 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
-from main.config.configuration import ConfigSingleton, LOGGING_CONFIG_FILE
+from main.config.configuration import ConfigSingleton, configure_logging
 from main.config.configuration import get_configuration_dict
 from main.config.constants import CREDENTIALS, USERNAME, PASSWORD, CHROME_DRIVER_FOLDER, \
     MISC_CFG, REGION, ENV, CONFIG, CIRRUS_CFG, \
@@ -20,7 +19,6 @@ from main.utils.utils import error_and_exit, unpack_config, \
     get_endpoint_url, get_merged_app_cfg, write_cookies_to_file_cache, chromedriver_file_exists, \
     get_configuration_for_app
 
-fileConfig(LOGGING_CONFIG_FILE)
 logger = logging.getLogger('selenium')
 
 
@@ -93,7 +91,7 @@ def get_driver_file_and_validate(chrome_driver_dir):
     return chrome_driver_file
 
 
-def obtain_cookies_from_cirrus_driver(merged_app_cfg):
+def obtain_cookies_from_cirrus_driver(merged_app_cfg, headless=False):
     # Get config details and check values
     config = ConfigSingleton()
     app_cfg = get_configuration_for_app(config, MISC_CFG)
@@ -105,8 +103,12 @@ def obtain_cookies_from_cirrus_driver(merged_app_cfg):
 
     logger.info("Attempting to login into Cirrus website to obtain superuser cookies")
     # Connect driver
+    chrome_options = webdriver.ChromeOptions()
+    if headless:
+        chrome_options.add_argument("--headless")
+        chrome_options.add_argument("--window-size=1920,1080")
     try:
-        driver = webdriver.Chrome(chrome_driver_file)
+        driver = webdriver.Chrome(chrome_driver_file, options=chrome_options)
     except SessionNotCreatedException as snce:
         exception_msg = getattr(snce, 'msg', repr(snce))
         if "This version of ChromeDriver only supports Chrome version" in exception_msg:
@@ -213,4 +215,5 @@ def main():
 
 
 if __name__ == '__main__':
+    configure_logging()
     main()
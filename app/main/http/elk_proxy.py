@@ -1,3 +1,4 @@
+import copy
 import datetime
 import json
 import logging
@@ -5,19 +6,19 @@ import operator
 import re
 import hashlib
 from collections import defaultdict
-from logging.config import fileConfig
-from functools import reduce
+from functools import reduce, lru_cache
 from elasticsearch import Elasticsearch
+from elasticsearch.exceptions import RequestError
 
 from main.algorithms.payload_operations import determine_message_playback_count_from_payloads, \
     get_final_message_processing_time_window
-from main.config.configuration import ConfigSingleton, LOGGING_CONFIG_FILE, get_configuration_dict
+from main.config.configuration import ConfigSingleton, get_configuration_dict, configure_logging
 from main.config.constants import ELASTICSEARCH_CREDENTIALS, CREDENTIALS, \
     USERNAME, PASSWORD, ELASTICSEARCH_HOST, ELASTICSEARCH_SCHEME, ELASTICSEARCH_PORT, ELASTICSEARCH_INDEX, MESSAGE_ID, \
     HOST, LOGFILE, HOST_LOG_MAPPINGS, ELASTICSEARCH_SECONDS_MARGIN, \
     LOG_STATEMENT_FOUND, DataType, ELASTICSEARCH_EXCLUDE_LOG_FILES, HOST_LOG_CORRELATION_ID, LOG_LINE_STATS, \
     ELASTICSEARCH_RETAIN_SERVER_OUTPUT, ELASTICSEARCH_SECONDS_MARGIN_FOR_ICE, LogSearchDirection, WEEK, ELASTIC_CFG, \
-    CONFIG
+    CONFIG, ELASTICSEARCH_AGGREGATE_DISCOVERY
 from main.formatter.dual_formatter import LogAndFileFormatter
 from main.formatter.file_output import FileOutputFormatter
 from main.formatter.formatter import Formatter
@@ -29,7 +30,6 @@ from main.http.proxy_cache import ProxyCache, FailedToCommunicateWithSystem
 from main.model.model_utils import CacheMissException
 
 
-fileConfig(LOGGING_CONFIG_FILE)
 logger = logging.getLogger('requester')
 
 ES_QUERY_FILE = "resources/elastic_search_query.json"
@@ -41,9 +41,51 @@ LOG_CORRELATION_END_REGEX = re.compile(r'^\[([^\[]+)\]\s+\[([^\]]+)\]\s+message
 
 PROCESS_START_LOG_MESSAGES = ["start processing msg", "start processing message"]
 PROCESSED_LOG_MESSAGES = [" processed in "]
+# Either of the above lines in one pattern, only lines containing one of the search terms above can match it
+LOG_CORRELATION_LINE_REGEX = re.compile(
+    r'^\[([^\[]+)\]\s+\[[^\]]+\]\s+(?:(?P<start>start processing m(?:sg|essage)\w*)|message \[[^\]]+\]\s* processed in \[[^\]]+\]\s+ms)')
+# Keeps batch queries well within the elasticsearch boolean clause limit
+MAX_BATCH_LOOKUP_UIDS = 100
+# Host/logfile buckets fetched per composite aggregation page and correlation lines kept per bucket
+DISCOVERY_BUCKETS_PAGE_SIZE = 100
+DISCOVERY_CORRELATION_LINES_PER_BUCKET = 100
+DISCOVERY_AGGREGATION = "host_logfiles"
 
 
 
+@lru_cache(maxsize=None)
+def _load_es_query_template():
+    """Parses the elasticsearch query template once, every query is built from a clone of it"""
+    return parse_json_from_file(ES_QUERY_FILE)
+
+
+def _clone_es_query_template():
+    """Copies the template one level deep, nested values are replaced per query rather than mutated"""
+    return {key: copy.copy(value) for key, value in _load_es_query_template().items()}
+
+
+def match_correlation_line(log_message):
+    """Returns the correlation id of a start/end processing log line and whether it is the start line, None otherwise"""
+    match = LOG_CORRELATION_LINE_REGEX.match(log_message)
+    if match:
+        return match.group(1), match.group('start') is not None
+    return None
+
+
+def extract_correlation_lines(message_uid, hits):
+    """Yields (host, logfile, correlation id, is start line, timestamp) for the processing lines of the message uid
+
+    Done in a single pass over the hits, checking the exact uid then the combined start/end pattern on each.
+    """
+    for record in hits:
+        source = record.get('_source')
+        if not source or message_uid not in source['message']:
+            continue
+        correlation = match_correlation_line(source['message'])
+        if correlation:
+            yield source['host']['name'], source['source'], correlation[0], correlation[1], source.get('@timestamp')
+
+
 def _print_filtered_msg_line(record):
     logger.info("{} {} {} {} {}".format(
             record['_source'].get('host', {}).get('name', ''),
@@ -101,6 +143,94 @@ class ElasticsearchProxy:
         result_record = self._filter_by_exact_uid_and_group_by_host_and_logname(message_uid, elasticsearch_results)
         return result_record
 
+    def _aggregate_discovery_enabled(self):
+        return bool(unpack_config(self.merged_app_cfg, ELASTIC_CFG, CONFIG, ELASTICSEARCH_AGGREGATE_DISCOVERY))
+
+    def _lookup_initial_message_results_aggregated(self, message_uid, es_json_query):
+        """Discovers the hosts, logfiles and correlation ids of a message with server side aggregations
+
+        Only the start/end processing lines are returned to the client rather than every log line of the message.
+        """
+        logger.info("Attempt aggregated search of message: {} on elasticsearch server".format(message_uid))
+        search_index = unpack_config(self.merged_app_cfg, ELASTIC_CFG, CONFIG, ELASTICSEARCH_INDEX)
+        host_log_dict = defaultdict(list)
+        correlation_lines = []
+        after_key = None
+        while True:
+            aggregation_query = self._prepare_discovery_aggregation_query(es_json_query, after_key)
+            elasticsearch_results = self._get_elasticsearch_results(search_index, aggregation_query)
+            after_key = self._collect_discovery_buckets(elasticsearch_results, host_log_dict, correlation_lines)
+            if not after_key:
+                break
+        if self._retain_es_server_output():
+            self.file_output_service.output_json_data_to_file(message_uid, DataType.elastic_search_results_correlated, correlation_lines)
+        result_dict = {MESSAGE_ID: message_uid,
+                       HOST_LOG_CORRELATION_ID: self._parse_log_correlation_ids(message_uid, correlation_lines),
+                       LOG_STATEMENT_FOUND: bool(host_log_dict),
+                       HOST_LOG_MAPPINGS: self._prepare_host_to_logfile_records(host_log_dict)}
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("List of host/logs for msg: %s", json.dumps(result_dict[HOST_LOG_MAPPINGS]))
+        return result_dict
+
+    def _discover_message_hosts(self, message_uid, es_json_query):
+        """Uses the aggregation based discovery when configured, falling back to fetching every hit when the index rejects it"""
+        if self._aggregate_discovery_enabled():
+            try:
+                return self._lookup_initial_message_results_aggregated(message_uid, es_json_query)
+            except RequestError as ex:
+                logger.warning("Aggregated elasticsearch search failed, falling back to fetching all hits: {}".format(ex))
+        return self._lookup_initial_message_results_grouped_by_host(message_uid, es_json_query)
+
+    @staticmethod
+    def _prepare_discovery_aggregation_query(es_json_query, after_key=None):
+        """Builds a hit-less query bucketing the matching log lines by host and logfile with their processing lines"""
+        processing_line_clauses = [{"match_phrase": {"message": search_term.strip()}}
+                                   for search_term in PROCESS_START_LOG_MESSAGES + PROCESSED_LOG_MESSAGES]
+        composite = {
+            "size": DISCOVERY_BUCKETS_PAGE_SIZE,
+            "sources": [
+                {HOST: {"terms": {"field": "host.name"}}},
+                {LOGFILE: {"terms": {"field": "source"}}}
+            ]
+        }
+        if after_key:
+            composite["after"] = after_key
+        return {
+            "size": 0,
+            "query": copy.deepcopy(es_json_query["query"]),
+            "aggs": {
+                DISCOVERY_AGGREGATION: {
+                    "composite": composite,
+                    "aggs": {
+                        "processing_lines": {
+                            "filter": {"bool": {"should": processing_line_clauses, "minimum_should_match": 1}},
+                            "aggs": {
+                                "lines": {
+                                    "top_hits": {
+                                        "size": DISCOVERY_CORRELATION_LINES_PER_BUCKET,
+                                        "sort": [{"@timestamp": "asc"}],
+                                        "_source": ["message", "host", "source", "@timestamp"]
+                                    }
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        }
+
+    @staticmethod
+    def _collect_discovery_buckets(result, host_log_dict, correlation_lines):
+        """Adds the host/logfile buckets and their processing lines to the given collections, returns the next page key"""
+        if not result or DISCOVERY_AGGREGATION not in result.get('aggregations', {}):
+            return None
+        aggregation = result['aggregations'][DISCOVERY_AGGREGATION]
+        buckets = aggregation.get('buckets', [])
+        for bucket in buckets:
+            host_log_dict[bucket['key'][HOST]].append(bucket['key'][LOGFILE])
+            correlation_lines.extend(bucket['processing_lines']['lines']['hits']['hits'])
+        return aggregation.get('after_key') if buckets else None
+
     def _lookup_initial_message_results_stats(self, message_uid, es_json_query, hosts_data):
         logger.info("Attempt search of message: {} on elasticsearch server".format(message_uid))
         elasticsearch_results = self._handle_paginated_results(es_json_query)
@@ -131,14 +261,13 @@ class ElasticsearchProxy:
             for current_host in result_record[HOST_LOG_CORRELATION_ID]:
                 for current_host_logfile in result_record[HOST_LOG_CORRELATION_ID][current_host]:
                     if exclude_logs and current_host_logfile in exclude_logs:
-                        logger.debug("Filtering out given log: {} as it is configured as excluded".format(current_host_logfile))
+                        logger.debug("Filtering out given log: %s as it is configured as excluded", current_host_logfile)
                         continue
                     unique_correlation_ids = set(result_record[HOST_LOG_CORRELATION_ID][current_host][current_host_logfile])
                     # filelog_correlation_ids = result_record[HOST_LOG_CORRELATION_ID]
                     logger.info("Attempting to fetch correlated log statements from elasticsearch for host: {} and logfile: {}".format(current_host, current_host_logfile))
-                    self._update_search_record_with_multiple_search_terms(unique_correlation_ids, es_json_query)
-                    self._prepare_query_for_log_retrieval_sorting(es_json_query)
-                    log_lines_result = self._handle_paginated_results(es_json_query)
+                    correlation_query = self._prepare_correlation_query(unique_correlation_ids, es_json_query)
+                    log_lines_result = self._handle_paginated_results(correlation_query)
                     # Dump out the raw results
                     if self._retain_es_server_output():
                         es_filename = self.file_output_service.generate_host_log_filename(message_uid, current_host, current_host_logfile, False)
@@ -158,7 +287,7 @@ class ElasticsearchProxy:
             logger.error("Elasticsearch connection not successfully initialised, aborting lookup request!")
             return None
         es_json_query = self._prepare_elastic_search_query(message_uid, start_time, end_time)
-        result_record = self._lookup_initial_message_results_grouped_by_host(message_uid, es_json_query)
+        result_record = self._discover_message_hosts(message_uid, es_json_query)
         return self._lookup_correlated_ids_for_message(message_uid, es_json_query, result_record)
 
     @staticmethod
@@ -253,7 +382,7 @@ class ElasticsearchProxy:
                     start_count = len(log_data["start_times"])
                 if "end_times" in log_data:
                     end_count = len(log_data["end_times"])
-                logger.debug("Logfile: {}, start count: {}, end count: {}".format(logfile_name, start_count, end_count))
+                logger.debug("Logfile: %s, start count: %s, end count: %s", logfile_name, start_count, end_count)
                 diff_list.append(start_count - end_count)
         return diff_list
 
@@ -284,15 +413,66 @@ class ElasticsearchProxy:
             return None
         # Initial search by msg unique id
         es_json_query = self._prepare_elastic_search_query_from_payloads(message_uid, payloads_list)
-        result_record = self._lookup_initial_message_results_grouped_by_host(message_uid, es_json_query)
+        result_record = self._discover_message_hosts(message_uid, es_json_query)
         return self._lookup_correlated_ids_for_message(message_uid, es_json_query, result_record)
 
+    def lookup_messages(self, message_payloads_dict):
+        """Looks up many messages, given their payloads by message uid, with a single search over their combined time window"""
+        if not self.successfully_initialised:
+            logger.error("Elasticsearch connection not successfully initialised, aborting lookup request!")
+            return None
+        from_dates = []
+        to_dates = []
+        for payloads_list in message_payloads_dict.values():
+            search_from_date, search_to_date = self._get_time_window_dates_from_payloads(payloads_list)
+            if search_from_date:
+                from_dates.append(search_from_date)
+            if search_to_date:
+                to_dates.append(search_to_date)
+        # zulu date strings sort chronologically
+        start_time = min(from_dates) if from_dates else None
+        end_time = max(to_dates) if to_dates else None
+        return self.lookup_messages_within_supplied_time_window(list(message_payloads_dict.keys()), start_time, end_time)
+
+    def lookup_messages_within_supplied_time_window(self, message_uids, start_time, end_time):
+        """Looks up many messages with a single search, returning the results by message uid"""
+        if not self.successfully_initialised:
+            logger.error("Elasticsearch connection not successfully initialised, aborting lookup request!")
+            return None
+        return self._lookup_messages_in_batches(message_uids, start_time, end_time)
+
+    def _lookup_messages_in_batches(self, message_uids, start_time, end_time):
+        results = {}
+        for batch_start in range(0, len(message_uids), MAX_BATCH_LOOKUP_UIDS):
+            batch_uids = message_uids[batch_start:batch_start + MAX_BATCH_LOOKUP_UIDS]
+            logger.info("Attempt search of {} messages on elasticsearch server".format(len(batch_uids)))
+            es_json_query = self._prepare_elastic_search_batch_query(batch_uids, start_time, end_time)
+            elasticsearch_results = self._handle_search_after_results(es_json_query)
+            for message_uid, message_results in self._group_hits_by_message_uid(batch_uids, elasticsearch_results).items():
+                result_record = self._filter_by_exact_uid_and_group_by_host_and_logname(message_uid, message_results)
+                message_query = self._prepare_elastic_search_query(message_uid, start_time, end_time)
+                results[message_uid] = self._lookup_correlated_ids_for_message(message_uid, message_query, result_record)
+        return results
+
+    @staticmethod
+    def _group_hits_by_message_uid(message_uids, result):
+        """Splits the hits of a batch search by the message uids they contain, in a single pass through the hits"""
+        message_uid_regex = re.compile("|".join(re.escape(message_uid) for message_uid in message_uids))
+        grouped_hits = {message_uid: [] for message_uid in message_uids}
+        if result:
+            for log_line in result['hits']['hits']:
+                if '_source' in log_line:
+                    for message_uid in set(message_uid_regex.findall(log_line['_source']['message'])):
+                        grouped_hits[message_uid].append(log_line)
+        return {message_uid: {"hits": {"total": {"value": len(hits)}, "hits": hits}} for message_uid, hits in grouped_hits.items()}
+
     def _get_elasticsearch_results(self, search_index, es_json_query):
         """Issues elasticsearch query and returns results issuing standard logs statements"""
-        logger.debug("Querying elastic search on index: {} with query: {}".format(search_index, json.dumps(es_json_query)))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Querying elastic search on index: %s with query: %s", search_index, json.dumps(es_json_query))
         elasticsearch_results = self.es.search(index=search_index, body=es_json_query)
         if elasticsearch_results:
-            logger.debug("Received %d hits from elasticsearch query" % elasticsearch_results['hits']['total']['value'])
+            logger.debug("Received %d hits from elasticsearch query", elasticsearch_results['hits']['total']['value'])
             return elasticsearch_results
         else:
             logger.debug("No results found for elastic search msg query")
@@ -305,29 +485,58 @@ class ElasticsearchProxy:
         search_index = unpack_config(self.merged_app_cfg, ELASTIC_CFG, CONFIG, ELASTICSEARCH_INDEX)
 
         logger.debug("Handling elastic search paginated request on index: {}".format(search_index))
-        # Issue initial query
-        es_json_query["size"] = elasticsearch_batch_size
-        if "from" in es_json_query:
-            del es_json_query["from"]
-        intial_elasticsearch_results = self._get_elasticsearch_results(search_index, es_json_query)
+        # Issue initial query, pages are requested with shallow copies so the given query is left untouched
+        page_query = dict(es_json_query, size=elasticsearch_batch_size)
+        page_query.pop("from", None)
+        intial_elasticsearch_results = self._get_elasticsearch_results(search_index, page_query)
         # capture result set size
         result_set_size = self._get_es_result_count(intial_elasticsearch_results)
         # Do we have more records to fetch?
         if result_set_size > elasticsearch_batch_size:
-            logger.debug("{} elastic search results received from a total of: {}".format(elasticsearch_batch_size, result_set_size))
+            logger.debug("%s elastic search results received from a total of: %s", elasticsearch_batch_size, result_set_size)
             cummulative_result_set = intial_elasticsearch_results
             upper_bound = min(elasticsearch_max_result_limit, result_set_size)
             for from_value in range(elasticsearch_batch_size, upper_bound, elasticsearch_batch_size):
-                es_json_query["from"] = from_value
-                es_json_query["size"] = elasticsearch_batch_size
-                logger.debug("Fetching elastic search results from postiion: {}".format(from_value))
-                intermediate_elasticsearch_results = self._get_elasticsearch_results(search_index, es_json_query)
+                page_query = dict(es_json_query, size=elasticsearch_batch_size)
+                page_query["from"] = from_value
+                logger.debug("Fetching elastic search results from postiion: %s", from_value)
+                intermediate_elasticsearch_results = self._get_elasticsearch_results(search_index, page_query)
                 if intermediate_elasticsearch_results and intermediate_elasticsearch_results["hits"]["hits"]:
                     cummulative_result_set["hits"]["hits"].extend(intermediate_elasticsearch_results["hits"]["hits"])
+            if result_set_size > elasticsearch_max_result_limit:
+                logger.warning("Only fetched {} of {} elastic search results, the remainder are beyond the max result limit".format(
+                    len(cummulative_result_set["hits"]["hits"]), result_set_size))
             return cummulative_result_set
         else:
             return intial_elasticsearch_results
 
+    def _handle_search_after_results(self, es_json_query):
+        """Fetches every hit of the query, paging with search_after as from/size paging stops at the max result limit
+
+        Batch queries of many message uids can easily match more log lines than that limit.
+        """
+        elasticsearch_batch_size = unpack_config(self.merged_app_cfg, ELASTIC_CFG, CONFIG, "elasticsearch_batch_size")
+        search_index = unpack_config(self.merged_app_cfg, ELASTIC_CFG, CONFIG, ELASTICSEARCH_INDEX)
+
+        # A unique sort is needed to carry on from the last hit of each page
+        page_query = dict(es_json_query, size=elasticsearch_batch_size, sort=[{"@timestamp": "asc"}, {"_id": "asc"}])
+        page_query.pop("from", None)
+        elasticsearch_results = self._get_elasticsearch_results(search_index, page_query)
+        if not elasticsearch_results:
+            return None
+        page_hits = elasticsearch_results["hits"]["hits"]
+        while len(page_hits) == elasticsearch_batch_size:
+            page_query = dict(page_query, search_after=page_hits[-1]["sort"])
+            logger.debug("Fetching elastic search results after: %s", page_hits[-1]["sort"])
+            page_results = self._get_elasticsearch_results(search_index, page_query)
+            page_hits = page_results["hits"]["hits"] if page_results else []
+            elasticsearch_results["hits"]["hits"].extend(page_hits)
+
+        total_hits = elasticsearch_results["hits"]["total"]
+        if total_hits.get("relation", "eq") == "eq" and total_hits["value"] > len(elasticsearch_results["hits"]["hits"]):
+            logger.warning("Only fetched {} of {} elastic search results".format(len(elasticsearch_results["hits"]["hits"]), total_hits["value"]))
+        return elasticsearch_results
+
     @staticmethod
     def _prepare_search_term(search_key):
         temp_term = search_key.replace('-', ' ')
@@ -341,20 +550,42 @@ class ElasticsearchProxy:
         return results
 
     @staticmethod
-    def _update_search_record_with_multiple_search_terms(correlation_ids_list, query_json):
-        # correlation_ids_list = self._obtain_all_correlation_ids(filelog_correlation_ids)
-        correlation_query_list = [{"multi_match": {"query": ElasticsearchProxy._prepare_search_term(cid), "fields": ["message"], "type": "phrase", "operator": "and"}} for cid in correlation_ids_list]
-        if "must" in query_json['query']['bool']:
-            del query_json['query']['bool']['must']
-        query_json['query']['bool']['should'] = correlation_query_list
+    def _build_uid_clause(message_uid):
+        """Phrase match on the message uid, using the match settings of the query template"""
+        template_match = _load_es_query_template()['query']['bool']['must'][0]['multi_match']
+        return {"multi_match": dict(template_match, query=ElasticsearchProxy._prepare_search_term(message_uid))}
 
     @staticmethod
-    def _update_search_record_with_search_term(search_key, query_json):
-        search_message_id = ElasticsearchProxy._prepare_search_term(search_key)
-        query_json['query']['bool']['must'][0]['multi_match']['query'] = search_message_id
+    def _build_correlation_clauses(correlation_ids_list):
+        return [{"multi_match": {"query": ElasticsearchProxy._prepare_search_term(cid), "fields": ["message"], "type": "phrase", "operator": "and"}} for cid in correlation_ids_list]
 
     @staticmethod
-    def _get_time_window_dates_from_payloads(message_payloads):
+    def _build_time_range_clause(search_from_date, search_to_date):
+        """Timestamp range filter, the template bounds are kept for any date not given"""
+        time_range = dict(_load_es_query_template()['query']['bool']['filter'][0]['range']['@timestamp'])
+        if search_from_date:
+            time_range['gte'] = search_from_date
+        if search_to_date:
+            time_range['lte'] = search_to_date
+        return {"range": {"@timestamp": time_range}}
+
+    @staticmethod
+    def _build_query(bool_query):
+        query_json = _clone_es_query_template()
+        query_json['query'] = {"bool": bool_query}
+        return query_json
+
+    @staticmethod
+    def _prepare_correlation_query(correlation_ids_list, query_json):
+        """Query for the log lines of the given correlation ids within the time window of the given query"""
+        correlation_query = ElasticsearchProxy._build_query({
+            "should": ElasticsearchProxy._build_correlation_clauses(correlation_ids_list),
+            "filter": list(query_json['query']['bool']['filter'])
+        })
+        ElasticsearchProxy._prepare_query_for_log_retrieval_sorting(correlation_query)
+        return correlation_query
+
+    def _get_time_window_dates_from_payloads(self, message_payloads):
         """Gets the elk logs search window from the payloads, taking into consideration how many times the msg has been processed"""
         search_from_date, search_to_date = (None, None)
         if message_payloads:
@@ -364,32 +595,36 @@ class ElasticsearchProxy:
             # Only get the logs for the last processing on the message:
             from_date, to_date = get_final_message_processing_time_window(message_payloads, message_repeat_count)
             logger.debug("search window from payloads is: from:    {}, to: {}".format(convert_timestamp_to_datetime_str(from_date), convert_timestamp_to_datetime_str(to_date)))
-            search_from_date, search_to_date = ElasticsearchProxy._prepare_search_time_window(from_date, to_date)
+            search_from_date, search_to_date = self._prepare_search_time_window(from_date, to_date)
             logger.debug("Search window after adding margin: from: {}, to: {}".format(search_from_date, search_to_date))
         return search_from_date, search_to_date
 
-    @staticmethod
-    def _prepare_elastic_search_query_from_payloads(message_uid, message_payloads):
+    def _prepare_elastic_search_query_from_payloads(self, message_uid, message_payloads):
         # obtain and format values for search purposes
-        search_from_date, search_to_date = ElasticsearchProxy._get_time_window_dates_from_payloads(message_payloads)
+        search_from_date, search_to_date = self._get_time_window_dates_from_payloads(message_payloads)
         return ElasticsearchProxy._prepare_elastic_search_query(message_uid, search_from_date, search_to_date)
 
     @staticmethod
     def _prepare_elastic_search_query(message_uid, search_from_date, search_to_date):
-        # Read query string and update
-        query_json = parse_json_from_file(ES_QUERY_FILE)
-        ElasticsearchProxy._update_search_record_with_search_term(message_uid, query_json)
-        if search_from_date:
-            query_json['query']['bool']['filter'][0]['range']['@timestamp']['gte'] = search_from_date
-        if search_to_date:
-            query_json['query']['bool']['filter'][0]['range']['@timestamp']['lte'] = search_to_date
-        return query_json
+        return ElasticsearchProxy._build_query({
+            "must": [ElasticsearchProxy._build_uid_clause(message_uid)],
+            "filter": [ElasticsearchProxy._build_time_range_clause(search_from_date, search_to_date)]
+        })
+
+    @staticmethod
+    def _prepare_elastic_search_batch_query(message_uids, search_from_date, search_to_date):
+        """Query matching any of the given message uids"""
+        return ElasticsearchProxy._build_query({
+            "should": [ElasticsearchProxy._build_uid_clause(message_uid) for message_uid in message_uids],
+            "minimum_should_match": 1,
+            "filter": [ElasticsearchProxy._build_time_range_clause(search_from_date, search_to_date)]
+        })
 
     def _prepare_search_time_window(self, from_timestamp, to_timestamp):
         """Given the from and to Cirrus timestamps time window add a little margin either side"""
         from_date = convert_timestamp_to_datetime(from_timestamp)
         to_date = convert_timestamp_to_datetime(to_timestamp)
-        time_delta = self.self._get_seconds_time_delta(False)
+        time_delta = self._get_seconds_time_delta(False)
         from_date = from_date - time_delta
         to_date = to_date + time_delta
         return format_datetime_to_zulu(from_date), format_datetime_to_zulu(to_date)
@@ -486,50 +721,38 @@ class ElasticsearchProxy:
 
         result_dict[LOG_STATEMENT_FOUND] = has_matched_message_uid
         result_dict[HOST_LOG_MAPPINGS] = self._prepare_host_to_logfile_records(host_log_dict)
-        logger.debug("List of host/logs for msg: {}".format(json.dumps(result_dict[HOST_LOG_MAPPINGS])))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("List of host/logs for msg: %s", json.dumps(result_dict[HOST_LOG_MAPPINGS]))
         return result_dict
 
     def _filter_by_exact_uid_and_obtain_start_end_processing_times(self, message_uid, result, hosts_data):
         """Given the message uid elasticsearch results, verify the data is for the correct uid and pull out host details etc"""
-        filter_strings = PROCESS_START_LOG_MESSAGES + PROCESSED_LOG_MESSAGES
         if result:
             if self._retain_es_server_output():
                 self.file_output_service.output_json_data_to_file(message_uid, DataType.elastic_search_results, result)
             current_host = ""
-            # Only consider results with our exact msg uid
-            filtered_by_message_uid = [log_line for log_line in result['hits']['hits'] if '_source' in log_line and message_uid in log_line['_source']['message']]
-
-            # Obtain all host and logfile values
-            for record in filtered_by_message_uid:
-                if record['_source']['host']:
-                    current_host = record['_source']['host']['name']
+            # Single pass over the results, only considering those with our exact msg uid
+            for record in result['hits']['hits']:
+                source = record.get('_source')
+                if not source or message_uid not in source['message']:
+                    continue
+                # Obtain all host and logfile values
+                if source['host']:
+                    current_host = source['host']['name']
                     hosts_data[current_host]
-                if record['_source']['source']:
-                    log_file_name = record['_source']['source']
+                if source['source']:
+                    log_file_name = source['source']
                     if current_host and log_file_name:
                         hosts_data[current_host][log_file_name]
-                if self.filter_log_statements(record, filter_strings):
-                    log_correlation_id = None
-                    match = LOG_CORRELATION_REGEX.match(record['_source']['message'])
-                    current_host = record['_source']['host']['name']
-                    log_file_name = record['_source']['source']
-                    list_keys = ["correlation_ids", "start_times", "end_times"]
-                    for key in list_keys:
-                        if not key in hosts_data[current_host][log_file_name]:
-                            hosts_data[current_host][log_file_name][key] = []
-
-                    if match and len(match.groups()) == 2:
-                        start_time = record['_source'].get('@timestamp', None)
-                        log_correlation_id = match.group(1)
-                        hosts_data[current_host][log_file_name]["correlation_ids"].append(log_correlation_id)
-                        hosts_data[current_host][log_file_name]["start_times"].append(start_time)
-                    else:
-                        match = LOG_CORRELATION_END_REGEX.match(record['_source']['message'])
-                        if match and len(match.groups()) == 4:
-                            log_correlation_id = match.group(1)
-                            end_time = record['_source'].get('@timestamp', None)
-                            hosts_data[current_host][log_file_name]["correlation_ids"].append(log_correlation_id)
-                            hosts_data[current_host][log_file_name]["start_times"].append(end_time)
+                correlation = match_correlation_line(source['message'])
+                if correlation:
+                    log_correlation_id, is_start_line = correlation
+                    log_data = hosts_data[source['host']['name']][source['source']]
+                    for key in ["correlation_ids", "start_times", "end_times"]:
+                        if key not in log_data:
+                            log_data[key] = []
+                    log_data["correlation_ids"].append(log_correlation_id)
+                    log_data["start_times" if is_start_line else "end_times"].append(source.get('@timestamp', None))
             # End for
         return hosts_data
 
@@ -538,34 +761,13 @@ class ElasticsearchProxy:
             return [{HOST: hostname, LOGFILE: logname} for hostname, logs_list in host_log_dict.items() for logname in set(logs_list)]
         return None
 
-    def filter_log_statements(self, log_statement, filter_strings):
-        for start_search_term in filter_strings:
-            if start_search_term in log_statement["_source"]["message"]:
-                return True
-        return False
-
     def _parse_log_correlation_ids(self, message_uid, result):
         logger.debug("Obtaining log correlation ids from elk results")
         new_results_map = defaultdict(lambda: defaultdict(list))
-        filter_strings = PROCESS_START_LOG_MESSAGES + PROCESSED_LOG_MESSAGES
         exclude_logs = unpack_config(self.merged_app_cfg, ELASTIC_CFG, CONFIG, ELASTICSEARCH_EXCLUDE_LOG_FILES)
-        filtered_log_lines = [record2 for record2 in [record for record in result if '_source' in record and message_uid in record['_source']['message']] if self.filter_log_statements(record2, filter_strings)]
-        for filtered_record in filtered_log_lines:
-            # self._print_filtered_msg_line(filtered_record)
-            match = LOG_CORRELATION_REGEX.match(filtered_record['_source']['message'])
-            log_correlation_id = None
-            if match and len(match.groups()) == 2:
-                log_correlation_id = match.group(1)
-            else:
-                match = LOG_CORRELATION_END_REGEX.match(filtered_record['_source']['message'])
-                if match and len(match.groups()) == 4:
-                    log_correlation_id = match.group(1)
-            if log_correlation_id:
-                logfile = filtered_record['_source']['source']
-                if not logfile in exclude_logs:
-                    current_host = filtered_record['_source']['host']['name']
-                    # logger.debug("Found log correlation id: {} within log: {}".format(log_correlation_id, logfile))
-                    new_results_map[current_host][logfile].append(log_correlation_id)
+        for current_host, logfile, log_correlation_id, _, _ in extract_correlation_lines(message_uid, result):
+            if not exclude_logs or logfile not in exclude_logs:
+                new_results_map[current_host][logfile].append(log_correlation_id)
         return new_results_map
 
 
@@ -645,4 +847,5 @@ def main():
 
 
 if __name__ == '__main__':
+    configure_logging()
     main()
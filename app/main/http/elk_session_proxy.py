@@ -2,7 +2,6 @@ import logging
 import os
 import pathlib
 import time
-from logging.config import fileConfig
 
 from selenium import webdriver
 from selenium.common.exceptions import ElementClickInterceptedException, TimeoutException, SessionNotCreatedException
@@ -11,13 +10,12 @@ from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 
-from main.config.configuration import ConfigSingleton, LOGGING_CONFIG_FILE
+from main.config.configuration import ConfigSingleton, configure_logging
 from main.config.configuration import get_configuration_dict
 from main.config.constants import CREDENTIALS, USERNAME, PASSWORD, CHROME_DRIVER_FOLDER, \
     CACHED_COOKIE, CACHE_REF, MIN_30, CIRRUS_CREDENTIALS, CIRRUS_LOGIN, URL
 from main.utils.utils import error_and_exit, get_config_for_website
 
-fileConfig(LOGGING_CONFIG_FILE)
 logger = logging.getLogger('selenium')
 
 
@@ -153,4 +151,5 @@ def main():
 
 
 if __name__ == '__main__':
+    configure_logging()
     main()
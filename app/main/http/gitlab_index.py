@@ -0,0 +1,167 @@
+import datetime
+import logging
+import time
+from concurrent.futures.thread import ThreadPoolExecutor
+from itertools import islice
+from types import SimpleNamespace
+
+from main.config.constants import WEEK, DAY_1, HOUR_1, MIN_5
+from main.http.proxy_cache import ProxyCache
+from main.model.model_utils import CacheMissException
+
+logger = logging.getLogger('requester')
+
+GITLAB_PAGE_SIZE = 100
+MAX_GITLAB_PAGE_WORKERS = 6
+# Projects active since the last refresh are fetched after this long, the whole index is rebuilt daily to drop deleted
+# projects and pick up group changes, as groups have no activity filter
+INDEX_REFRESH_INTERVAL = MIN_5
+INDEX_REBUILD_INTERVAL = DAY_1
+# GitLab only updates a project's last_activity_at about once an hour, so refreshes look back this much further
+LAST_ACTIVITY_OVERLAP = HOUR_1
+
+PROJECTS = "projects"
+GROUPS = "groups"
+BRANCHES = "branches"
+REFRESHED_AT = "refreshed_at"
+REBUILT_AT = "rebuilt_at"
+LAST_ACTIVITY_AT = "last_activity_at"
+
+PROJECT_FIELDS = ["id", "name", "path_with_namespace", "visibility", "description", "archived", LAST_ACTIVITY_AT]
+GROUP_FIELDS = ["id", "name", "path", "full_path", "visibility", "description"]
+BRANCH_FIELDS = ["name", "merged", "protected", "developers_can_push", "developers_can_merge", "can_push", "default", "web_url"]
+
+
+def fetch_all_pages(manager, **list_options):
+    """Lists every record of a python-gitlab manager, the pages after the first are fetched concurrently"""
+    # Given a page python-gitlab returns a plain list, without it a lazy listing that holds the first page and the page count
+    first_page = manager.list(as_list=False, per_page=GITLAB_PAGE_SIZE, **list_options)
+    total_pages = first_page.total_pages
+    if total_pages is None:
+        # GitLab leaves out the page count for very large results, so walk the pages one after another
+        return list(first_page)
+    records = list(islice(first_page, GITLAB_PAGE_SIZE))
+    if total_pages > 1:
+        logger.debug("Fetching {} more pages of {}".format(total_pages - 1, type(manager).__name__))
+        with ThreadPoolExecutor(max_workers=min(MAX_GITLAB_PAGE_WORKERS, total_pages - 1)) as executor:
+            for page_records in executor.map(lambda page: manager.list(page=page, per_page=GITLAB_PAGE_SIZE, **list_options),
+                                             range(2, total_pages + 1)):
+                records.extend(page_records)
+    return records
+
+
+def to_index_record(gitlab_object, fields):
+    return {field: getattr(gitlab_object, field, None) for field in fields}
+
+
+def to_project_record(project):
+    project_record = to_index_record(project, PROJECT_FIELDS)
+    namespace = getattr(project, "namespace", None) or {}
+    project_record["namespace_id"] = namespace.get("id")
+    project_record["namespace_full_path"] = namespace.get("full_path")
+    return project_record
+
+
+def format_gitlab_datetime(timestamp):
+    return datetime.datetime.utcfromtimestamp(timestamp).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def parse_gitlab_datetime(datetime_str):
+    """GitLab dates carry their utc offset, eg 2020-08-19T10:05:16.000+01:00"""
+    return datetime.datetime.fromisoformat(datetime_str.replace("Z", "+00:00"))
+
+
+class GitlabIndex:
+    """Local index of the GitLab projects, groups and branches, kept in the disk cache and refreshed incrementally
+
+    Records are returned as simple namespaces holding the indexed fields of the python-gitlab objects.
+    """
+
+    def __init__(self, git_interface, cache=None):
+        self.git_interface = git_interface
+        self.cache = cache or ProxyCache(disabled=False)
+        self.cache_key = "gitlab-index:{}".format(git_interface.url)
+        self._index = None
+
+    def _get_index(self):
+        if self._index is None:
+            try:
+                self._index = self.cache.get_cache_result_dict(self.cache_key)
+            except CacheMissException:
+                pass
+        now = time.time()
+        if self._index is None or now - self._index[REBUILT_AT] > INDEX_REBUILD_INTERVAL:
+            self._rebuild(now)
+        elif now - self._index[REFRESHED_AT] > INDEX_REFRESH_INTERVAL:
+            self._refresh(now)
+        return self._index
+
+    def _store(self):
+        self.cache.store_cache_result_dict(self.cache_key, self._index, WEEK)
+
+    def _rebuild(self, now):
+        logger.info("Building the local GitLab index")
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            projects_future = executor.submit(fetch_all_pages, self.git_interface.projects)
+            groups_future = executor.submit(fetch_all_pages, self.git_interface.groups)
+            projects = projects_future.result()
+            groups = groups_future.result()
+        self._index = {
+            PROJECTS: {str(project.id): to_project_record(project) for project in projects},
+            GROUPS: {str(group.id): to_index_record(group, GROUP_FIELDS) for group in groups},
+            BRANCHES: {},
+            REFRESHED_AT: now,
+            REBUILT_AT: now
+        }
+        self._store()
+
+    def _refresh(self, now):
+        last_activity_after = format_gitlab_datetime(self._index[REFRESHED_AT] - LAST_ACTIVITY_OVERLAP)
+        projects = fetch_all_pages(self.git_interface.projects, last_activity_after=last_activity_after)
+        logger.debug("Refreshing {} GitLab projects active after: {}".format(len(projects), last_activity_after))
+        self._index[PROJECTS].update((str(project.id), to_project_record(project)) for project in projects)
+        self._index[REFRESHED_AT] = now
+        self._store()
+
+    def projects(self):
+        """All the projects, newest first"""
+        project_records = sorted(self._get_index()[PROJECTS].values(), key=lambda record: record["id"], reverse=True)
+        return [SimpleNamespace(**record) for record in project_records]
+
+    def groups(self):
+        group_records = sorted(self._get_index()[GROUPS].values(), key=lambda record: record["name"].lower())
+        return [SimpleNamespace(**record) for record in group_records]
+
+    def projects_for_group(self, group):
+        """Projects directly within the group, given by id or full path"""
+        return [project for project in self.projects() if str(project.namespace_id) == str(group) or project.namespace_full_path == group]
+
+    def search_projects(self, search_pattern):
+        return [project for project in self.projects() if search_pattern.match(project.name)]
+
+    def search_groups(self, search_pattern):
+        return [group for group in self.groups() if search_pattern.match(group.name)]
+
+    def _find_project_record(self, project):
+        project_records = self._get_index()[PROJECTS]
+        if str(project) in project_records:
+            return project_records[str(project)]
+        return next((record for record in project_records.values() if record["path_with_namespace"] == project), None)
+
+    def branches_for_project(self, project):
+        """Branches of the project given by id or path, only fetched again once the project has seen activity"""
+        project_record = self._find_project_record(project)
+        if project_record is None:
+            logger.warning("Project: {} is not in the local GitLab index".format(project))
+            return [SimpleNamespace(**to_index_record(branch, BRANCH_FIELDS))
+                    for branch in fetch_all_pages(self.git_interface.projects.get(project, lazy=True).branches)]
+
+        project_id = str(project_record["id"])
+        branches_entry = self._index[BRANCHES].get(project_id)
+        if branches_entry is None or branches_entry[LAST_ACTIVITY_AT] != project_record[LAST_ACTIVITY_AT]:
+            branches = fetch_all_pages(self.git_interface.projects.get(project_record["id"], lazy=True).branches)
+            branches_entry = {LAST_ACTIVITY_AT: project_record[LAST_ACTIVITY_AT],
+                              BRANCHES: [to_index_record(branch, BRANCH_FIELDS) for branch in branches]}
+            self._index[BRANCHES][project_id] = branches_entry
+            self._store()
+        return [SimpleNamespace(**record) for record in branches_entry[BRANCHES]]
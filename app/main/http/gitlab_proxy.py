@@ -1,7 +1,19 @@
+import heapq
+import logging
+from concurrent.futures.thread import ThreadPoolExecutor
+from itertools import islice
+
 import gitlab
 
 from main.config.configuration import ConfigSingleton
 from main.config.constants import GITLAB_CONFIG_FILE, GITLAB_DEFAULT_ID, GITLAB, CREDENTIALS
+from main.http.gitlab_index import GitlabIndex, GITLAB_PAGE_SIZE, parse_gitlab_datetime
+
+logger = logging.getLogger('requester')
+
+# The number of records GitLab lists without --all
+GITLAB_DEFAULT_LIST_SIZE = 20
+MAX_GITLAB_PROJECT_WORKERS = 8
 
 
 # TODO update class to handle output as json parameter
@@ -13,6 +25,8 @@ class GitlabProxy:
         config_file = self.configuration.get(CREDENTIALS).get(GITLAB).get(GITLAB_CONFIG_FILE)
         default_git_id = self.configuration.get(CREDENTIALS).get(GITLAB).get(GITLAB_DEFAULT_ID)
         self.git_interface = gitlab.Gitlab.from_config(default_git_id, [config_file])
+        # Projects, groups and branches are listed and searched from the local index
+        self.index = GitlabIndex(self.git_interface)
 
     def __handle_options__(self, options, include_all=False):
         search_options = {}
@@ -22,15 +36,15 @@ class GitlabProxy:
             search_options['all'] = True
         return search_options
 
+    @staticmethod
+    def __limit_records__(records, options):
+        return records if options['all'] else records[:GITLAB_DEFAULT_LIST_SIZE]
+
     def list_groups(self, options):
-        search_options = self.__handle_options__(options, True)
-        groups = self.git_interface.groups.list(**search_options)
-        return groups
+        return self.index.groups()
 
     def list_projects(self, options):
-        search_options = self.__handle_options__(options)
-        projects = self.git_interface.projects.list(**search_options)
-        return projects
+        return self.__limit_records__(self.index.projects(), options)
 
     # The search term here seems to be for simple text only, but it is faster to execute on the server
     def search_projects(self, search_term, options):
@@ -40,38 +54,84 @@ class GitlabProxy:
         return projects
 
     def list_projects_for_group(self, group_id, options):
-        projects = None
-        group = self.git_interface.groups.get(group_id)
-        if group:
-            search_options = self.__handle_options__(options)
-            projects = group.projects.list(**search_options)
-        return projects
+        return self.__limit_records__(self.index.projects_for_group(group_id), options)
 
     def search_group(self, search_pattern, options):
-        search_options = self.__handle_options__(options, True)
-        groups = self.git_interface.groups.list(**search_options)
-        return [record for record in groups if search_pattern.match(record.name)]
+        return self.index.search_groups(search_pattern)
 
     def search_project(self, search_pattern, options):
-        search_options = self.__handle_options__(options)
-        projects = self.git_interface.projects.list(**search_options)
-        return [record for record in projects if search_pattern.match(record.name)]
+        return self.index.search_projects(search_pattern)
 
     def list_branches_for_project(self, project_id, options):
-        my_project = self.git_interface.projects.get(project_id)
-        branches = my_project.branches.list()
-        return branches
+        return self.index.branches_for_project(project_id)
 
     def list_tags_for_project(self, project_id, options):
-        my_project = self.git_interface.projects.get(project_id)
-        repositories = my_project.repositories.list()
-        repository = repositories.pop()
-        tags = repository.tags.list()
+        """Tags of all the container registry repositories of the project"""
+        my_project = self.git_interface.projects.get(project_id, lazy=True)
+        search_options = self.__handle_options__(options)
+        tags = []
+        for repository in my_project.repositories.list():
+            tags.extend(repository.tags.list(**search_options))
         return tags
 
-    def list_commits_for_project(self, project_id, options):
-        my_project = self.git_interface.projects.get(project_id)
-        # commits = my_project.commits.list(ref_name='my_branch')
-        # commits = my_project.commits.list(since='2016-01-01T00:00:00Z')
-        commits = my_project.commits.list()
-        return commits
\ No newline at end of file
+    def list_commits_for_project(self, project_id, options, commit_filters=None):
+        """Commits of the project, the since, until and ref_name filters are applied by GitLab"""
+        my_project = self.git_interface.projects.get(project_id, lazy=True)
+        search_options = self.__handle_options__(options)
+        search_options.update(commit_filters or {})
+        commits = my_project.commits.list(**search_options)
+        return commits
+
+    def _iter_project_commits(self, project, commit_filters):
+        """Creating the listing fetches the first page, further pages are fetched as they are iterated over
+
+        A project whose commits can't be listed, eg an empty repository, is skipped so the rest of the group carries on.
+        """
+        try:
+            commits = self.git_interface.projects.get(project.id, lazy=True).commits.list(as_list=False, per_page=GITLAB_PAGE_SIZE, **commit_filters)
+        except gitlab.exceptions.GitlabError as ex:
+            logger.warning("Skipping the commits of project: {}, {}".format(project.name, ex))
+            return iter([])
+        return self._iter_listed_commits(project, commits)
+
+    @staticmethod
+    def _iter_listed_commits(project, commits):
+        try:
+            for commit in commits:
+                yield project, commit
+        except gitlab.exceptions.GitlabError as ex:
+            logger.warning("Stopped listing the commits of project: {}, {}".format(project.name, ex))
+
+    def _list_group_project_tags(self, project, options):
+        """Tags of a project within a group listing, a project without a usable registry has none"""
+        try:
+            return self.list_tags_for_project(project.id, options)
+        except gitlab.exceptions.GitlabError as ex:
+            logger.warning("Skipping the tags of project: {}, {}".format(project.name, ex))
+            return []
+
+    def iter_commits_for_group(self, group, options, commit_filters=None):
+        """(project, commit) for the projects of the group, merged newest first as GitLab lists each project's commits
+
+        The first page of every project is fetched concurrently, later pages only as the merge reaches them.
+        """
+        projects = self.index.projects_for_group(group)
+        if not projects:
+            return iter([])
+        with ThreadPoolExecutor(max_workers=min(MAX_GITLAB_PROJECT_WORKERS, len(projects))) as executor:
+            project_commits = list(executor.map(lambda project: self._iter_project_commits(project, commit_filters or {}), projects))
+        merged_commits = heapq.merge(*project_commits, key=lambda item: parse_gitlab_datetime(item[1].committed_date), reverse=True)
+        return merged_commits if options['all'] else islice(merged_commits, GITLAB_DEFAULT_LIST_SIZE)
+
+    def iter_tags_for_group(self, group, options):
+        """(project, tag) for the projects of the group by project name, the projects are fetched concurrently
+
+        The registry tag listing carries no dates, so unlike commits these can't be merged by date.
+        """
+        projects = sorted(self.index.projects_for_group(group), key=lambda project: project.name)
+        if not projects:
+            return
+        with ThreadPoolExecutor(max_workers=min(MAX_GITLAB_PROJECT_WORKERS, len(projects))) as executor:
+            for project, tags in zip(projects, executor.map(lambda project: self._list_group_project_tags(project, options), projects)):
+                for tag in tags:
+                    yield project, tag
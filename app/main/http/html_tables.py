@@ -0,0 +1,65 @@
+from lxml import etree, html
+
+import logging
+
+logger = logging.getLogger('requester')
+
+TABLE_HEADER = "header"
+TABLE_ROWS = "rows"
+
+
+def parse_html_document(page_text):
+    """Parses the page with lxml, which is several times quicker than BeautifulSoup for the large ADM and ICE tables
+
+    The page is handed over as utf-8 bytes as lxml rejects strings carrying an encoding declaration.
+    Returns None for an empty page.
+    """
+    if not page_text or not page_text.strip():
+        return None
+    try:
+        return html.document_fromstring(page_text.encode("utf-8"), parser=html.HTMLParser(encoding="utf-8"))
+    except etree.ParserError as ex:
+        logger.error("Failed to parse html page: {}".format(ex))
+        return None
+
+
+def find_first(element, tag_name):
+    """First descendant with the given tag name, None if there is none"""
+    return next(element.iterdescendants(tag_name), None) if element is not None else None
+
+
+def find_first_with_class(element, tag_name, class_name):
+    """First descendant with the given tag name having the class name amongst its classes"""
+    if element is None:
+        return None
+    matches = element.xpath(".//{}[contains(concat(' ', normalize-space(@class), ' '), ' {} ')]".format(tag_name, class_name))
+    return matches[0] if matches else None
+
+
+def get_row_cells(row, cell_tag="td"):
+    return [cell.text_content() for cell in row.iterdescendants(cell_tag)]
+
+
+def get_header_cells(element, cell_tag="td"):
+    """Cell values of the first header row within the element, None when the element has no thead"""
+    header_row = find_first(find_first(element, "thead"), "tr")
+    if header_row is None:
+        return None
+    return get_row_cells(header_row, cell_tag)
+
+
+def get_body_rows(element, all_rows=False):
+    """Cell values of the rows of the first tbody, or of every row outside a thead when all_rows is set
+
+    Returns None when the element has no tbody.
+    """
+    tbody = find_first(element, "tbody")
+    if tbody is None:
+        return None
+    table_rows = element.iterdescendants("tr") if all_rows else tbody.iterdescendants("tr")
+    return [get_row_cells(row) for row in table_rows if row.getparent().tag != "thead"]
+
+
+def extract_table(element, header_cell_tag="td", all_rows=False):
+    """Header and body rows of the table within the element as a json friendly dict, suitable for caching"""
+    return {TABLE_HEADER: get_header_cells(element, header_cell_tag), TABLE_ROWS: get_body_rows(element, all_rows)}
@@ -2,11 +2,11 @@ import argparse
 import json
 
 import urllib3
-from bs4 import Tag
 
-from main.config.configuration import ConfigSingleton, get_configuration_dict
+from main.config.configuration import ConfigSingleton, get_configuration_dict, configure_logging
 from main.config.constants import *
 from main.formatter.formatter import Formatter
+from main.http.html_tables import find_first_with_class, extract_table, TABLE_HEADER, TABLE_ROWS
 from main.http.proxy_cache import FailedToCommunicateWithSystem
 from main.http.webpage_proxy import WebPageParser
 from main.model.model_utils import CacheMissException
@@ -17,12 +17,9 @@ import ssl
 ssl._create_default_https_context = ssl._create_unverified_context
 
 import logging
-from logging.config import fileConfig
 
 headers = {'User-Agent': 'Mozilla/5.0 (X11; Linux i686; rv:7.0.1) Gecko/20100101 Firefox/7.0.1'}
 
-LOGGING_CONFIG_FILE = os.path.join(os.path.dirname(__file__), '../../resources/logging_config.ini')
-fileConfig(LOGGING_CONFIG_FILE)
 logger = logging.getLogger('requester')
 
 
@@ -73,84 +70,84 @@ class ICEProxy(WebPageParser):
         logger.info("{} vs {}".format(len(dashboard_data), len(filtered_list)))
         return next((int(x.get(self.FAILED_HEADING, 0)) for x in dashboard_data if self._filter_dashboard_data_for_region(x, region_code)), 0)
 
-    def _map_column_index_to_name(self, columns_map, column_index):
-        for k, v in columns_map.items():
-            if v == column_index:
-                return k
-        return None
+    @staticmethod
+    def _get_column_index_names(columns_map):
+        """Inverts the column map so each cell's field name is a single lookup"""
+        return {column_index: column_name for column_name, column_index in columns_map.items()}
 
     def _get_default_cache_duration(self):
         return SEC_30
 
-    def get_failed_messages_data(self, merged_app_cfg):
-        region_code = unpack_config(merged_app_cfg, self.config_site_code, OPTIONS, REGION)
-        logger.debug("Attempting to retrieve failed message for region: {}".format(region_code))
-        target_endpoint_name = ICE_FAILED_MESSAGES
-        url_base = self.get_app_endpoint_url2(target_endpoint_name, merged_app_cfg)
-        endpoint_cfg = self.get_app_endpoint(target_endpoint_name)
-        url = url_base.format(region_code)
-        soup = self.parse_data_page(url, merged_app_cfg)
-        main_panel = soup.find("div", class_="panel-body")
-        table_dict_list = []
-        if main_panel:
-            thead = main_panel.find("thead")
-            if thead:
-                first_header_row = thead.find("tr")
-                headings = first_header_row.find_all("td")
-                heading_data = [item.get_text() for item in headings]
-                print(heading_data)
-            tbody = main_panel.find("tbody")
-            table_dict_list = self._obtain_table_data(tbody, self.FAILED_MESSAGES_COLUMNS_MAP)
+    def _get_failed_messages_url(self, region_code, merged_app_cfg):
+        url_base = self.get_app_endpoint_url2(ICE_FAILED_MESSAGES, merged_app_cfg)
+        return url_base.format(region_code)
+
+    def _obtain_failed_messages(self, table, region_code):
+        logger.debug("Failed messages headings: {}".format(table[TABLE_HEADER]))
+        table_dict_list = self._obtain_table_data(table[TABLE_ROWS], self.FAILED_MESSAGES_COLUMNS_MAP)
         logger.debug("Found {} failed messages for region: {}".format(len(table_dict_list), region_code))
         return table_dict_list
 
-    def _obtain_table_data(self, soup_table_body, columns_map):
+    def get_failed_messages_data(self, merged_app_cfg, region_code=None):
+        """Failed messages for the given region, defaulting to the region of the merged config"""
+        if not region_code:
+            region_code = unpack_config(merged_app_cfg, self.config_site_code, OPTIONS, REGION)
+        logger.debug("Attempting to retrieve failed message for region: {}".format(region_code))
+        url = self._get_failed_messages_url(region_code, merged_app_cfg)
+        table = self.get_page_table(url, merged_app_cfg, self._extract_failed_messages_table)
+        return self._obtain_failed_messages(table, region_code)
+
+    def iter_failed_messages_for_regions(self, region_codes, merged_app_cfg):
+        """Fetches the failed messages of every region concurrently, yielding (region_code, messages) as each region arrives"""
+        logger.debug("Attempting to retrieve failed message for regions: {}".format(region_codes))
+        page_requests = {region_code: (self._get_failed_messages_url(region_code, merged_app_cfg), self._extract_failed_messages_table)
+                         for region_code in region_codes}
+        for region_code, table in self.iter_page_tables(page_requests, merged_app_cfg):
+            yield region_code, self._obtain_failed_messages(table, region_code)
+
+    @staticmethod
+    def _extract_failed_messages_table(document):
+        return extract_table(find_first_with_class(document, "div", "panel-body"))
+
+    @staticmethod
+    def _extract_dashboard_table(document):
+        main_panel = find_first_with_class(document, "div", "panel-body")
+        if main_panel is None:
+            if document is not None and "To access this page, you need to" in document.text_content():
+                logger.error("Need to login to site!")
+            error_and_exit("Failed to retrieve page as expected!")
+        return extract_table(main_panel, "th")
+
+    def _obtain_table_data(self, table_rows, columns_map):
+        """Maps the cell values of each table row to the column names, table_rows are the cell values of each row"""
         table_dict_list = []
         column_count = len(columns_map.keys())
-        if soup_table_body:
-            table_rows = soup_table_body.find_all("tr")
-            if table_rows:
-                for row_count, table_row in enumerate(table_rows):
-                    row_dict = {}
-                    column_data = table_row.find_all("td")
-                    if len(column_data) < column_count - 1:
-                        continue
-                    for col_index, column_item_child in enumerate(column_data):
-                        if isinstance(column_item_child, Tag):
-                            column_value = column_item_child.get_text().strip().replace(self.VIEW_SUMMARY, '')
-                            field_name = self._map_column_index_to_name(columns_map, col_index)
-                            if field_name == ICEProxy.COUNT_HEADING and column_value == "Delete":
-                                logger.debug(f"Something off in row: {row_count}")
-                            if field_name in [ICEProxy.NOTES_HEADING, ICEProxy.DELETE_HEADING, ICEProxy.SUMMARY_HEADING]:
-                                column_value = ""
-                            if field_name:
-                                row_dict[field_name] = column_value
-                            else:
-                                logger.warning("Failed to find field name for col index: {}".format(col_index))
-                    table_dict_list.append(row_dict)
+        column_index_names = self._get_column_index_names(columns_map)
+        blanked_fields = {ICEProxy.NOTES_HEADING, ICEProxy.DELETE_HEADING, ICEProxy.SUMMARY_HEADING}
+        for row_count, column_data in enumerate(table_rows or []):
+            if len(column_data) < column_count - 1:
+                continue
+            row_dict = {}
+            for col_index, column_text in enumerate(column_data):
+                field_name = column_index_names.get(col_index)
+                if not field_name:
+                    logger.warning("Failed to find field name for col index: {}".format(col_index))
+                    continue
+                if field_name in blanked_fields:
+                    row_dict[field_name] = ""
+                    continue
+                column_value = column_text.strip().replace(self.VIEW_SUMMARY, '')
+                if field_name == ICEProxy.COUNT_HEADING and column_value == "Delete":
+                    logger.debug(f"Something off in row: {row_count}")
+                row_dict[field_name] = column_value
+            table_dict_list.append(row_dict)
         return table_dict_list
 
     def get_calm_dashboard_data(self, merged_app_cfg):
         logger.debug("Attempting to retrieve calm dashboard data")
         dashboard_url = self.get_app_endpoint_url2(ICE_CALM_DASHBOARD, merged_app_cfg)
-        try:
-            return self.cache.get_cache_result(dashboard_url)
-        except CacheMissException as ce:
-            logger.debug(str(ce))
-        soup = self.parse_data_page(dashboard_url, merged_app_cfg)
-        main_panel = soup.find("div", class_="panel-body")
-        if not main_panel:
-            if "To access this page, you need to" in soup.get_text():
-                logger.error("Need to login to site!")
-            error_and_exit("Failed to retrieve page as expected!")
-        thead = main_panel.find("thead")
-        if thead:
-            first_header_row = thead.find("tr")
-            headings = first_header_row.find_all("th")
-            heading_data = [item.get_text() for item in headings]
-        tbody = main_panel.find("tbody")
-        table_dict_list = self._obtain_table_data(tbody, self.CALM_DASHBOARD_COLUMNS_MAP)
-        self.cache.store_cache_result(dashboard_url, table_dict_list, SEC_30)
+        table = self.get_page_table(dashboard_url, merged_app_cfg, self._extract_dashboard_table)
+        table_dict_list = self._obtain_table_data(table[TABLE_ROWS], self.CALM_DASHBOARD_COLUMNS_MAP)
         return table_dict_list
 
     def list_messages(self, search_criteria, merged_app_cfg):
@@ -278,4 +275,5 @@ def main():
 
 
 if __name__ == '__main__':
+    configure_logging()
     main()
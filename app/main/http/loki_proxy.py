@@ -1,3 +1,6 @@
+import datetime
+import time
+from concurrent.futures.thread import ThreadPoolExecutor
 from urllib.parse import urlencode, urlparse, urlunparse, parse_qs, quote
 
 import requests
@@ -5,10 +8,11 @@ import urllib3
 from requests.compat import urljoin
 
 from main.cli.cli_parser import LOKI
-from main.config.configuration import ConfigSingleton, LOGGING_CONFIG_FILE
+from main.config.configuration import ConfigSingleton
 from main.config.constants import WEEK, CONFIG, ENV, BASE_URL, \
     START_DATE, END_DATE, QUERY
-from main.http.proxy_cache import FailedToCommunicateWithSystem
+from main.http.proxy_cache import FailedToCommunicateWithSystem, ProxyCache
+from main.model.model_utils import CacheMissException
 from main.utils.utils import unpack_config, \
     get_configuration_for_app, parse_datetime_from_zulu, convert_datetime_to_unix
 
@@ -18,37 +22,140 @@ import ssl
 ssl._create_default_https_context = ssl._create_unverified_context
 
 import logging
-from logging.config import fileConfig
 
-fileConfig(LOGGING_CONFIG_FILE)
 logger = logging.getLogger('requester')
 
 LOKI_API_V1 = "/api/datasources/proxy/2/loki/api/v1/"
 LOKI_SEARCH_ENDPOINT = "query_range"
+# The requested window is fetched as slices of this length, each paged with at most LOKI_PAGE_LIMIT lines per request
+LOKI_QUERY_SLICE = datetime.timedelta(minutes=30)
+LOKI_PAGE_LIMIT = 5000
+MAX_LOKI_SLICE_WORKERS = 4
+# Slices ending before now minus this delay no longer receive log lines, so are cached as immutable
+LOKI_SETTLED_DELAY = datetime.timedelta(minutes=5)
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def to_nanos(time_delta):
+    return time_delta // datetime.timedelta(microseconds=1) * 1000
+
+
+def split_time_window(start_nanos, end_nanos, slice_nanos):
+    """Splits the [start, end) window into consecutive slices on a fixed grid of the slice length
+
+    Only the first and last slices may be shorter, so windows that overlap share their full slices.
+    """
+    if start_nanos >= end_nanos:
+        return []
+    boundaries = [start_nanos] + list(range((start_nanos // slice_nanos + 1) * slice_nanos, end_nanos, slice_nanos)) + [end_nanos]
+    return list(zip(boundaries, boundaries[1:]))
 
 
 class LokiProxy:
 
     def __init__(self):
         self.configuration = ConfigSingleton()
+        self.session = requests.Session()
+        self.cache = ProxyCache(disabled=False)
 
     def fetch_logs(self, search_parameters):
+        """Fetches the streams matching the query, slicing and paging the time window so no log lines are capped"""
         query_str = search_parameters.get(QUERY)
         start_date = search_parameters.get(START_DATE)
         to_date = search_parameters.get(END_DATE)
         env = search_parameters.get(ENV, "*")
 
-        target_url = self.get_endpoint_url(env, query_str, start_date, to_date)
-        logger.debug(parse_qs(target_url))
-        result = self.execute_loki_request(target_url, self.get_body(), self.get_headers())
-        return result
-
-    def get_endpoint_url(self, env, query_str, start_date, to_date):
+        if not start_date or not to_date:
+            target_url = self.get_endpoint_url(env, query_str)
+            logger.debug(parse_qs(target_url))
+            return self.execute_loki_request(target_url, self.get_body(), self.get_headers())
+
+        time_slices = split_time_window(self.convert_datetime_to_unix_nanos(start_date), self.convert_datetime_to_unix_nanos(to_date),
+                                        to_nanos(LOKI_QUERY_SLICE))
+        settled_nanos = time.time_ns() - to_nanos(LOKI_SETTLED_DELAY)
+        logger.info("Fetching loki logs in {} time slice(s)".format(len(time_slices)))
+        with ThreadPoolExecutor(max_workers=max(1, min(MAX_LOKI_SLICE_WORKERS, len(time_slices)))) as executor:
+            slice_streams = list(executor.map(lambda time_slice: self.fetch_cached_slice(env, query_str, *time_slice, settled_nanos), time_slices))
+        return self.merge_slice_streams(slice_streams)
+
+    def fetch_cached_slice(self, env, query_str, start_nanos, end_nanos, settled_nanos):
+        """Slices that have settled are read from and stored in the cache, recent ones are always fetched"""
+        if end_nanos > settled_nanos:
+            return self.fetch_slice(env, query_str, start_nanos, end_nanos)
+        cache_key = self.get_endpoint_url(env, query_str, start_nanos, end_nanos)
+        try:
+            cached_streams = self.cache.get_cache_result_dict(cache_key)
+            logger.debug("Using cached loki time slice: %s to %s", start_nanos, end_nanos)
+            return {self.get_stream_key(stream): stream for stream in cached_streams}
+        except CacheMissException:
+            pass
+        streams = self.fetch_slice(env, query_str, start_nanos, end_nanos)
+        self.cache.store_cache_result_dict(cache_key, list(streams.values()), WEEK)
+        return streams
+
+    @staticmethod
+    def get_stream_key(stream):
+        return tuple(sorted(stream.get("stream", {}).items()))
+
+    def fetch_slice(self, env, query_str, start_nanos, end_nanos):
+        """Pages forward through a single time slice, each page starting at the last timestamp of the previous one
+
+        Loki treats the start as inclusive so lines already seen at that timestamp are skipped, should a full page hold
+        no new lines the remaining lines at that timestamp cannot be paged and the start moves past it.
+        """
+        streams = {}
+        seen_boundary_lines = set()
+        page_start = start_nanos
+        while True:
+            target_url = self.get_endpoint_url(env, query_str, page_start, end_nanos)
+            result = self.execute_loki_request(target_url, self.get_body(), self.get_headers())
+            page_line_count = 0
+            page_lines = []
+            for stream in result.get("data", {}).get("result", []):
+                stream_key = self.get_stream_key(stream)
+                for value in stream.get("values", []):
+                    page_line_count += 1
+                    timestamp = int(value[0])
+                    if timestamp == page_start and (stream_key, value[1]) in seen_boundary_lines:
+                        continue
+                    page_lines.append((timestamp, stream_key, value[1]))
+                    streams.setdefault(stream_key, {"stream": stream.get("stream", {}), "values": []})["values"].append(value)
+            if page_line_count < LOKI_PAGE_LIMIT:
+                break
+            if not page_lines:
+                logger.warning("More than {} loki log lines share timestamp: {}, skipping the remainder".format(LOKI_PAGE_LIMIT, page_start))
+                page_start += 1
+                seen_boundary_lines = set()
+                continue
+            last_timestamp = max(timestamp for timestamp, _, _ in page_lines)
+            if last_timestamp != page_start:
+                seen_boundary_lines = set()
+            seen_boundary_lines.update((stream_key, line) for timestamp, stream_key, line in page_lines if timestamp == last_timestamp)
+            logger.debug("Loki page limit reached, fetching next page from: %s", last_timestamp)
+            page_start = last_timestamp
+        return streams
+
+    @staticmethod
+    def merge_slice_streams(slice_streams):
+        """Combines the per slice streams, given in time order, into a single query_range style response"""
+        merged_streams = {}
+        for streams in slice_streams:
+            for stream_key, stream in streams.items():
+                if stream_key in merged_streams:
+                    merged_streams[stream_key]["values"].extend(stream["values"])
+                else:
+                    merged_streams[stream_key] = stream
+        for stream in merged_streams.values():
+            stream["values"].sort(key=lambda value: int(value[0]))
+        return {"status": "success", "data": {"resultType": "streams", "result": list(merged_streams.values())}}
+
+    def get_endpoint_url(self, env, query_str, start_nanos=None, end_nanos=None):
         app_cfg = get_configuration_for_app(self.configuration, LOKI, env, "*")
         env_base_url = unpack_config(app_cfg, LOKI, CONFIG, BASE_URL)
         join_url = urljoin(urljoin(env_base_url, LOKI_API_V1), LOKI_SEARCH_ENDPOINT)
         query_args = {'query': query_str}
-        # query_args = {'query': query_str, 'from': self.convert_datetime_to_unix(start_date), 'to': self.convert_datetime_to_unix(to_date)}
+        if start_nanos and end_nanos:
+            query_args.update({'start': start_nanos, 'end': end_nanos, 'limit': LOKI_PAGE_LIMIT, 'direction': 'forward'})
         target_url = self.build_url(join_url, query_args)
         return target_url
 
@@ -70,7 +177,7 @@ class LokiProxy:
         """Issue a simple http request to perform query"""
         logger.debug("Issuing loki POST request: {}".format(url))
 
-        response = requests.get(url, headers=headers, verify=False)
+        response = self.session.get(url, headers=headers, verify=False)
         if response.status_code != requests.codes["ok"]:
             logger.error("Failed to issue request to: {}, received error code: {}".format(url, response.status_code))
             if response.text:
@@ -82,6 +189,12 @@ class LokiProxy:
         datetime_obj = parse_datetime_from_zulu(datetime_str)
         return convert_datetime_to_unix(datetime_obj)
 
+    @staticmethod
+    def convert_datetime_to_unix_nanos(datetime_str):
+        """Loki timestamps are nanoseconds since the epoch, the given zulu datetime is taken as utc"""
+        datetime_obj = parse_datetime_from_zulu(datetime_str)
+        return (datetime_obj - EPOCH) // datetime.timedelta(microseconds=1) * 1000
+
 
 if __name__ == '__main__':
     url = "https://grafana-eks-2.aga.eu-west-1.dsg.lnrsg.io/api/datasources/proxy/2/loki/api/v1/query_range"
@@ -1,20 +1,19 @@
 import json
 import urllib
 
-from main.config.configuration import ConfigSingleton, LOGGING_CONFIG_FILE
+from main.config.configuration import ConfigSingleton
 from main.config.constants import CACHE_REF
 from main.model.model_utils import CacheMissException
 import logging
-from logging.config import fileConfig
-fileConfig(LOGGING_CONFIG_FILE)
 logger = logging.getLogger('requester')
 
 
 class ProxyCache:
 
-    def __init__(self):
+    def __init__(self, disabled=True):
+        """Cached results are only read back when not disabled, they are always stored"""
         self.configuration = ConfigSingleton()
-        self.disabled = True
+        self.disabled = disabled
 
     def __get_cache(self):
         if self.configuration.has_key(CACHE_REF):
@@ -1,19 +1,23 @@
 import argparse
 import json
+import threading
+from concurrent.futures import as_completed
+from concurrent.futures.thread import ThreadPoolExecutor
 
 import requests
 import urllib3
 from bs4 import BeautifulSoup, Tag
 
-from main.config.configuration import ConfigSingleton, LOGGING_CONFIG_FILE, get_configuration_dict
+from main.config.configuration import ConfigSingleton, get_configuration_dict
 from main.config.constants import URLS, URL, CREDENTIALS, USERNAME, PASSWORD, \
     ICE_CREDENTIALS, ADM_CREDENTIALS, PROJECTS, NAME, DataType, ICE, SEC_30, REGION, ADAPTER_ID, SOURCE, DESTINATION, \
     TYPE, MESSAGE_ID_HEADING, EVENT_DATE_HEADING, ICE_LOGIN, ICE_SUBMIT, ADM_LOGIN, ADM_SUBMIT, ADM_LOCATIONS, \
     ADM_CONFIGS, ADM_VERSIONS, ADM_SCRIPTS, ADM_ARTIFACTS, ICE_FAILED_MESSAGES, ICE_CALM_DASHBOARD, WEEK, ADM_CFG, ENV, \
-    CONFIG, GET, OPTIONS
+    CONFIG, GET, OPTIONS, HOUR_1
 from main.formatter.formatter import Formatter
 from main.http.cirrus_session_proxy import obtain_cookies_from_cirrus_driver, \
     capture_site_cookies_from_session
+from main.http.html_tables import parse_html_document, TABLE_HEADER, TABLE_ROWS
 from main.http.proxy_cache import FailedToCommunicateWithSystem, ProxyCache
 from main.model.model_utils import CacheMissException
 from main.utils.utils import get_configuration_for_app, get_config_endpoint, form_system_url, unpack_endpoint_cfg, \
@@ -24,15 +28,14 @@ import ssl
 ssl._create_default_https_context = ssl._create_unverified_context
 
 import logging
-from logging.config import fileConfig
 
 headers = {'User-Agent': 'Mozilla/5.0 (X11; Linux i686; rv:7.0.1) Gecko/20100101 Firefox/7.0.1'}
 
 
-fileConfig(LOGGING_CONFIG_FILE)
 logger = logging.getLogger('requester')
 
 ADM_PROJECTS = "adm-projects"
+MAX_PAGE_WORKERS = 5
 
 
 class WebPageParser:
@@ -43,7 +46,9 @@ class WebPageParser:
         self.session = requests.session()
         self.session.headers.update(headers)
         self.initialised = False
-        self.cache = ProxyCache()
+        self.cache = ProxyCache(disabled=False)
+        # Workers sharing the parser log in once between them
+        self._login_lock = threading.Lock()
 
     def get_app_config(self, format_options):
         app_cfg = get_configuration_for_app(self.configuration, self.config_site_code, format_options.get(ENV), format_options.get(REGION))
@@ -74,7 +79,7 @@ class WebPageParser:
         return site_config[URL]
 
     def _get_default_cache_duration(self):
-        return WEEK
+        return HOUR_1
 
     @staticmethod
     def pretty_print_request(req):
@@ -96,21 +101,11 @@ class WebPageParser:
 
     def issue_get_request(self, url, merged_app_cfg):
         logger.debug("Issuing webpage request: GET {}".format(url))
-        # Check the cache first. Don't use cache until user has logged in.
-        if self.initialised:
-            try:
-                return self.cache.get_cache_result(url)
-            except CacheMissException as ce:
-                pass
-
         get = self.session.get(url, verify=False)
         WebPageParser.pretty_print_request(get.request)
         if get.status_code != requests.codes["ok"]:
             logger.error("Failed get webpage: {}, status code: {}".format(url, get.status_code))
             raise FailedToCommunicateWithSystem(self.config_site_code, url, get.status_code)
-        # cache the get result
-        if self.initialised:
-            self.cache.store_cache_result(url, get.text, self._get_default_cache_duration())
         return get.text
 
     def issue_post_request(self, url, merged_app_cfg, data_dict):
@@ -123,7 +118,7 @@ class WebPageParser:
             raise FailedToCommunicateWithSystem(self.config_site_code, url, post.status_code)
         return post.text
 
-    def parse_data_page(self, url, merged_app_cfg, endpoint_cfg=None):
+    def fetch_page_text(self, url, merged_app_cfg, endpoint_cfg=None):
         endpoint_type = GET
         if endpoint_cfg:
             endpoint_type = endpoint_cfg.get(TYPE)
@@ -133,9 +128,48 @@ class WebPageParser:
         else:
             site_text = self.issue_post_request(url, merged_app_cfg, None)
         logger.debug("Attempting to parse page text: {}".format(site_text[0:100].encode()))
-        soup = BeautifulSoup(site_text, features="html.parser")
+        return site_text
+
+    def parse_data_page(self, url, merged_app_cfg, endpoint_cfg=None):
+        soup = BeautifulSoup(self.fetch_page_text(url, merged_app_cfg, endpoint_cfg), features="html.parser")
         return soup
 
+    def parse_data_document(self, url, merged_app_cfg, endpoint_cfg=None):
+        """Parses the page with lxml for table extraction, see html_tables"""
+        return parse_html_document(self.fetch_page_text(url, merged_app_cfg, endpoint_cfg))
+
+    def get_page_table(self, url, merged_app_cfg, table_parser):
+        """Returns the table the table_parser extracts from the page, the extracted table rather than the page is cached
+
+        Don't use the cache until the user has logged in. Tables without a header or rows aren't cached, as an expired
+        session cookie gets the login page back rather than the table.
+        """
+        cache_key = "table:{}".format(url)
+        if self.initialised:
+            try:
+                return self.cache.get_cache_result_dict(cache_key)
+            except CacheMissException:
+                pass
+        table = table_parser(self.parse_data_document(url, merged_app_cfg))
+        if self.initialised and table.get(TABLE_HEADER) and table.get(TABLE_ROWS):
+            self.cache.store_cache_result_dict(cache_key, table, self._get_default_cache_duration())
+        elif self.initialised:
+            logger.debug("Not caching the empty table from: {}".format(url))
+        return table
+
+    def iter_page_tables(self, page_requests, merged_app_cfg):
+        """Fetches the pages concurrently over the one logged in session, yielding (key, table) as each table arrives
+
+        page_requests maps a key to the (url, table_parser) of the page to fetch.
+        """
+        if not page_requests:
+            return
+        with ThreadPoolExecutor(max_workers=min(MAX_PAGE_WORKERS, len(page_requests))) as executor:
+            future_keys = {executor.submit(self.get_page_table, url, merged_app_cfg, table_parser): key
+                           for key, (url, table_parser) in page_requests.items()}
+            for future in as_completed(future_keys):
+                yield future_keys[future], future.result()
+
     def login_to_site(self, merged_app_cfg):
         submit_url = get_endpoint_url(self.configuration, merged_app_cfg, self.config_site_code, self.submit_url)
         login_url = get_endpoint_url(self.configuration, merged_app_cfg, self.config_site_code, self.login_url)
@@ -147,6 +181,13 @@ class WebPageParser:
         )
         logger.debug("Login to site completed")
 
+    def login(self, merged_app_cfg):
+        """Logs in afresh and caches the session cookie, this could throw a FailedToCommunicateWithSystem"""
+        with self._login_lock:
+            self.login_to_site(merged_app_cfg)
+            capture_site_cookies_from_session(self.configuration, self.session, self.config_site_code, merged_app_cfg)
+            self.initialised = True
+
     def initialise(self, merged_app_cfg):
         """This could throw a FailedToCommunicateWithSystem"""
         logger.debug(f"Initialising class: {self.__class__.__name__}, config site code is: {self.config_site_code}, initializsed: {self.initialised}")
@@ -154,16 +195,14 @@ class WebPageParser:
         env = unpack_config(merged_app_cfg, self.config_site_code, OPTIONS, ENV)
         region = unpack_config(merged_app_cfg, self.config_site_code, OPTIONS, REGION)
 
-        already_logged_in = cookies_file_exists(self.configuration, self.config_site_code, env, region)
-        if already_logged_in:
-            logger.debug("Skipping login with cached session cookie")
-            # Update session with cached cookie
-            env = unpack_config(merged_app_cfg, self.config_site_code, OPTIONS, ENV)
-            region = unpack_config(merged_app_cfg, self.config_site_code, OPTIONS, REGION)
-            update_session_with_cookie(self.configuration, self.session, self.config_site_code, env, region)
-            self.initialised = True
-        else:
-            if not self.initialised:
+        with self._login_lock:
+            already_logged_in = cookies_file_exists(self.configuration, self.config_site_code, env, region)
+            if already_logged_in:
+                logger.debug("Skipping login with cached session cookie")
+                # Update session with cached cookie
+                update_session_with_cookie(self.configuration, self.session, self.config_site_code, env, region)
+                self.initialised = True
+            elif not self.initialised:
                 self.login_to_site(merged_app_cfg)
                 capture_site_cookies_from_session(self.configuration, self.session, self.config_site_code, merged_app_cfg)
                 self.initialised = True
@@ -1,15 +1,14 @@
 import logging
-from logging.config import fileConfig
 
 from main.cli.cli_parser import LOCATIONS, CONFIGS, ARTIFACTS, SCRIPTS, VERSIONS, DASHBOARD, MESSAGES
-from main.config.configuration import ConfigSingleton, LOGGING_CONFIG_FILE
-from main.config.constants import FUNCTION, OPTIONS, DataType, OUTPUT, TABLE, ICE_CFG
+from main.config.configuration import ConfigSingleton
+from main.config.constants import FUNCTION, OPTIONS, DataType, OUTPUT, TABLE, ICE_CFG, REGIONS
 from main.formatter.formatter import Formatter
 from main.http.ice_proxy import ICEProxy
 from main.utils.utils import error_and_exit
 
-fileConfig(LOGGING_CONFIG_FILE)
 logger = logging.getLogger('main')
+message_logger = logging.getLogger('message')
 
 
 class ICECommandProcessor:
@@ -39,8 +38,18 @@ class ICECommandProcessor:
             result = self.ice_proxy.get_calm_dashboard_data(merged_app_cfg)
             data_type = DataType.ice_dashboard
         elif function_to_call == MESSAGES:
+            regions = cli_dict.get(REGIONS)
+            if regions and len(regions) > 1:
+                self.format_failed_messages_for_regions(regions, cli_dict.get(OPTIONS), merged_app_cfg)
+                return
             result = self.ice_proxy.get_failed_messages_data(merged_app_cfg)
             data_type = DataType.ice_failed_messages
         else:
             error_and_exit(f"Unknown command passed for ADM: {function_to_call}")
-        self.formatter.format(data_type, result, cli_dict.get(OPTIONS))
\ No newline at end of file
+        self.formatter.format(data_type, result, cli_dict.get(OPTIONS))
+
+    def format_failed_messages_for_regions(self, regions, options, merged_app_cfg):
+        """Formats the failed messages of each region as soon as they have been fetched"""
+        for region_code, result in self.ice_proxy.iter_failed_messages_for_regions(regions, merged_app_cfg):
+            message_logger.info("ICE failed messages for region: {}".format(region_code))
+            self.formatter.format(DataType.ice_failed_messages, result, options)
@@ -0,0 +1,88 @@
+import logging
+from concurrent.futures import as_completed
+from concurrent.futures.thread import ThreadPoolExecutor
+
+from main.config.config_index import get_config_index
+from main.config.configuration import ConfigSingleton
+from main.config.constants import OPTIONS, SYSTEM, ENV, REGION, NAME, WILDCARD, CIRRUS_CFG, ADM_CFG, ICE_CFG
+from main.utils.utils import get_merged_app_cfg
+
+logger = logging.getLogger('main')
+message_logger = logging.getLogger('message')
+
+ALL = 'all'
+LOGIN_SYSTEMS = [CIRRUS_CFG, ADM_CFG, ICE_CFG]
+MAX_LOGIN_WORKERS = 6
+
+
+class LoginCommandProcessor:
+    """Logs into the sites ahead of running commands, caching the session cookies under their cookie keys"""
+
+    def __init__(self):
+        self.configuration = ConfigSingleton()
+
+    def action_cli_request(self, cli_dict):
+        options = cli_dict.get(OPTIONS)
+        if options.get(ALL):
+            login_targets = self.get_configured_login_targets(options.get(ENV), options.get(REGION))
+        else:
+            login_targets = [(cli_dict.get(SYSTEM, CIRRUS_CFG), options.get(ENV), options.get(REGION))]
+
+        failed_targets = []
+        for login_target, error in self.login_to_targets(login_targets):
+            if error:
+                failed_targets.append(login_target)
+                message_logger.info("Failed to log into {} {} {}: {}".format(*login_target, error))
+            else:
+                message_logger.info("Logged into {} {} {}".format(*login_target))
+        if failed_targets:
+            logger.error("Failed to log into {} of {} sites".format(len(failed_targets), len(login_targets)))
+
+    def get_configured_login_targets(self, env, region):
+        """(system, env, region) for every configured environment of the login systems
+
+        Wildcard environments and regions resolve to the given env and region.
+        """
+        applications = get_config_index(self.configuration).applications
+        login_targets = []
+        for system in LOGIN_SYSTEMS:
+            for env_cfg in applications.get_envs(system):
+                target_env = env if env_cfg.get(NAME) == WILDCARD else env_cfg.get(NAME)
+                target_region = region if env_cfg.get(REGION) == WILDCARD else env_cfg.get(REGION)
+                if (system, target_env, target_region) not in login_targets:
+                    login_targets.append((system, target_env, target_region))
+        return login_targets
+
+    def login_to_targets(self, login_targets):
+        """Logs into all the targets concurrently, yielding (login_target, error) as each login completes"""
+        if not login_targets:
+            return
+        with ThreadPoolExecutor(max_workers=min(MAX_LOGIN_WORKERS, len(login_targets))) as executor:
+            future_targets = {executor.submit(self.login_to_target, *login_target): login_target for login_target in login_targets}
+            for future in as_completed(future_targets):
+                yield future_targets[future], future.result()
+
+    def login_to_target(self, system, env, region):
+        """Logs into a single site, returning the error rather than exiting so the other logins carry on"""
+        try:
+            merged_app_cfg = get_merged_app_cfg(self.configuration, system, {ENV: env, REGION: region})
+            if system == CIRRUS_CFG:
+                from main.http.cirrus_login_proxy import login_to_cirrus
+                login_to_cirrus(merged_app_cfg)
+            else:
+                self._create_site_proxy(system).login(merged_app_cfg)
+        except SystemExit:
+            # error_and_exit has already reported the cause
+            return "see error above"
+        except Exception as ex:
+            logger.debug("Login to {} {} {} failed".format(system, env, region), exc_info=True)
+            return str(ex)
+        return None
+
+    @staticmethod
+    def _create_site_proxy(system):
+        if system == ADM_CFG:
+            from main.http.adm_proxy import ADMProxy
+            return ADMProxy()
+        from main.http.ice_proxy import ICEProxy
+        return ICEProxy()
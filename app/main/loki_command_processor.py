@@ -1,9 +1,10 @@
 import logging
 import json
-from logging.config import fileConfig
+
+import orjson
 
 from main.cli.cli_parser import LOKI
-from main.config.configuration import ConfigSingleton, LOGGING_CONFIG_FILE
+from main.config.configuration import ConfigSingleton
 from main.config.constants import OPTIONS, TABLE, OUTPUT, QUERY, END_DATETIME, TIME, START_DATETIME, END_DATE, \
     START_DATE, REGION, ENV, DataType, VERBOSE
 from main.formatter.formatter import DynamicFormatter
@@ -12,7 +13,6 @@ from main.message_processor import MessageProcessor
 from main.utils.utils import error_and_exit, calculate_start_and_end_times_from_duration, get_datetime_now_as_zulu, \
     validate_start_and_end_times, parser_datetime_by_system
 
-fileConfig(LOGGING_CONFIG_FILE)
 logger = logging.getLogger('main')
 
 
@@ -44,32 +44,35 @@ class LokiCommandProcessor:
         self.__validate_time_window(cli_dict, search_parameters)
 
         result = self.loki_proxy.fetch_logs(search_parameters)
-        output = self.process_response_data(result, options)
-        self.formatter.format(DataType.loki_logs, output, options)
+        self.formatter.format_stream(DataType.loki_logs, self.iter_response_rows(result, options), options)
 
     @staticmethod
     def process_response_data(json_res, options):
+        return list(LokiCommandProcessor.iter_response_rows(json_res, options))
+
+    @staticmethod
+    def iter_response_rows(json_res, options):
+        """Lazily yields an output row for every log line of every stream in the response"""
         is_verbose = True if options and options[VERBOSE] else False
-        output = []
         # jq '.data.result[].values[][1] | fromjson | .log'
-        if "data" in json_res:
-            data = json_res.get("data")
-            if "result" in data:
-                res_array = data.get("result")
-                if res_array:
-                    print(f"{len(res_array)} items in result array")
-                    for result_item in res_array:
-                        if "values" in result_item:
-                            val_array = result_item.get("values")
-                            if val_array and len(val_array) >= 2:
-                                line_array = []
-                                log_statement_obj = json.loads(val_array[1][1])
-                                if is_verbose:
-                                    line_array.append(log_statement_obj.get("time"))
-                                    line_array.append(log_statement_obj.get("pod"))
-                                line_array.append(log_statement_obj.get("log"))
-                                output.append(line_array)
-        return output
+        res_array = json_res.get("data", {}).get("result") or []
+        logger.info("{} streams in loki result".format(len(res_array)))
+        for result_item in res_array:
+            for value in result_item.get("values") or []:
+                log_statement_obj = LokiCommandProcessor.decode_log_line(value[1])
+                if is_verbose:
+                    yield [log_statement_obj.get("time"), log_statement_obj.get("pod"), log_statement_obj.get("log")]
+                else:
+                    yield [log_statement_obj.get("log")]
+
+    @staticmethod
+    def decode_log_line(log_line):
+        """Log lines are normally json documents, anything else such as logfmt output is passed through as the log"""
+        try:
+            log_statement_obj = orjson.loads(log_line)
+        except orjson.JSONDecodeError:
+            return {"log": log_line}
+        return log_statement_obj if isinstance(log_statement_obj, dict) else {"log": log_line}
 
 
     @staticmethod
@@ -102,5 +105,5 @@ if __name__ == '__main__':
     print("Test processing of loki response file")
     output_file = open("c:/temp/loki.json")
     json_data = json.load(output_file)
-    LokiCommandProcessor.process_response_data(json_data)
+    LokiCommandProcessor.process_response_data(json_data, {VERBOSE: False})
     output_file.close()
\ No newline at end of file
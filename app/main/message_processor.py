@@ -1,12 +1,13 @@
 import importlib
 import logging
 import sys
-from logging.config import fileConfig
+from concurrent.futures import as_completed
+from concurrent.futures.thread import ThreadPoolExecutor
 
 from main.cli.cli_parser import ANALYSE, DETAIL, GET_LOGS, WEBPACK
 from main.config.configuration import ConfigSingleton
 from main.config.constants import RULES, FUNCTION, OPTIONS, RULE, TIME, SEARCH_PARAMETERS, START_DATETIME, END_DATETIME, \
-    DataType, NAME, UID, MSG_UID, MESSAGE_ID, LIMIT, ALGORITHMS, MESSAGE_STATUS, ALGORITHM_STATS, CACHE_REF, \
+    DataType, NAME, UID, UID_FILE, MSG_UID, MESSAGE_ID, LIMIT, ALGORITHMS, MESSAGE_STATUS, ALGORITHM_STATS, CACHE_REF, \
     YARA_MOVEMENT_POST_JSON_ALGO, ARGUMENTS, TRANSFORM_BACKTRACE_FIELDS, DataRequisites, FILE, OUTPUT, START_DATE, \
     END_DATE, CIRRUS, \
     SYSTEM, ICE, ENABLE_ELASTICSEARCH_QUERY, REGION, ENABLE_ICE_PROXY, LOG_STATEMENT_FOUND, VERBOSE, MISC_CFG, CONFIG, \
@@ -15,8 +16,6 @@ from main.formatter.dual_formatter import LogAndFileFormatter
 from main.formatter.file_output import FileOutputFormatter
 from main.formatter.formatter import Formatter, AnalysisFormatter
 from main.http.cirrus_proxy import CirrusProxy
-from main.http.elk_proxy import ElasticsearchProxy
-from main.http.ice_proxy import ICEProxy
 from main.http.proxy_cache import FailedToCommunicateWithSystem
 from main.model.enricher import MessageEnricher
 from main.model.message_model import Message
@@ -33,10 +32,11 @@ LIST_MESSAGE_TRANSFORMS = 'list_message_transforms'
 LIST_MESSAGE_PAYLOADS = 'list_message_payloads'
 LIST_MESSAGE_EVENTS = 'list_message_events'
 LIST_MESSAGE_METADATA = "list_message_metadata"
+# Upper bound on the messages detailed concurrently when given a file of message uids
+MAX_DETAIL_WORKERS = 4
+# Upper bound on the detailed messages looked up on the log server with one search
+DETAIL_LOOKUP_BATCH_SIZE = 20
 
-import os
-LOGGING_CONFIG_FILE = os.path.join(os.path.dirname(__file__), '../resources/logging_config.ini')
-fileConfig(LOGGING_CONFIG_FILE)
 logger = logging.getLogger('main')
 
 
@@ -44,23 +44,41 @@ class MessageProcessor:
     """Main class that takes cli arguments and actions them by communicating with Cirrus"""
     # If user provides uid then map to message-id
 
-    def __init__(self, options):
+    def __init__(self, options, warm_processor=None):
         self.configuration = ConfigSingleton()
-        self.cirrus_proxy = CirrusProxy()
-        self.ice_proxy = ICEProxy()
+        # A long running daemon hands over the previous processor so logged in proxies and clients are reused
+        self.cirrus_proxy = warm_processor.cirrus_proxy if warm_processor else CirrusProxy()
+        self._ice_proxy = warm_processor._ice_proxy if warm_processor else None
+        self._elasticsearch_proxy = warm_processor._elasticsearch_proxy if warm_processor else None
         self.formatter = Formatter()
         self.statistics_map = {} # Message id indexed
         self.run_algorithm_names = set() # set of all algorithms run
         self.algorithm_name_with_data = set() # set if all algorithms that have their own data run
         self.custom_algorithm_data = {} # Used to hold custom headings and other algorithm items
+        self.transforms_cache = {} # Transforms by search parameters, shared by all messages processed
+        self.resolved_url_cache = {} # Transform urls with their env variable resolved
         file_generator = FileOutputFormatter()
         self.details_formatter = LogAndFileFormatter(self.formatter, file_generator, self.cirrus_proxy)
 
         app_cfg = get_configuration_for_app(self.configuration, MISC_CFG, "*", "*")
         enable_elastic_str = unpack_config(app_cfg, MISC_CFG, CONFIG, ENABLE_ELASTICSEARCH_QUERY)
-        if bool(enable_elastic_str):
-            merged_app_cfg = get_merged_app_cfg(self.configuration, ELASTIC_CFG, options)
-            self.elasticsearch_proxy = ElasticsearchProxy(merged_app_cfg)
+        self._elastic_merged_app_cfg = get_merged_app_cfg(self.configuration, ELASTIC_CFG, options) if bool(enable_elastic_str) else None
+
+    @property
+    def ice_proxy(self):
+        """Created on first use, so that commands not talking to ICE don't pay for it"""
+        if self._ice_proxy is None:
+            from main.http.ice_proxy import ICEProxy
+            self._ice_proxy = ICEProxy()
+        return self._ice_proxy
+
+    @property
+    def elasticsearch_proxy(self):
+        """Created on first use, as the client issues a cluster health check on creation"""
+        if self._elasticsearch_proxy is None and self._elastic_merged_app_cfg:
+            from main.http.elk_proxy import ElasticsearchProxy
+            self._elasticsearch_proxy = ElasticsearchProxy(self._elastic_merged_app_cfg)
+        return self._elasticsearch_proxy
 
     def action_cli_request(self, cli_dict, merged_app_cfg):
         """Take the cli arguments, validate them further and action them"""
@@ -129,9 +147,14 @@ class MessageProcessor:
             return
 
         elif function_to_call == DETAIL:
-            if UID not in cli_dict:
+            if UID not in cli_dict and UID_FILE not in cli_dict:
                 error_and_exit("Message unique id must be provided for this request")
             target_system = cli_dict.get(SYSTEM) if SYSTEM in cli_dict else None
+            if UID_FILE in cli_dict:
+                if target_system and target_system != "CIRRUS":
+                    error_and_exit("A file of message unique ids is only supported for Cirrus messages")
+                self.detail_cirrus_messages(read_message_uids(cli_dict.get(UID_FILE)), options, merged_app_cfg)
+                return
             ice_region = options.get(REGION)
             # ice_region = cli_dict.get(REGION) if REGION in cli_dict else None
 
@@ -156,14 +179,20 @@ class MessageProcessor:
             return
 
         elif function_to_call == GET_LOGS:
-            if UID not in cli_dict:
+            if UID not in cli_dict and UID_FILE not in cli_dict:
                 error_and_exit("Message unique id must be provided for this request")
             app_cfg = get_configuration_for_app(self.configuration, MISC_CFG, "*", "*")
             enable_elastic_str = unpack_config(app_cfg, MISC_CFG, CONFIG, ENABLE_ELASTICSEARCH_QUERY)
             if not bool(enable_elastic_str):
                 error_and_exit("Please enable enable_elasticsearch_query flag and set parameters in config")
-            message_uid = cli_dict.get(UID)
             self.__validate_time_window(cli_dict, search_parameters)
+            if UID_FILE in cli_dict:
+                message_uids = read_message_uids(cli_dict.get(UID_FILE))
+                log_details_by_uid = self.elasticsearch_proxy.lookup_messages_within_supplied_time_window(message_uids, search_parameters.get(START_DATE, None), search_parameters.get(END_DATE, None))
+                for message_uid, log_details in (log_details_by_uid or {}).items():
+                    self.details_formatter.format_server_log_details(message_uid, log_details, options)
+                return
+            message_uid = cli_dict.get(UID)
             log_details = self.elasticsearch_proxy.lookup_message_within_supplied_time_window(message_uid, search_parameters.get(START_DATE, None), search_parameters.get(END_DATE, None))
             self.details_formatter.format_server_log_details(message_uid, log_details, options)
             return
@@ -215,12 +244,81 @@ class MessageProcessor:
             logger.error("The given function is not implemented: {}".format(function_to_call))
 
     def detail_cirrus_message(self, msg_model, options, merged_app_cfg):
-        data_enricher = MessageEnricher(msg_model, self.cirrus_proxy, merged_app_cfg)
+        self._enrich_cirrus_message_details(msg_model, merged_app_cfg)
+        self.details_formatter.format_message_model(msg_model, options)
+
+    def detail_cirrus_messages(self, message_uids, options, merged_app_cfg):
+        """Retrieves the details of many messages concurrently, each message is output as soon as its data is complete
+
+        When elastic search is enabled the completed messages are looked up on the log server together, in batches of
+        those that complete while the previous batch is looked up, before they are output.
+        """
+        if not message_uids:
+            error_and_exit("No message unique ids found to detail")
+        # Create the shared elastic search client up front, rather than racing to create it within the workers
+        elasticsearch_proxy = self.elasticsearch_proxy
+        failed_uids = []
+        msg_models_to_lookup = {}
+        with ThreadPoolExecutor(max_workers=min(MAX_DETAIL_WORKERS, len(message_uids))) as executor:
+            future_to_uid = {executor.submit(self._retrieve_cirrus_message_details, message_uid, merged_app_cfg): message_uid for message_uid in message_uids}
+            remaining_futures = set(future_to_uid)
+            for future in as_completed(future_to_uid):
+                remaining_futures.discard(future)
+                message_uid = future_to_uid[future]
+                try:
+                    msg_model = future.result()
+                except SystemExit:
+                    # error_and_exit has already reported the cause
+                    failed_uids.append(message_uid)
+                    msg_model = None
+                except Exception as err:
+                    logger.error("Failed to retrieve details for message uid: {}, error: {}".format(message_uid, err))
+                    failed_uids.append(message_uid)
+                    msg_model = None
+                if msg_model and not elasticsearch_proxy:
+                    self.details_formatter.format_message_model(msg_model, options)
+                    continue
+                if msg_model:
+                    msg_models_to_lookup[message_uid] = msg_model
+                # Look up what has completed unless more messages are already waiting to join the batch
+                if msg_models_to_lookup and (len(msg_models_to_lookup) >= DETAIL_LOOKUP_BATCH_SIZE or not any(f.done() for f in remaining_futures)):
+                    self._lookup_and_format_cirrus_messages(elasticsearch_proxy, msg_models_to_lookup, options)
+                    msg_models_to_lookup = {}
+        if failed_uids:
+            error_and_exit("Failed to detail {} of {} messages: {}".format(len(failed_uids), len(message_uids), ", ".join(failed_uids)))
+
+    def _lookup_and_format_cirrus_messages(self, elasticsearch_proxy, msg_models, options):
+        """Adds the log server locations with a batch search, the messages are output without them should it fail"""
+        try:
+            log_details_by_uid = elasticsearch_proxy.lookup_messages({message_uid: msg_model.payloads_list for message_uid, msg_model in msg_models.items()})
+        except Exception as err:
+            logger.error("Failed to look up {} messages on the log server, error: {}".format(len(msg_models), err))
+            log_details_by_uid = None
+        for message_uid, msg_model in msg_models.items():
+            if log_details_by_uid is not None:
+                msg_model.add_server_location(log_details_by_uid.get(message_uid))
+            self.details_formatter.format_message_model(msg_model, options)
+
+    def _retrieve_cirrus_message_details(self, message_uid, merged_app_cfg):
+        """Payloads and transforms of the message, the log server lookup is left to the batch search"""
+        msg_model = Message()
+        msg_model.add_message_uid(message_uid)
+        data_enricher = self._create_cirrus_message_enricher(msg_model, merged_app_cfg)
+        data_enricher.retrieve_data(frozenset([DataRequisites.payloads, DataRequisites.transforms]))
+        data_enricher.add_transform_mappings()
+        return msg_model
+
+    def _create_cirrus_message_enricher(self, msg_model, merged_app_cfg):
+        return MessageEnricher(msg_model, self.cirrus_proxy, merged_app_cfg, elasticsearch_proxy=self.elasticsearch_proxy,
+                               transforms_cache=self.transforms_cache, resolved_url_cache=self.resolved_url_cache)
+
+    def _enrich_cirrus_message_details(self, msg_model, merged_app_cfg):
+        data_enricher = self._create_cirrus_message_enricher(msg_model, merged_app_cfg)
         data_fetch_set = frozenset([DataRequisites.payloads, DataRequisites.transforms])
         data_enricher.retrieve_data(data_fetch_set)
         data_enricher.add_transform_mappings()
         data_enricher.lookup_message_location_on_log_server()
-        self.details_formatter.format_message_model(msg_model, options)
+        return msg_model
 
     def detail_ice_message(self, msg_model, options, merged_app_cfg):
         data_enricher = MessageEnricher(msg_model, self.cirrus_proxy, merged_app_cfg, self.ice_proxy)
@@ -438,7 +536,8 @@ class MessageProcessor:
 
     def __get_algorithm_prerequisite_data(self, msg_model, algorithm_instance, merged_app_cfg):
         data_set = algorithm_instance.get_data_prerequistites()
-        data_enricher = MessageEnricher(msg_model, self.cirrus_proxy, merged_app_cfg)
+        data_enricher = MessageEnricher(msg_model, self.cirrus_proxy, merged_app_cfg, elasticsearch_proxy=self.elasticsearch_proxy,
+                                        transforms_cache=self.transforms_cache, resolved_url_cache=self.resolved_url_cache)
         if data_set:
             data_enricher.retrieve_data(data_set)
         return data_enricher
@@ -461,3 +560,15 @@ class MessageProcessor:
                 algorithm_instance.set_parameters(algorithm_details[ARGUMENTS], format_options)
             return algorithm_instance
 
+
+def read_message_uids(uid_file):
+    """Reads message uids one per line from the given file or stdin when given -, blank lines and duplicates are skipped"""
+    if uid_file == "-":
+        lines = sys.stdin.read().splitlines()
+    else:
+        try:
+            with open(uid_file, 'r') as uid_file_handler:
+                lines = uid_file_handler.read().splitlines()
+        except OSError as err:
+            error_and_exit("Unable to read message uids from file: {}, {}".format(uid_file, err))
+    return list(dict.fromkeys(line.strip() for line in lines if line.strip()))
@@ -1,17 +1,16 @@
+import json
+
 from main.algorithms.payload_transform_mapper import PayloadTransformMapper
 from main.config.constants import MESSAGE_ID, SEARCH_PARAMETERS, TYPE, DESTINATION, SOURCE, DataRequisites, \
     ENABLE_ELASTICSEARCH_QUERY, MESSAGE_ID_HEADING, EVENT_DATE_HEADING, ENABLE_ICE_PROXY, MISC_CFG, CONFIG, ELASTIC_CFG
 
-from main.config.configuration import ConfigSingleton, LOGGING_CONFIG_FILE
+from main.config.configuration import ConfigSingleton
 import logging
-from logging.config import fileConfig
 
-from main.http.elk_proxy import ElasticsearchProxy
 from main.model.model_utils import get_transform_search_parameters, InvalidStateException, \
     extract_search_parameters_from_message_detail, SuspectedMissingTransformsException
 from main.utils.utils import parse_timezone_datetime_str, get_configuration_for_app, unpack_config, switch_app_cfg
 
-fileConfig(LOGGING_CONFIG_FILE)
 logger = logging.getLogger('main')
 
 METADATA = "metadata"
@@ -24,7 +23,8 @@ EVENTS = "events"
 class MessageEnricher:
     """Given a message model, this class determines which data to retrieve for the message and update the message model with the data"""
 
-    def __init__(self, message_model, cirrus_proxy, merged_app_cfg, ice_proxy=None):
+    def __init__(self, message_model, cirrus_proxy, merged_app_cfg, ice_proxy=None, elasticsearch_proxy=None,
+                 transforms_cache=None, resolved_url_cache=None):
         self.configuration = ConfigSingleton()
         if not message_model.has_rule and not message_model.message_uid:
             raise InvalidStateException("Message Enricher requires rule or message uid")
@@ -32,10 +32,15 @@ class MessageEnricher:
         self.cirrus_proxy = cirrus_proxy
         self.ice_proxy = ice_proxy
         self.merged_app_cfg = merged_app_cfg
+        # Caches shared between the enrichers of a batch of messages, transforms are keyed by their search parameters
+        self.transforms_cache = transforms_cache if transforms_cache is not None else {}
+        self.resolved_url_cache = resolved_url_cache
+        self.elasticsearch_proxy = elasticsearch_proxy
         app_cfg = get_configuration_for_app(self.configuration, MISC_CFG, "*", "*")
         enable_elastic_str = unpack_config(app_cfg, MISC_CFG, CONFIG, ENABLE_ELASTICSEARCH_QUERY)
-        if bool(enable_elastic_str):
+        if bool(enable_elastic_str) and self.elasticsearch_proxy is None:
             # switch to specific config for elastic search
+            from main.http.elk_proxy import ElasticsearchProxy
             es_merged_cfg = switch_app_cfg(self.configuration, merged_app_cfg, ELASTIC_CFG)
             self.elasticsearch_proxy = ElasticsearchProxy(es_merged_cfg)
 
@@ -94,7 +99,7 @@ class MessageEnricher:
             search_parameters = self.message.search_criteria
         # Obtain transforms
         if search_parameters:
-            result = self.cirrus_proxy.get_transforms_for_message(search_parameters, self.merged_app_cfg)
+            result = self.__get_transforms(search_parameters)
             # In case we don't get another with a source & destination search, then do separate searches
             if not result:
                 result = self.__retrieve_transforms_per_channel()
@@ -109,12 +114,18 @@ class MessageEnricher:
         for key in [DESTINATION, SOURCE]:
             temp_search_parameters = dict(search_parameters)
             del temp_search_parameters[key]
-            channel_transform_result = self.cirrus_proxy.get_transforms_for_message(temp_search_parameters, self.merged_app_cfg)
+            channel_transform_result = self.__get_transforms(temp_search_parameters)
             logger.debug("Obtained {} transforms by removing key: {} from search".format(len(channel_transform_result), key))
             if channel_transform_result:
                 combined_result.extend(channel_transform_result)
         return combined_result
 
+    def __get_transforms(self, search_parameters):
+        cache_key = json.dumps(search_parameters, sort_keys=True)
+        if cache_key not in self.transforms_cache:
+            self.transforms_cache[cache_key] = self.cirrus_proxy.get_transforms_for_message(search_parameters, self.merged_app_cfg)
+        return self.transforms_cache[cache_key]
+
     def __retrieve_and_update_wider_transforms(self):
         result = self.__retrieve_transforms_per_channel()
         self.message.add_transforms(result)
@@ -138,7 +149,7 @@ class MessageEnricher:
 
     def add_transform_mappings(self):
         """Adds payload to transform mappings data structure to the message model"""
-        mapper = PayloadTransformMapper(self.message.payloads_list, self.message.transforms_list, self.cirrus_proxy)
+        mapper = PayloadTransformMapper(self.message.payloads_list, self.message.transforms_list, self.cirrus_proxy, self.resolved_url_cache)
         try:
             mapper.map()
         except SuspectedMissingTransformsException:
@@ -1,11 +1,8 @@
 import logging
-from logging.config import fileConfig
 
-from main.config.configuration import LOGGING_CONFIG_FILE
 from main.config.constants import UNIQUE_ID, TYPE, SEARCH_PARAMETERS
 from main.model.model_utils import filter_transforms, MissingConfigException
 
-fileConfig(LOGGING_CONFIG_FILE)
 logger = logging.getLogger('main')
 
 
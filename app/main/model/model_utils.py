@@ -11,6 +11,7 @@ SAXON = "SAXON"
 XMLJSON = "XMLJSON"
 JSONXML = "JSONXML"
 TRANSFORM_TYPES_LIST = [XALAN, SAXON, XMLJSON, JSONXML]
+TRACKING_POINT_TRANSFORM_REGEX = re.compile(r'^(\w+)\s*-\s*(.*)\((.*)\)$')
 
 
 def translate_step_type_to_payload_type(step_type):
@@ -47,20 +48,35 @@ def get_matching_transform_and_step(transforms, stage_type, transform_name, tran
     return None, None
 
 
+def build_transform_index(transforms):
+    """Index every transform step by (transform-name, transform-step-name, stage type), keeping the first match
+    as the linear search in get_matching_transform_and_step would"""
+    transform_index = {}
+    for current_transform in transforms or []:
+        transform_name = current_transform.get("transform-name")
+        for current_step in current_transform.get("transform-steps") or []:
+            for stage_type in (TRANSFORM, VALIDATE):
+                if is_valid_step_type(stage_type, current_step):
+                    transform_key = (transform_name, current_step.get("transform-step-name"), stage_type)
+                    transform_index.setdefault(transform_key, (current_transform, current_step))
+    return transform_index
+
+
+def lookup_transform_and_step(transform_index, stage_type, transform_name, transform_step_name):
+    return transform_index.get((transform_name, transform_step_name, stage_type), (None, None))
+
+
 def get_transform_step_from_payload(payload, transforms):
-    transform_stage = payload.get("tracking-point")
-    match = re.match(r'^(\w+)\s*-\s*(.*)\((.*)\)$', transform_stage)
-    if match:
-        stage_type = match.group(1)
-        transform_name = match.group(2)
-        transform_step_name = match.group(3)
+    transform_details_tuple = obtain_transform_details_from_payload_tracking_point(payload)
+    if transform_details_tuple:
+        stage_type, transform_name, transform_step_name = transform_details_tuple
         return get_matching_transform_step(transforms, stage_type, transform_name, transform_step_name)
     return None
 
 
 def obtain_transform_details_from_payload_tracking_point(payload):
     transform_stage = payload.get("tracking-point")
-    match = re.match(r'^(\w+)\s*-\s*(.*)\((.*)\)$', transform_stage)
+    match = TRACKING_POINT_TRANSFORM_REGEX.match(transform_stage)
     if match:
         stage_type = match.group(1)
         transform_name = match.group(2)
@@ -76,6 +92,14 @@ def get_payload_index(stage_name, payloads_list):
     return -1
 
 
+def build_payload_index_map(payloads_list):
+    """Maps each tracking point to the index of its first payload, the same index get_payload_index would find"""
+    payload_index_map = {}
+    for index, current_payload in enumerate(payloads_list or []):
+        payload_index_map.setdefault(current_payload.get(TRACKING_POINT), index)
+    return payload_index_map
+
+
 def get_payload_object(stage_name, payloads_list):
     for index, current_payload in enumerate(payloads_list):
         if current_payload.get(TRACKING_POINT) == stage_name:
@@ -0,0 +1,100 @@
+import json
+import re
+
+WHITESPACE = re.compile(r'[ \t\n\r]*')
+FIRST_SIGNIFICANT_CHAR = re.compile(r'[^\s\ufeff]')
+
+JSON_FORMAT = "json"
+XML_FORMAT = "xml"
+
+_JSON_DECODER = json.JSONDecoder()
+
+
+def sniff_payload_format(payload_str):
+    """Inspect the first significant character of the payload to decide how it should be parsed"""
+    if isinstance(payload_str, str):
+        match = FIRST_SIGNIFICANT_CHAR.search(payload_str)
+        if match:
+            if match.group(0) in ('{', '['):
+                return JSON_FORMAT
+            elif match.group(0) == '<':
+                return XML_FORMAT
+    return None
+
+
+class IncrementalJsonReader:
+    """Walks a json string one object member or array item at a time, only decoding the values asked for
+
+    Object keys and array items are yielded as the cursor reaches them, if the caller does not consume the
+    value (via decode_value, iter_object_keys or iter_array_values) it is decoded and discarded.
+    """
+    def __init__(self, text):
+        self.text = text
+        self.pos = 0
+        self.last_array_length = 0
+
+    def _skip_whitespace(self):
+        self.pos = WHITESPACE.match(self.text, self.pos).end()
+
+    def _expect(self, char):
+        self._skip_whitespace()
+        if self.text[self.pos:self.pos + 1] != char:
+            raise ValueError("Expecting '{}' at position {}".format(char, self.pos))
+        self.pos += 1
+
+    def _consume_separator(self, closing_char):
+        """Returns True if there is another member/item to read, False once the closing char is consumed"""
+        self._skip_whitespace()
+        if self.text[self.pos:self.pos + 1] == ',':
+            self.pos += 1
+            return True
+        self._expect(closing_char)
+        return False
+
+    def peek(self):
+        self._skip_whitespace()
+        return self.text[self.pos:self.pos + 1]
+
+    def decode_value(self):
+        self._skip_whitespace()
+        value, self.pos = _JSON_DECODER.raw_decode(self.text, self.pos)
+        return value
+
+    def iter_object_keys(self):
+        self._expect('{')
+        if self.peek() == '}':
+            self.pos += 1
+            return
+        has_next = True
+        while has_next:
+            key = self.decode_value()
+            if not isinstance(key, str):
+                raise ValueError("Expecting property name at position {}".format(self.pos))
+            self._expect(':')
+            self._skip_whitespace()
+            value_start = self.pos
+            yield key
+            if self.pos == value_start:
+                self.decode_value()
+            has_next = self._consume_separator('}')
+
+    def iter_array_items(self):
+        """Yields the position of each array item, leaving the caller to consume the item"""
+        self.last_array_length = 0
+        self._expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        has_next = True
+        while has_next:
+            self._skip_whitespace()
+            item_start = self.pos
+            self.last_array_length += 1
+            yield item_start
+            if self.pos == item_start:
+                self.decode_value()
+            has_next = self._consume_separator(']')
+
+    def iter_array_values(self):
+        for _ in self.iter_array_items():
+            yield self.decode_value()
@@ -6,21 +6,22 @@ import sys
 import os.path
 import zipfile
 from os import path
-import yaml
 
-from dateutil import parser
-from dateutil.tz import gettz
 from main.config.constants import *
 from main.config.constants import APPLICATIONS, WILDCARD, CREDENTIALS, CACHE_REF, CACHED_COOKIE, MIN_30
+from main.config.config_index import get_config_index
 
 
 DURATION_PATTERN = re.compile(r'(\d+)([dh])')
 DATETIME_REGEX = re.compile(r'\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}')
 TZ_FILE = 'resources/timezones_dict.json'
+_TZINFOS = None
 
 
 def parse_yaml_from_file(filename):
     """Reads the given yaml file and returns back a dict representation"""
+    # Only needed when the configuration snapshot is rebuilt
+    import yaml
     data = read_data_from_file(filename)
     try:
         return yaml.safe_load(data)
@@ -34,11 +35,16 @@ def parse_json_from_file(filename):
     return json.loads(data)
 
 
+def get_resource_file_path(filename):
+    """Returns the path of a file given relative to the app folder"""
+    file_name = '../../%s' % filename
+    return os.path.join(os.path.dirname(__file__), file_name)
+
+
 def read_data_from_file(filename):
     """Reads the filecontents and returns it back as a string"""
-    file_name = '../../%s' % filename
     # print("Is valid file: %i" % os.path.isfile(file_name))
-    config_file = os.path.join(os.path.dirname(__file__), file_name)
+    config_file = get_resource_file_path(filename)
     with open(config_file, 'r') as myfile:
         data = myfile.read()
     return data
@@ -138,17 +144,32 @@ def parse_datetime_str(datetime_str):
 
 
 def _read_tz_from_file(filename):
+    from dateutil.tz import gettz
     tz_data = parse_json_from_file(filename)
     for k, v in tz_data.items():
         yield k, gettz(v)
 
 
-NEW_TZINFOS = dict(_read_tz_from_file(TZ_FILE))
+def get_tzinfos():
+    """The timezone abbreviation table is only built the first time a timezone date needs parsing"""
+    global _TZINFOS
+    if _TZINFOS is None:
+        _TZINFOS = dict(_read_tz_from_file(TZ_FILE))
+    return _TZINFOS
+
+
+def __getattr__(name):
+    # Keep NEW_TZINFOS available as a module attribute without building it at import time
+    if name == "NEW_TZINFOS":
+        return get_tzinfos()
+    raise AttributeError("module {} has no attribute {}".format(__name__, name))
 
 
 def parse_timezone_datetime_str(datetime_str):
-    tzdate = parser.parse(datetime_str, tzinfos=NEW_TZINFOS)
-    res = tzdate.astimezone(NEW_TZINFOS['UTC'])
+    from dateutil import parser
+    tzinfos = get_tzinfos()
+    tzdate = parser.parse(datetime_str, tzinfos=tzinfos)
+    res = tzdate.astimezone(tzinfos['UTC'])
     return res
 
 
@@ -230,42 +251,26 @@ def zip_message_files(message_uid, message_output_folder, zip_output_folder):
 
 def get_configuration_for_app(configuration, app, env="PRD", region="EU"):
     # print(f"get_configuration_for_app for app: {app}, env: {env} & region: {region}")
-    app_config = configuration.get(APPLICATIONS)
-    filtered_apps = [x for x in app_config if x.get(NAME) == app]
+    config_index = get_config_index(configuration)
     results = {}
-    for single_app in filtered_apps:
-        env_config_list = [ e for e in single_app.get(ENV) if e.get(NAME) in [env, WILDCARD] ]
-        # obtain all regions
-        configured_regions = [ x.get(REGION) for x in env_config_list ]
-        # if we have a matching region then return it
-        if region in configured_regions:
-            results[single_app.get(NAME)] = { CONFIG: list(filter(lambda x: x.get(REGION) == region, env_config_list)) }
-        # else return generic
-        elif WILDCARD in configured_regions:
-            results[single_app.get(NAME)] = { CONFIG: list(filter(lambda x: x.get(REGION) == WILDCARD, env_config_list)) }
-        else:
+    if config_index.applications.has_app(app):
+        env_config_list = config_index.applications.resolve(app, env, region)
+        if env_config_list is None:
             error_and_exit(f"Failed to find configuration for app: {app}, env: {env} and region: {region}")
+        results[app] = {CONFIG: list(env_config_list)}
 
-    credentials_config = configuration.get(CREDENTIALS)
-    filtered_credentials = [x for x in credentials_config.get(APPLICATIONS) if x.get(NAME) == app]
-    for single_cred in filtered_credentials:
-        configured_credentials = [e for e in single_cred.get(ENV) if e.get(NAME) in [env, WILDCARD]]
-        configured_regions = [ x.get(REGION) for x in configured_credentials ]
-        if region in configured_regions:
-            results[single_cred.get(NAME)][CREDENTIALS] = list(filter(lambda x: x.get(REGION) == region, configured_credentials))
-        elif WILDCARD in configured_regions:
-            results[single_cred.get(NAME)][CREDENTIALS] = list(filter(lambda x: x.get(REGION) == WILDCARD, configured_credentials))
-        else:
+    if config_index.credentials.has_app(app):
+        configured_credentials = config_index.credentials.resolve(app, env, region)
+        if configured_credentials is None:
             error_and_exit(f"Failed to find credentials for app: {app}, env: {env} and region: {region}")
+        results[app][CREDENTIALS] = list(configured_credentials)
 
     # print(json.dumps(results))
     return results
 
 
 def get_config_endpoint(configuration, app, endpoint_name):
-    app_config = configuration.get(APPLICATIONS)
-    filtered_apps = [x for x in app_config if x.get(NAME) == app]
-    filtered_endpoints = [endpoint for endpoint in filtered_apps[0].get(ENDPOINTS) if endpoint.get(NAME) == endpoint_name]
+    filtered_endpoints = list(get_config_index(configuration).get_endpoints(app, endpoint_name))
     results = {NAME: app, ENDPOINTS: filtered_endpoints}
     return results
 
@@ -309,7 +314,7 @@ def get_merged_app_cfg(configuration, app_name, options):
 
 
 def switch_app_cfg(configuration, merged_app_cfg, app_name):
-    current_app_name = merged_app_cfg.keys()[0]
+    current_app_name = next(iter(merged_app_cfg))
     options = merged_app_cfg[current_app_name][OPTIONS]
     return get_merged_app_cfg(configuration, app_name, options)
 
@@ -340,6 +345,17 @@ def cookies_file_exists(config, system_name, environment, region):
     return False
 
 
+def get_cookie_time_to_expiry(config, system_name, environment, region):
+    """Seconds until the cached cookie expires, None when there is no cookie"""
+    cache = config.get(CACHE_REF)
+    if not cache:
+        return None
+    cookie, expire_time = cache.get(generate_cookie_key(system_name, environment, region), expire_time=True)
+    if cookie is None:
+        return None
+    return expire_time - time.time() if expire_time else float("inf")
+
+
 def write_cookies_to_file_cache(config, system_name, environment, region, cookies_str):
     cache = config.get(CACHE_REF)
     # if cache:
@@ -334,6 +334,16 @@ class TransformBacktraceFieldsTest(AbstractAlgorithmTest):
         self.assertEqual("Z1EDP00/VRKME", results[1][2])
         self.assertEqual("", results[1][3])
 
+    def test_algorithm_processing_repeated(self):
+        sut = self.createSUT()
+        sut.set_parameters(self._create_algorithm_parameters_empty_check())
+        sut.set_data_enricher(self.mock_data_enricher())
+        sut.analyse()
+        first_results = sut.get_analysis_data()
+        sut.analyse()
+        self.assertEqual(first_results, sut.get_analysis_data())
+        self.assertEqual(sorted(sut.transform_analyser.results_map), sut.transform_analyser.result_stage_indexes)
+
 
 if __name__ == '__main__':
     unittest.main()
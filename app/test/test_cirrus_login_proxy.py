@@ -0,0 +1,74 @@
+import tempfile
+import unittest
+
+from diskcache import Cache
+
+from main.config.constants import CACHE_REF, CIRRUS_CFG, MIN_30
+from main.http.cirrus_login_proxy import find_form_with_field, find_link_by_text, get_link_submit_params, is_super_user, \
+    SUPER_USER_LINK_TEXT
+from main.http.html_tables import parse_html_document
+from main.utils.utils import get_cookie_time_to_expiry, write_cookies_to_file_cache
+
+LOGIN_PAGE = """<html><body>
+<form id="searchForm" action="/cirrus-connect/search"><input type="text" name="query"/></form>
+<form id="loginForm" method="post" action="j_security_check">
+<input type="text" name="j_username"/><input type="password" name="j_password"/>
+<input type="hidden" name="javax.faces.ViewState" value="-123:456"/>
+</form>
+</body></html>
+"""
+
+HOME_PAGE = """<html><body>
+<form id="topMenuForm" name="topMenuForm" method="post" action="/cirrus-connect/home.xhtml">
+<input type="hidden" name="topMenuForm" value="topMenuForm"/>
+<input type="hidden" name="javax.faces.ViewState" value="-789:012"/>
+<button id="topMenuForm:j_idt17_button"><span>{}</span></button>
+<div id="topMenuForm:j_idt17_menu">
+<a id="topMenuForm:j_idt18" class="ui-menuitem-link ui-corner-all" href="#"
+   onclick="PrimeFaces.addSubmitParam('topMenuForm',{{'topMenuForm:j_idt18':'topMenuForm:j_idt18'}}).submit('topMenuForm');return false;">
+<span class="ui-menuitem-text">Switch to Super</span></a>
+<a id="topMenuForm:j_idt19" href="#">Logout</a>
+</div>
+</form>
+</body></html>
+"""
+
+
+class CirrusLoginProxyTest(unittest.TestCase):
+
+    def test_find_login_form(self):
+        login_form = find_form_with_field(parse_html_document(LOGIN_PAGE), "j_username")
+        self.assertEqual("loginForm", login_form.get("id"))
+        self.assertEqual("j_security_check", login_form.get("action"))
+        self.assertEqual({"javax.faces.ViewState": "-123:456"}, dict(login_form.form_values()))
+
+    def test_no_login_form(self):
+        self.assertIsNone(find_form_with_field(parse_html_document(HOME_PAGE.format("me")), "j_username"))
+        self.assertIsNone(find_form_with_field(None, "j_username"))
+
+    def test_super_user_link_submit_params(self):
+        super_user_link = find_link_by_text(parse_html_document(HOME_PAGE.format("me")), SUPER_USER_LINK_TEXT)
+        self.assertEqual({"topMenuForm:j_idt18": "topMenuForm:j_idt18"}, get_link_submit_params(super_user_link))
+        self.assertEqual("topMenuForm", next(super_user_link.iterancestors("form")).get("id"))
+
+    def test_link_submit_params_without_onclick(self):
+        logout_link = find_link_by_text(parse_html_document(HOME_PAGE.format("me")), "Logout")
+        self.assertEqual({"topMenuForm:j_idt19": "topMenuForm:j_idt19"}, get_link_submit_params(logout_link))
+
+    def test_is_super_user(self):
+        self.assertTrue(is_super_user(parse_html_document(HOME_PAGE.format("Super User (me@proagrica.com)")), "me@proagrica.com"))
+        self.assertFalse(is_super_user(parse_html_document(HOME_PAGE.format("me@proagrica.com")), "me@proagrica.com"))
+        self.assertFalse(is_super_user(parse_html_document(LOGIN_PAGE), "me@proagrica.com"))
+
+    def test_cookie_time_to_expiry(self):
+        with tempfile.TemporaryDirectory() as cache_dir, Cache(cache_dir) as cache:
+            config = {CACHE_REF: cache}
+            self.assertIsNone(get_cookie_time_to_expiry(config, CIRRUS_CFG, "PRD", "EU"))
+            write_cookies_to_file_cache(config, CIRRUS_CFG, "PRD", "EU", "JSESSIONID=123")
+            time_to_expiry = get_cookie_time_to_expiry(config, CIRRUS_CFG, "PRD", "EU")
+            self.assertTrue(MIN_30 - 60 < time_to_expiry <= MIN_30)
+            self.assertIsNone(get_cookie_time_to_expiry(config, CIRRUS_CFG, "PRD", "US"))
+
+
+if __name__ == '__main__':
+    unittest.main()
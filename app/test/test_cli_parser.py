@@ -81,6 +81,11 @@ class CommandLineParserTest(unittest.TestCase):
         expected = {'cli-type': 'COMMAND', 'function': 'detail', 'uid': '324324-23434-3423423', 'options': {'env': 'PRD', 'output': 'table', 'quiet': False, 'region': 'EU', 'verbose': False}}
         self.assertEqual(expected, self.call_sut_func(cli_cmd))
 
+    def test_detail_messages_from_file(self):
+        cli_cmd = """cmc.py detail --uid-file incident_uids.txt --output file"""
+        expected = {'cli-type': 'COMMAND', 'function': 'detail', 'uid-file': 'incident_uids.txt', 'options': {'env': 'PRD', 'output': 'file', 'quiet': False, 'region': 'EU', 'verbose': False}}
+        self.assertEqual(expected, self.call_sut_func(cli_cmd))
+
     def test_detail_message_file_output(self):
         cli_cmd = """cmc.py detail --uid 324324-23434-3423423 --output file"""
         expected = {'cli-type': 'COMMAND', 'function': 'detail', 'uid': '324324-23434-3423423', 'options': {'env': 'PRD', 'output': 'file', 'quiet': False, 'region': 'EU', 'verbose': False}}
@@ -151,6 +156,25 @@ class CommandLineParserTest(unittest.TestCase):
         expected = {'cli-type': 'ADM', 'function': 'artifacts', 'group': 'uk-adapters', 'options': {'env': 'PRD', 'output': 'csv', 'quiet': False, 'region': 'EU', 'verbose': True}}
         self.assertEqual(expected, self.call_sut_func(cli_cmd))
 
+    def test_adm_snapshot_group(self):
+        cli_cmd = """cmc.py adm snapshot --group uk-adapters"""
+        expected = {'cli-type': 'ADM', 'function': 'snapshot', 'group': 'uk-adapters', 'options': {'env': 'PRD', 'output': 'table', 'quiet': False, 'region': 'EU', 'verbose': False}}
+        self.assertEqual(expected, self.call_sut_func(cli_cmd))
+
+    def test_ice_messages(self):
+        cli_cmd = """cmc.py ice messages --region US"""
+        expected = {'cli-type': 'ICE', 'function': 'messages', 'regions': ['US'], 'options': {'env': 'PRD', 'output': 'table', 'quiet': False, 'region': 'US', 'verbose': False}}
+        self.assertEqual(expected, self.call_sut_func(cli_cmd))
+
+    def test_ice_messages_for_regions(self):
+        cli_cmd = """cmc.py ice messages --region EU,US"""
+        expected = {'cli-type': 'ICE', 'function': 'messages', 'regions': ['EU', 'US'], 'options': {'env': 'PRD', 'output': 'table', 'quiet': False, 'region': 'EU', 'verbose': False}}
+        self.assertEqual(expected, self.call_sut_func(cli_cmd))
+
+    def test_ice_messages_invalid_region(self):
+        with self.assertRaises(SystemExit):
+            self.call_sut_func("""cmc.py ice messages --region EU,ZA""")
+
     def test_git_list_group(self):
         cli_cmd = """cmc.py git list groups"""
         expected = {'cli-type': 'GIT', 'function': 'list', 'entity': 'groups', 'options': {'env': 'PRD', 'output': 'table', 'quiet': False, 'region': 'EU', 'verbose': False, 'all': False}}
@@ -181,6 +205,11 @@ class CommandLineParserTest(unittest.TestCase):
         expected = {'cli-type': 'GIT', 'function': 'list', 'entity': 'commits', 'options': {'env': 'PRD', 'output': 'table', 'quiet': False, 'region': 'EU', 'verbose': False, 'all': False}, 'project': '15'}
         self.assertEqual(expected, self.call_sut_func(cli_cmd))
 
+    def test_git_list_commits_for_group_with_filters(self):
+        cli_cmd = """cmc.py git list commits --group adapters --since 2020-08-01T00:00:00Z --ref master"""
+        expected = {'cli-type': 'GIT', 'function': 'list', 'entity': 'commits', 'options': {'env': 'PRD', 'output': 'table', 'quiet': False, 'region': 'EU', 'verbose': False, 'all': False}, 'group': 'adapters', 'since': '2020-08-01T00:00:00Z', 'ref_name': 'master'}
+        self.assertEqual(expected, self.call_sut_func(cli_cmd))
+
     def test_git_search_groups(self):
         cli_cmd = """cmc.py git search groups 'network'"""
         expected = {'cli-type': 'GIT', 'function': 'search', 'entity': 'groups', 'options': {'env': 'PRD', 'output': 'table', 'quiet': False, 'region': 'EU', 'verbose': False, 'all': False}, 'parameters': "'network'"}
@@ -191,6 +220,16 @@ class CommandLineParserTest(unittest.TestCase):
         expected = {'cli-type': 'GIT', 'function': 'search', 'entity': 'projects', 'options': {'env': 'PRD', 'output': 'table', 'quiet': False, 'region': 'EU', 'verbose': False, 'all': False}, 'parameters': "'.*[pP]].+'"}
         self.assertEqual(expected, self.call_sut_func(cli_cmd))
 
+    def test_login(self):
+        cli_cmd = """cmc.py login --env OAT --region US"""
+        expected = {'cli-type': 'LOGIN', 'system': 'CIRRUS', 'options': {'env': 'OAT', 'output': 'table', 'quiet': False, 'region': 'US', 'verbose': False, 'all': False}}
+        self.assertEqual(expected, self.call_sut_func(cli_cmd))
+
+    def test_login_all(self):
+        cli_cmd = """cmc.py login --all"""
+        expected = {'cli-type': 'LOGIN', 'system': 'CIRRUS', 'options': {'env': 'PRD', 'output': 'table', 'quiet': False, 'region': 'EU', 'verbose': False, 'all': True}}
+        self.assertEqual(expected, self.call_sut_func(cli_cmd))
+
     def test_loki_logs(self):
         cli_array = ["cmc.py", "loki", '{namespace="omnichannel-test",  app="adapter"} |= "msg produced" | logfmt',  "--start-datetime", "2020-08-19T10:05:16.000Z", "--end-datetime", "2020-08-19T10:05:19.000Z"]
         expected = {'cli-type': 'LOKI', 'query': '''{namespace="omnichannel-test",  app="adapter"} |= "msg produced" | logfmt''', 'start-datetime': '2020-08-19T10:05:16.000Z', 'end-datetime': '2020-08-19T10:05:19.000Z', 'options': {'env': 'PRD', 'output': 'table', 'quiet': False, 'region': 'EU', 'verbose': False}}
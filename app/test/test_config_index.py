@@ -0,0 +1,84 @@
+import unittest
+
+from main.config.config_index import ConfigIndex, EnvironmentIndex, get_config_index
+from main.config.constants import APPLICATIONS, CREDENTIALS, CONFIG, ENDPOINTS, NAME
+from main.utils.utils import get_configuration_for_app, get_config_endpoint
+
+TEST_CONFIG = {
+    APPLICATIONS: [
+        {"name": "CIRRUS",
+         "env": [
+             {"name": "PRD", "region": "EU", "base_url": "https://prd.eu"},
+             {"name": "PRD", "region": "US", "base_url": "https://prd.us"},
+             {"name": "*", "region": "*", "base_url": "https://generic"}],
+         "endpoints": [
+             {"name": "LOGIN", "type": "GET", "url": ""},
+             {"name": "SEARCH_MESSAGES", "type": "POST", "url": "/rest/tracking/message/search"}]},
+        {"name": "MISC",
+         "env": [{"name": "*", "region": "*", "output-folder": "output"}]}
+    ],
+    CREDENTIALS: {
+        APPLICATIONS: [
+            {"name": "CIRRUS",
+             "env": [{"name": "*", "region": "*", "username": "user", "password": "pass"}]}
+        ]
+    }
+}
+
+
+class ConfigIndexTest(unittest.TestCase):
+
+    def test_resolve_specific_region(self):
+        index = EnvironmentIndex(TEST_CONFIG[APPLICATIONS])
+        result = index.resolve("CIRRUS", "PRD", "US")
+        self.assertEqual(1, len(result))
+        self.assertEqual("https://prd.us", result[0]["base_url"])
+
+    def test_resolve_falls_back_to_wildcard_region(self):
+        index = EnvironmentIndex(TEST_CONFIG[APPLICATIONS])
+        result = index.resolve("CIRRUS", "OAT", "EU")
+        self.assertEqual(1, len(result))
+        self.assertEqual("https://generic", result[0]["base_url"])
+
+    def test_resolve_is_cached(self):
+        index = EnvironmentIndex(TEST_CONFIG[APPLICATIONS])
+        self.assertIs(index.resolve("CIRRUS", "PRD", "EU"), index.resolve("CIRRUS", "PRD", "EU"))
+
+    def test_resolve_unknown(self):
+        index = EnvironmentIndex(TEST_CONFIG[APPLICATIONS])
+        self.assertIsNone(index.resolve("ICE", "PRD", "EU"))
+        self.assertFalse(index.has_app("ICE"))
+
+    def test_get_endpoints(self):
+        index = ConfigIndex(TEST_CONFIG)
+        self.assertEqual("/rest/tracking/message/search", index.get_endpoints("CIRRUS", "SEARCH_MESSAGES")[0]["url"])
+        self.assertEqual((), index.get_endpoints("CIRRUS", "UNKNOWN"))
+
+    def test_get_configuration_for_app(self):
+        result = get_configuration_for_app(TEST_CONFIG, "CIRRUS", "PRD", "EU")
+        self.assertEqual(["CIRRUS"], list(result.keys()))
+        self.assertEqual("https://prd.eu", result["CIRRUS"][CONFIG][0]["base_url"])
+        self.assertEqual("user", result["CIRRUS"][CREDENTIALS][0]["username"])
+
+    def test_get_configuration_for_app_without_credentials(self):
+        result = get_configuration_for_app(TEST_CONFIG, "MISC", "*", "*")
+        self.assertEqual("output", result["MISC"][CONFIG][0]["output-folder"])
+        self.assertFalse(CREDENTIALS in result["MISC"])
+
+    def test_get_config_endpoint(self):
+        result = get_config_endpoint(TEST_CONFIG, "CIRRUS", "LOGIN")
+        self.assertEqual("CIRRUS", result.get(NAME))
+        self.assertEqual(1, len(result.get(ENDPOINTS)))
+
+    def test_index_is_kept_on_a_plain_dict(self):
+        configuration = dict(TEST_CONFIG)
+        self.assertIs(get_config_index(configuration), get_config_index(configuration))
+
+    def test_last_listing_of_an_app_wins(self):
+        index = EnvironmentIndex([{"name": "ICE", "env": [{"name": "PRD", "region": "EU", "url": "first"}]},
+                                  {"name": "ICE", "env": [{"name": "PRD", "region": "EU", "url": "last"}]}])
+        self.assertEqual(["last"], [env_cfg["url"] for env_cfg in index.resolve("ICE", "PRD", "EU")])
+
+
+if __name__ == '__main__':
+    unittest.main()
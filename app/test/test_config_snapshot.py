@@ -0,0 +1,46 @@
+import os
+import pickle
+import stat
+import tempfile
+import unittest
+
+from main.config.configuration import read_config_snapshot, write_config_snapshot, get_config_snapshot_stamp, \
+    RULES_FILE, CONFIGURATION_FILE
+
+
+class ConfigSnapshotTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.snapshot_file = os.path.join(self.temp_dir.name, "cache", "config_snapshot.pickle")
+        self.stamp = get_config_snapshot_stamp([CONFIGURATION_FILE, RULES_FILE])
+        self.config_data = pickle.dumps({"applications": [{"name": "CIRRUS"}]})
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_read_written_snapshot(self):
+        write_config_snapshot(self.snapshot_file, self.stamp, self.config_data)
+        self.assertEqual(self.config_data, read_config_snapshot(self.snapshot_file, self.stamp))
+
+    def test_snapshot_is_private(self):
+        write_config_snapshot(self.snapshot_file, self.stamp, self.config_data)
+        self.assertEqual(0, stat.S_IMODE(os.stat(self.snapshot_file).st_mode) & 0o077)
+
+    def test_stale_snapshot(self):
+        write_config_snapshot(self.snapshot_file, self.stamp, self.config_data)
+        changed_stamp = [(name, mtime + 1, size) for name, mtime, size in self.stamp]
+        self.assertIsNone(read_config_snapshot(self.snapshot_file, changed_stamp))
+
+    def test_missing_snapshot(self):
+        self.assertIsNone(read_config_snapshot(self.snapshot_file, self.stamp))
+
+    def test_corrupt_snapshot(self):
+        os.makedirs(os.path.dirname(self.snapshot_file))
+        with open(self.snapshot_file, 'wb') as snapshot_handler:
+            snapshot_handler.write(b"not a pickle")
+        self.assertIsNone(read_config_snapshot(self.snapshot_file, self.stamp))
+
+
+if __name__ == '__main__':
+    unittest.main()
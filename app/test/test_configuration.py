@@ -1,8 +1,9 @@
 import unittest
 
 import json
+import logging
 
-from main.config.configuration import get_configuration_dict, ConfigSingleton
+from main.config.configuration import get_configuration_dict, ConfigSingleton, JsonLogFormatter
 from main.utils.utils import get_configuration_for_app, CIRRUS_CFG, CONFIG, get_config_endpoint, NAME, ENDPOINTS, \
     MISC_CFG, ICE_CFG, get_merged_app_cfg, REGION, ENV, OPTIONS
 from main.config.constants import CREDENTIALS, APPLICATIONS, RULES, CIRRUS
@@ -101,3 +102,13 @@ class TestConfiguration(unittest.TestCase):
         options_cfg = cirrus_cfg.get(OPTIONS)
         self.assertEqual("OAT", options_cfg.get(ENV))
         self.assertEqual("US", options_cfg.get(REGION))
+
+
+class TestJsonLogFormatter(unittest.TestCase):
+    def test_format(self):
+        record = logging.LogRecord("main", logging.DEBUG, __file__, 1, "Fetching results from position: %s", (10,), None)
+        result = json.loads(JsonLogFormatter().format(record))
+        self.assertEqual("main", result["logger"])
+        self.assertEqual("DEBUG", result["level"])
+        self.assertEqual("Fetching results from position: 10", result["message"])
+        self.assertFalse("exception" in result)
@@ -0,0 +1,94 @@
+import contextlib
+import io
+import logging
+import os
+import sys
+import tempfile
+import threading
+import unittest
+
+from main.cli.daemon import CommandServer
+from main.config import configuration
+from main.cli.daemon_client import forward_to_daemon, is_daemon_command, write_daemon_info, read_daemon_info, \
+    remove_daemon_info
+
+
+def echo_command(arguments_list):
+    print("running: {}".format(" ".join(arguments_list[1:])))
+    if "rules" in arguments_list:
+        logging.getLogger('message').info("Found 2 rules")
+    if "--uid" in arguments_list:
+        print("Message unique id is unknown", file=sys.stderr)
+        sys.exit(1)
+
+
+class DaemonTest(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.daemon_info_file = os.path.join(self.temp_dir.name, "daemon.json")
+        self.server = CommandServer(echo_command)
+        write_daemon_info(self.server.port, self.server.token, self.daemon_info_file)
+        self.server_thread = threading.Thread(target=self.server.serve_forever, kwargs={"poll_interval": 0.05})
+        self.server_thread.start()
+        # A console handler holding the stderr of the time, registered as configure_logging registers its own
+        self.message_logger = logging.getLogger('message')
+        self.console_handler = logging.StreamHandler(sys.stderr)
+        self.message_logger.addHandler(self.console_handler)
+        configuration._console_handlers.append(self.console_handler)
+        self.message_logger.setLevel(logging.INFO)
+
+    def tearDown(self):
+        self.message_logger.removeHandler(self.console_handler)
+        configuration._console_handlers.remove(self.console_handler)
+        self.server.shutdown()
+        self.server.server_close()
+        self.server_thread.join()
+        self.temp_dir.cleanup()
+
+    def forward(self, arguments_list):
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            exit_code = forward_to_daemon(arguments_list, self.daemon_info_file)
+        return exit_code, stdout.getvalue(), stderr.getvalue()
+
+    def test_forward_command(self):
+        exit_code, stdout, stderr = self.forward(["cmc.py", "list", "messages", "--rule", "YARA_MOVEMENTS_BASIC"])
+        self.assertEqual(0, exit_code)
+        self.assertEqual("running: list messages --rule YARA_MOVEMENTS_BASIC\n", stdout)
+        self.assertEqual("", stderr)
+
+    def test_forward_command_logging_messages(self):
+        exit_code, stdout, stderr = self.forward(["cmc.py", "list", "rules"])
+        self.assertEqual(0, exit_code)
+        self.assertEqual("running: list rules\n", stdout)
+        self.assertEqual("Found 2 rules\n", stderr)
+
+    def test_forward_failing_command(self):
+        exit_code, stdout, stderr = self.forward(["cmc.py", "detail", "--uid", "123"])
+        self.assertEqual(1, exit_code)
+        self.assertEqual("Message unique id is unknown\n", stderr)
+
+    def test_invalid_token_runs_locally(self):
+        write_daemon_info(self.server.port, "invalid", self.daemon_info_file)
+        self.assertEqual((None, "", ""), self.forward(["cmc.py", "detail", "--uid", "123"]))
+
+    def test_no_daemon_runs_locally(self):
+        remove_daemon_info(self.daemon_info_file)
+        self.assertIsNone(read_daemon_info(self.daemon_info_file))
+        self.assertEqual((None, "", ""), self.forward(["cmc.py", "detail", "--uid", "123"]))
+
+    def test_is_daemon_command(self):
+        self.assertTrue(is_daemon_command(["cmc.py", "analyse", "--rule", "YARA_MOVEMENTS_BASIC"]))
+        self.assertTrue(is_daemon_command(["cmc.py", "get-logs", "--uid", "123"]))
+        self.assertFalse(is_daemon_command(["cmc.py", "clear-cache"]))
+        self.assertFalse(is_daemon_command(["cmc.py", "git", "list", "projects"]))
+        self.assertFalse(is_daemon_command(["cmc.py", "serve"]))
+        self.assertTrue(is_daemon_command(["cmc.py", "--env", "OAT", "-v", "detail", "--uid", "123"]))
+        self.assertFalse(is_daemon_command(["cmc.py", "clear-cache", "--rule", "list"]))
+        self.assertFalse(is_daemon_command(["cmc.py", "webpack", "--uid", "detail"]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,145 @@
+import unittest
+from collections import defaultdict
+
+from main.config.constants import ELASTIC_CFG, CONFIG, ELASTICSEARCH_INDEX
+from main.http.elk_proxy import ElasticsearchProxy, DISCOVERY_AGGREGATION, _load_es_query_template, \
+    extract_correlation_lines
+
+UID_1 = "d3001b5a-ad37-4032-a91d-71d1ad5e4441"
+UID_2 = "8a3d3300-9d51-43c2-819b-4ca95bba1126"
+
+
+def create_hit(message, host="eu-prd-1", source="/opt/logs/eu0000000002", timestamp="2020-07-28T12:21:11.000Z"):
+    return {"_source": {"message": message, "host": {"name": host}, "source": source, "@timestamp": timestamp}}
+
+
+class FakeElasticsearch:
+    """Serves search_after paged searches over the given hits, reporting the total as elasticsearch caps it"""
+
+    def __init__(self, hits):
+        self.hits = [dict(hit, sort=[position]) for position, hit in enumerate(hits)]
+        self.queries = []
+
+    def search(self, index, body):
+        self.queries.append(body)
+        start = body["search_after"][0] + 1 if "search_after" in body else 0
+        return {"hits": {"total": {"value": min(len(self.hits), 10000), "relation": "gte" if len(self.hits) > 10000 else "eq"},
+                         "hits": self.hits[start:start + body["size"]]}}
+
+
+class ElasticsearchProxyTest(unittest.TestCase):
+
+    def test_search_after_fetches_beyond_max_result_limit(self):
+        proxy = ElasticsearchProxy.__new__(ElasticsearchProxy)
+        proxy.merged_app_cfg = {ELASTIC_CFG: {CONFIG: {"elasticsearch_batch_size": 5000, "elasticsearch_max_result_limit": 10000, ELASTICSEARCH_INDEX: "logs"}}}
+        proxy.es = FakeElasticsearch([create_hit("line {}".format(position)) for position in range(12000)])
+        query_json = ElasticsearchProxy._prepare_elastic_search_batch_query([UID_1, UID_2], "2020-07-28T12:21:10.000Z", "2020-07-28T12:25:15.000Z")
+        result = proxy._handle_search_after_results(query_json)
+        self.assertEqual(12000, len(result["hits"]["hits"]))
+        self.assertEqual("line 11999", result["hits"]["hits"][-1]["_source"]["message"])
+        self.assertEqual(3, len(proxy.es.queries))
+        self.assertNotIn("from", proxy.es.queries[-1])
+
+    def test_prepare_elastic_search_batch_query(self):
+        query_json = ElasticsearchProxy._prepare_elastic_search_batch_query([UID_1, UID_2], "2020-07-28T12:21:10.000Z", "2020-07-28T12:25:15.000Z")
+        bool_query = query_json['query']['bool']
+        self.assertFalse('must' in bool_query)
+        self.assertEqual(1, bool_query['minimum_should_match'])
+        self.assertEqual(["d3001b5a ad37 4032 a91d 71d1ad5e4441", "8a3d3300 9d51 43c2 819b 4ca95bba1126"],
+                         [clause['multi_match']['query'] for clause in bool_query['should']])
+        self.assertEqual("phrase", bool_query['should'][0]['multi_match']['type'])
+        self.assertEqual("2020-07-28T12:21:10.000Z", bool_query['filter'][0]['range']['@timestamp']['gte'])
+        self.assertEqual("2020-07-28T12:25:15.000Z", bool_query['filter'][0]['range']['@timestamp']['lte'])
+
+    def test_prepare_elastic_search_query(self):
+        query_json = ElasticsearchProxy._prepare_elastic_search_query(UID_1, "2020-08-03T09:00:00.000Z", None)
+        bool_query = query_json['query']['bool']
+        self.assertEqual("d3001b5a ad37 4032 a91d 71d1ad5e4441", bool_query['must'][0]['multi_match']['query'])
+        self.assertEqual("2020-08-03T09:00:00.000Z", bool_query['filter'][0]['range']['@timestamp']['gte'])
+        template = _load_es_query_template()
+        self.assertEqual(template['query']['bool']['filter'][0]['range']['@timestamp']['lte'], bool_query['filter'][0]['range']['@timestamp']['lte'])
+        self.assertNotEqual(template['query']['bool']['filter'][0]['range']['@timestamp']['gte'], bool_query['filter'][0]['range']['@timestamp']['gte'])
+
+    def test_prepared_queries_do_not_share_state(self):
+        first_query = ElasticsearchProxy._prepare_elastic_search_query(UID_1, None, None)
+        second_query = ElasticsearchProxy._prepare_elastic_search_query(UID_2, None, None)
+        ElasticsearchProxy._prepare_query_for_timestamp_asc_sort(first_query)
+        self.assertEqual(len(_load_es_query_template()['sort']), len(second_query['sort']))
+        self.assertEqual("8a3d3300 9d51 43c2 819b 4ca95bba1126", second_query['query']['bool']['must'][0]['multi_match']['query'])
+
+    def test_prepare_correlation_query(self):
+        query_json = ElasticsearchProxy._prepare_elastic_search_query(UID_1, "2020-07-28T12:21:10.000Z", "2020-07-28T12:25:15.000Z")
+        correlation_query = ElasticsearchProxy._prepare_correlation_query(["JCoServerThread-6@T-2ccbcdb6"], query_json)
+        bool_query = correlation_query['query']['bool']
+        self.assertFalse('must' in bool_query)
+        self.assertEqual(["JCoServerThread 6@T 2ccbcdb6"], [clause['multi_match']['query'] for clause in bool_query['should']])
+        self.assertEqual(query_json['query']['bool']['filter'], bool_query['filter'])
+        self.assertEqual({"_score": {"order": "desc"}}, correlation_query['sort'][0])
+        self.assertTrue('must' in query_json['query']['bool'])
+
+    def test_group_hits_by_message_uid(self):
+        start_hit = create_hit("[JCoServerThread-6@T-2ccbcdb6] [PoolingWorkflow] start processing message [uniqueId [{}]]".format(UID_1))
+        end_hit = create_hit("[managed-out-transform(3f2e83ee)] [PoolingWorkflow] message [{}] processed in [220] ms".format(UID_2))
+        both_hit = create_hit("Split {} into {}".format(UID_1, UID_2))
+        other_hit = create_hit("Heartbeat")
+        result = {"hits": {"total": {"value": 4}, "hits": [start_hit, end_hit, both_hit, other_hit]}}
+
+        grouped = ElasticsearchProxy._group_hits_by_message_uid([UID_1, UID_2], result)
+        self.assertEqual([start_hit, both_hit], grouped[UID_1]["hits"]["hits"])
+        self.assertEqual(2, grouped[UID_1]["hits"]["total"]["value"])
+        self.assertEqual([end_hit, both_hit], grouped[UID_2]["hits"]["hits"])
+
+    def test_extract_correlation_lines(self):
+        hits = [
+            create_hit("[JCoServerThread-6@T-2ccbcdb6] [PoolingWorkflow] start processing message [uniqueId [{}]]".format(UID_1)),
+            create_hit("[managed-out-transform(3f2e83ee)] [com.adaptris.core.PoolingWorkflow] message [{}] processed in [220] ms".format(UID_1),
+                       host="eu-prd-2", timestamp="2020-07-28T12:21:12.000Z"),
+            create_hit("[JCoServerThread-7@T-3ccbcdb6] [PoolingWorkflow] start processing message [uniqueId [{}]]".format(UID_2)),
+            create_hit("[JCoServerThread-6@T-2ccbcdb6] [PoolingWorkflow] Split {}".format(UID_1)),
+            {"_id": "no source"}
+        ]
+        self.assertEqual([("eu-prd-1", "/opt/logs/eu0000000002", "JCoServerThread-6@T-2ccbcdb6", True, "2020-07-28T12:21:11.000Z"),
+                          ("eu-prd-2", "/opt/logs/eu0000000002", "managed-out-transform(3f2e83ee)", False, "2020-07-28T12:21:12.000Z")],
+                         list(extract_correlation_lines(UID_1, hits)))
+
+    def test_group_hits_without_results(self):
+        grouped = ElasticsearchProxy._group_hits_by_message_uid([UID_1], None)
+        self.assertEqual({UID_1: {"hits": {"total": {"value": 0}, "hits": []}}}, grouped)
+
+    def test_prepare_discovery_aggregation_query(self):
+        query_json = ElasticsearchProxy._prepare_elastic_search_batch_query([UID_1], "2020-07-28T12:21:10.000Z", "2020-07-28T12:25:15.000Z")
+        aggregation_query = ElasticsearchProxy._prepare_discovery_aggregation_query(query_json, {"host": "eu-prd-1", "logfile": "/opt/logs/eu0000000002"})
+        self.assertEqual(0, aggregation_query['size'])
+        self.assertEqual(query_json['query'], aggregation_query['query'])
+        self.assertIsNot(query_json['query'], aggregation_query['query'])
+        composite = aggregation_query['aggs'][DISCOVERY_AGGREGATION]['composite']
+        self.assertEqual(["host.name", "source"], [list(source.values())[0]['terms']['field'] for source in composite['sources']])
+        self.assertEqual({"host": "eu-prd-1", "logfile": "/opt/logs/eu0000000002"}, composite['after'])
+
+    def test_collect_discovery_buckets(self):
+        start_hit = create_hit("[JCoServerThread-6@T-2ccbcdb6] [PoolingWorkflow] start processing message [uniqueId [{}]]".format(UID_1))
+        result = {"hits": {"total": {"value": 12}, "hits": []},
+                  "aggregations": {DISCOVERY_AGGREGATION: {
+                      "after_key": {"host": "eu-prd-2", "logfile": "/opt/logs/eu0000000003"},
+                      "buckets": [
+                          {"key": {"host": "eu-prd-1", "logfile": "/opt/logs/eu0000000002"}, "doc_count": 10,
+                           "processing_lines": {"doc_count": 1, "lines": {"hits": {"hits": [start_hit]}}}},
+                          {"key": {"host": "eu-prd-2", "logfile": "/opt/logs/eu0000000003"}, "doc_count": 2,
+                           "processing_lines": {"doc_count": 0, "lines": {"hits": {"hits": []}}}}]}}}
+        host_log_dict = defaultdict(list)
+        correlation_lines = []
+        after_key = ElasticsearchProxy._collect_discovery_buckets(result, host_log_dict, correlation_lines)
+        self.assertEqual({"host": "eu-prd-2", "logfile": "/opt/logs/eu0000000003"}, after_key)
+        self.assertEqual({"eu-prd-1": ["/opt/logs/eu0000000002"], "eu-prd-2": ["/opt/logs/eu0000000003"]}, host_log_dict)
+        self.assertEqual([start_hit], correlation_lines)
+
+    def test_collect_discovery_buckets_last_page(self):
+        result = {"hits": {"total": {"value": 0}, "hits": []},
+                  "aggregations": {DISCOVERY_AGGREGATION: {"buckets": []}}}
+        host_log_dict = defaultdict(list)
+        self.assertIsNone(ElasticsearchProxy._collect_discovery_buckets(result, host_log_dict, []))
+        self.assertFalse(host_log_dict)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -269,6 +269,33 @@ class DocumentEmptyFieldsParserTest(AbstractFieldsParserTest):
         self.assertEqual([1, 'shipto_address_4, order_date', None, None], csv_2d_array[0])
         self.assertEqual([1, None, 1, 'order_qty, order_uom'], csv_2d_array[1])
 
+    def test_parse_json_payload_streamed_matches_full_parse(self):
+        parameters_map = {
+            "document_header_root": "movements",
+            "document_lines_root": "movement_lines",
+            FIELD_TYPE: "all"
+        }
+        payload_str = json.dumps({"movements": [
+            {"movement_lines": [{"order_qty": None, "order_uom": "KG"}, {"order_qty": 2, "order_uom": ""}], "order_date": None},
+            {"order_date": "2020-05-01", "movement_lines": [], "shipto_code": ""}
+        ]})
+        sut = self.createSUT(parameters_map)
+        streamed_result = sut.parse({"payload": "\n  " + payload_str})
+        self.assertEqual(sut._parse_json_document(json.loads(payload_str)), streamed_result)
+        self.assertEqual(2, len(streamed_result.get("documents")))
+        self.assertHasLineValues('[{"index": 1, "fields": ["order_qty"]}, {"index": 2, "fields": ["order_uom"]}]', streamed_result)
+        self.assertEqual(["order_date"], streamed_result.get("documents")[0].get("header_fields"))
+        self.assertEqual(["shipto_code"], streamed_result.get("documents")[1].get("header_fields"))
+
+    def test_parse_json_payload_missing_document_root(self):
+        parameters_map = {
+            "document_header_root": "movements",
+            "document_lines_root": "movement_lines",
+            FIELD_TYPE: "all"
+        }
+        result_map = self.createSUT(parameters_map).parse({"payload": '{"orders": [{"order_date": null}]}'})
+        self.assertEqual({"documents": []}, result_map)
+
     def test_read_xml(self):
         payload_str = read_payload_file(XML_MOVEMENT_FILE)
         xml = bytes(bytearray(payload_str, encoding='utf-8'))
@@ -0,0 +1,142 @@
+import json
+import re
+import unittest
+from types import SimpleNamespace
+
+from main.http import gitlab_index
+from main.http.gitlab_index import GitlabIndex, fetch_all_pages, REFRESHED_AT, LAST_ACTIVITY_OVERLAP, format_gitlab_datetime
+from main.model.model_utils import CacheMissException
+
+
+class DictCache:
+    """In memory stand in for the proxy cache"""
+
+    def __init__(self):
+        self.results = {}
+
+    def get_cache_result_dict(self, url):
+        if url in self.results:
+            return json.loads(self.results[url])
+        raise CacheMissException(url)
+
+    def store_cache_result_dict(self, url, data, duration):
+        self.results[url] = json.dumps(data)
+
+
+class FakeGitlabList:
+    """Lazy listing as python-gitlab returns it, holding the first page and fetching the others as it is iterated over"""
+
+    def __init__(self, manager, list_options, per_page):
+        self.manager = manager
+        self.list_options = list_options
+        self.per_page = per_page
+        self.records = manager.get_page(1, per_page, list_options)
+        self.page_count = -(-len(manager.records_matching(list_options)) // per_page)
+        self.total_pages = self.page_count if manager.report_total_pages else None
+
+    def __iter__(self):
+        yield from self.records
+        # Follows the next page links, which stop at the last page
+        for page in range(2, self.page_count + 1):
+            yield from self.manager.get_page(page, self.per_page, self.list_options)
+
+
+class FakeManager:
+    """Serves list requests from the given records as a python-gitlab manager would
+
+    Given a page, or as_list, a plain list of the one page is returned, otherwise a lazy listing of all the pages.
+    """
+
+    def __init__(self, records, report_total_pages=True):
+        self.records = records
+        self.report_total_pages = report_total_pages
+        self.requests = []
+
+    def records_matching(self, list_options):
+        last_activity_after = list_options.get("last_activity_after")
+        return [record for record in self.records if not last_activity_after or record.last_activity_at > last_activity_after]
+
+    def get_page(self, page, per_page, list_options):
+        self.requests.append((page, list_options))
+        return self.records_matching(list_options)[(page - 1) * per_page:page * per_page]
+
+    def list(self, as_list=True, page=None, per_page=20, **list_options):
+        if page or as_list:
+            return self.get_page(page or 1, per_page, list_options)
+        return FakeGitlabList(self, list_options, per_page)
+
+
+class FakeProjectManager(FakeManager):
+
+    def __init__(self, records, branches):
+        FakeManager.__init__(self, records)
+        self.branches = branches
+
+    def get(self, project_id, lazy=False):
+        return SimpleNamespace(branches=self.branches[project_id])
+
+
+def create_project(project_id, name, last_activity_at="2020-08-01T10:00:00Z", namespace_id=10):
+    return SimpleNamespace(id=project_id, name=name, path_with_namespace="adapters/{}".format(name), visibility="private",
+                           description="", archived=False, last_activity_at=last_activity_at,
+                           namespace={"id": namespace_id, "full_path": "adapters" if namespace_id == 10 else "other"})
+
+
+def create_branch(name):
+    return SimpleNamespace(name=name, merged=False, protected=True, developers_can_push=False, developers_can_merge=False,
+                           can_push=True, default=name == "master", web_url="https://gitlab/{}".format(name))
+
+
+class GitlabIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.branches = {1: FakeManager([create_branch("master")]), 2: FakeManager([create_branch("master"), create_branch("develop")])}
+        self.projects = FakeProjectManager([create_project(1, "cirrus-adapter"), create_project(2, "ice-adapter", namespace_id=11)], self.branches)
+        self.groups = FakeManager([SimpleNamespace(id=10, name="adapters", path="adapters", full_path="adapters", visibility="private", description="")])
+        self.git_interface = SimpleNamespace(url="https://gitlab", projects=self.projects, groups=self.groups)
+        self.cache = DictCache()
+
+    def test_fetch_all_pages(self):
+        manager = FakeManager([SimpleNamespace(id=record_id) for record_id in range(250)])
+        self.assertEqual(list(range(250)), [record.id for record in fetch_all_pages(manager)])
+        self.assertEqual([1, 2, 3], sorted(page for page, _ in manager.requests))
+
+    def test_fetch_all_pages_without_page_count(self):
+        manager = FakeManager([SimpleNamespace(id=record_id) for record_id in range(250)], report_total_pages=False)
+        self.assertEqual(250, len(fetch_all_pages(manager)))
+        self.assertEqual([1, 2, 3], [page for page, _ in manager.requests])
+
+    def test_index_is_cached(self):
+        self.assertEqual(["ice-adapter", "cirrus-adapter"], [project.name for project in GitlabIndex(self.git_interface, self.cache).projects()])
+        self.projects.requests.clear()
+        self.assertEqual(["adapters"], [group.name for group in GitlabIndex(self.git_interface, self.cache).groups()])
+        self.assertEqual([], self.projects.requests)
+
+    def test_search_and_group_projects(self):
+        index = GitlabIndex(self.git_interface, self.cache)
+        self.assertEqual(["ice-adapter"], [project.name for project in index.search_projects(re.compile("ice"))])
+        self.assertEqual(["cirrus-adapter"], [project.name for project in index.projects_for_group("adapters")])
+        self.assertEqual(["cirrus-adapter"], [project.name for project in index.projects_for_group("10")])
+
+    def test_incremental_refresh(self):
+        index = GitlabIndex(self.git_interface, self.cache)
+        index.projects()
+        refreshed_at = index._index[REFRESHED_AT] - gitlab_index.INDEX_REFRESH_INTERVAL - 1
+        index._index[REFRESHED_AT] = refreshed_at
+        self.projects.records.append(create_project(3, "loki-adapter", last_activity_at="2099-01-01T00:00:00Z"))
+        self.projects.requests.clear()
+        self.assertEqual(["loki-adapter", "ice-adapter", "cirrus-adapter"], [project.name for project in index.projects()])
+        self.assertEqual([(1, {"last_activity_after": format_gitlab_datetime(refreshed_at - LAST_ACTIVITY_OVERLAP)})], self.projects.requests)
+
+    def test_branches_fetched_again_after_activity(self):
+        index = GitlabIndex(self.git_interface, self.cache)
+        self.assertEqual(["master", "develop"], [branch.name for branch in index.branches_for_project("adapters/ice-adapter")])
+        index.branches_for_project(2)
+        self.assertEqual(1, len(self.branches[2].requests))
+        index._index["projects"]["2"]["last_activity_at"] = "2099-01-01T00:00:00Z"
+        index.branches_for_project(2)
+        self.assertEqual(2, len(self.branches[2].requests))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,139 @@
+import unittest
+from types import SimpleNamespace
+
+from gitlab.exceptions import GitlabListError
+
+from main.http.gitlab_index import GitlabIndex
+from main.http.gitlab_proxy import GitlabProxy, GITLAB_DEFAULT_LIST_SIZE
+from test.test_gitlab_index import DictCache, FakeManager, create_project
+
+
+class FakeCommitManager:
+    """Lists the project's commits newest first, keeping the filters it was asked for"""
+
+    def __init__(self, commits):
+        self.commits = commits
+        self.requests = []
+
+    def list(self, **list_options):
+        self.requests.append(list_options)
+        return iter(self.commits)
+
+
+class FailingManager:
+    """Lists as GitLab does for a project with an empty repository or the container registry disabled"""
+
+    def list(self, **list_options):
+        raise GitlabListError("404 Not Found", 404)
+
+
+class FakeProjectManager:
+
+    def __init__(self, projects):
+        self.projects = projects
+
+    def get(self, project_id, lazy=False):
+        return self.projects[project_id]
+
+
+class FakeIndex:
+
+    def __init__(self, projects):
+        self.projects = projects
+
+    def projects_for_group(self, group):
+        return self.projects
+
+
+def create_commit(commit_id, committed_date):
+    return SimpleNamespace(id=commit_id, title="commit {}".format(commit_id), committed_date=committed_date)
+
+
+def create_registry_project(tag_names):
+    repository = SimpleNamespace(tags=SimpleNamespace(list=lambda **list_options: [SimpleNamespace(name=name) for name in tag_names]))
+    return SimpleNamespace(repositories=SimpleNamespace(list=lambda: [repository, repository]))
+
+
+class FakeIndexedProjectManager(FakeManager):
+    """Project listing for the index, with the commits of each project"""
+
+    def __init__(self, records, commits):
+        FakeManager.__init__(self, records)
+        self.commits = commits
+
+    def get(self, project_id, lazy=False):
+        return SimpleNamespace(commits=self.commits[project_id])
+
+
+def create_proxy(index_projects, projects):
+    # Skips the constructor, which reads the GitLab configuration
+    proxy = GitlabProxy.__new__(GitlabProxy)
+    proxy.git_interface = SimpleNamespace(projects=FakeProjectManager(projects))
+    proxy.index = FakeIndex(index_projects)
+    return proxy
+
+
+class GitlabProxyTest(unittest.TestCase):
+
+    def setUp(self):
+        self.index_projects = [SimpleNamespace(id=1, name="ice-adapter"), SimpleNamespace(id=2, name="cirrus-adapter")]
+        self.commits = {
+            1: FakeCommitManager([create_commit("c", "2020-08-19T12:00:00.000+01:00"), create_commit("a", "2020-08-19T09:00:00.000+01:00")]),
+            2: FakeCommitManager([create_commit("b", "2020-08-19T10:30:00.000Z")] + [create_commit("old", "2019-01-01T00:00:00.000Z")] * 30)
+        }
+
+    def test_group_commits_merged_newest_first(self):
+        proxy = create_proxy(self.index_projects, {project_id: SimpleNamespace(commits=manager) for project_id, manager in self.commits.items()})
+        commits = list(proxy.iter_commits_for_group("adapters", {'all': False}, {"since": "2019-01-01T00:00:00Z", "ref_name": "master"}))
+        self.assertEqual(["c", "b", "a"], [commit.id for _, commit in commits[:3]])
+        self.assertEqual(["ice-adapter", "cirrus-adapter", "ice-adapter"], [project.name for project, _ in commits[:3]])
+        self.assertEqual(GITLAB_DEFAULT_LIST_SIZE, len(commits))
+        self.assertEqual("2019-01-01T00:00:00Z", self.commits[1].requests[0]["since"])
+        self.assertEqual("master", self.commits[2].requests[0]["ref_name"])
+
+    def test_all_group_commits(self):
+        proxy = create_proxy(self.index_projects, {project_id: SimpleNamespace(commits=manager) for project_id, manager in self.commits.items()})
+        self.assertEqual(33, len(list(proxy.iter_commits_for_group("adapters", {'all': True}))))
+
+    def test_group_tags_by_project_name(self):
+        proxy = create_proxy(self.index_projects, {1: create_registry_project(["1.0"]), 2: create_registry_project(["2.0", "2.1"])})
+        tags = [(project.name, tag.name) for project, tag in proxy.iter_tags_for_group("adapters", {'all': False})]
+        self.assertEqual([("cirrus-adapter", "2.0"), ("cirrus-adapter", "2.1"), ("cirrus-adapter", "2.0"), ("cirrus-adapter", "2.1"),
+                          ("ice-adapter", "1.0"), ("ice-adapter", "1.0")], tags)
+
+    def test_group_commits_from_index(self):
+        commits = {1: FakeManager([create_commit("a", "2020-08-19T09:00:00.000Z")] * 150),
+                   2: FakeManager([create_commit("b", "2020-08-19T10:00:00.000Z")]),
+                   3: FakeManager([create_commit("c", "2020-08-19T11:00:00.000Z")])}
+        projects = FakeIndexedProjectManager([create_project(1, "cirrus-adapter"), create_project(2, "ice-adapter"),
+                                              create_project(3, "loki-adapter", namespace_id=11)], commits)
+        groups = FakeManager([SimpleNamespace(id=10, name="adapters", path="adapters", full_path="adapters", visibility="private", description="")])
+        proxy = GitlabProxy.__new__(GitlabProxy)
+        proxy.git_interface = SimpleNamespace(url="https://gitlab", projects=projects, groups=groups)
+        proxy.index = GitlabIndex(proxy.git_interface, DictCache())
+        group_commits = list(proxy.iter_commits_for_group("adapters", {'all': True}, {"ref_name": "master"}))
+        self.assertEqual(["b"] + ["a"] * 150, [commit.id for _, commit in group_commits])
+        self.assertEqual([(1, {"ref_name": "master"}), (2, {"ref_name": "master"})], commits[1].requests)
+        self.assertEqual([], commits[3].requests)
+
+    def test_failing_project_skipped(self):
+        failing_project = SimpleNamespace(commits=FailingManager(), repositories=FailingManager())
+        proxy = create_proxy(self.index_projects, {1: failing_project, 2: SimpleNamespace(commits=self.commits[2])})
+        with self.assertLogs('requester', level='WARNING'):
+            commits = list(proxy.iter_commits_for_group("adapters", {'all': True}))
+        self.assertEqual(31, len(commits))
+        self.assertEqual({"cirrus-adapter"}, {project.name for project, _ in commits})
+
+        proxy = create_proxy(self.index_projects, {1: failing_project, 2: create_registry_project(["2.0"])})
+        with self.assertLogs('requester', level='WARNING'):
+            tags = [(project.name, tag.name) for project, tag in proxy.iter_tags_for_group("adapters", {'all': False})]
+        self.assertEqual([("cirrus-adapter", "2.0"), ("cirrus-adapter", "2.0")], tags)
+
+    def test_group_without_projects(self):
+        proxy = create_proxy([], {})
+        self.assertEqual([], list(proxy.iter_commits_for_group("empty", {'all': False})))
+        self.assertEqual([], list(proxy.iter_tags_for_group("empty", {'all': False})))
+
+
+if __name__ == '__main__':
+    unittest.main()
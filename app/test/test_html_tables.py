@@ -0,0 +1,124 @@
+import json
+import unittest
+
+from main.config.constants import ADM_CONFIGS, ADM_LOCATIONS, ADM_SCRIPTS
+from main.http.adm_proxy import ADMProxy
+from main.http.html_tables import parse_html_document, find_first_with_class, get_header_cells, get_body_rows, \
+    extract_table, TABLE_HEADER, TABLE_ROWS
+from main.http.ice_proxy import ICEProxy
+from test.test_gitlab_index import DictCache
+
+ADM_PAGE = """<?xml version="1.0" encoding="UTF-8"?>
+<html><body>
+<table>
+<thead><tr><td>Project</td><td>Location</td></tr></thead>
+<tbody>
+<tr><td>cirrus-adapter</td><td>/opt/adapters/cirrus &amp; co</td></tr>
+<tr><td>ice-adapter</td><td><a href="#">/opt/adapters/ice</a></td></tr>
+</tbody>
+</table>
+<tr><td>dynamic-adapter</td><td>/opt/adapters/dynamic</td></tr>
+</body></html>
+"""
+
+ICE_PAGE = """<html><body>
+<div class="panel panel-default"><div class="panel-body">
+<table>
+<thead><tr><th>Community</th><th>In Progress Messages</th><th>Failed Event Messages</th><th>Heartbeat Failures</th><th>CALM Alerts</th></tr></thead>
+<tbody>
+<tr><td> EU </td><td>1</td><td>2</td><td>6</td><td>7</td></tr>
+<tr><td>US</td><td>22</td><td>69 view summary</td><td>0</td><td>11</td></tr>
+<tr><td>incomplete</td></tr>
+</tbody>
+</table>
+</div></div>
+</body></html>
+"""
+
+
+LOGIN_PAGE = """<html><body><form action="j_security_check"><input type="text" name="j_username"/></form></body></html>"""
+
+
+class PageServingADMProxy(ADMProxy):
+    """Serves the adm page for every endpoint rather than fetching it"""
+
+    def __init__(self, page=ADM_PAGE):
+        ADMProxy.__init__(self)
+        self.page = page
+        self.fetched_urls = []
+
+    def get_app_endpoint_url2(self, endpoint_name, merged_app_cfg):
+        return endpoint_name
+
+    def parse_data_document(self, url, merged_app_cfg, endpoint_cfg=None):
+        self.fetched_urls.append(url)
+        return parse_html_document(self.page)
+
+
+class HtmlTablesTest(unittest.TestCase):
+
+    def test_header_and_body_rows(self):
+        document = parse_html_document(ADM_PAGE)
+        self.assertEqual(["Project", "Location"], get_header_cells(document))
+        self.assertEqual([["cirrus-adapter", "/opt/adapters/cirrus & co"], ["ice-adapter", "/opt/adapters/ice"]], get_body_rows(document))
+
+    def test_all_rows_outside_thead(self):
+        document = parse_html_document(ADM_PAGE)
+        rows = get_body_rows(document, True)
+        self.assertEqual(3, len(rows))
+        self.assertEqual(["cirrus-adapter", "ice-adapter"], [row[0] for row in rows[0:2]])
+
+    def test_missing_table(self):
+        document = parse_html_document("<html><body><p>To access this page, you need to login</p></body></html>")
+        self.assertIsNone(get_header_cells(document))
+        self.assertIsNone(get_body_rows(document))
+        self.assertIsNone(find_first_with_class(document, "div", "panel-body"))
+
+    def test_empty_page(self):
+        self.assertIsNone(parse_html_document(""))
+        self.assertIsNone(find_first_with_class(None, "div", "panel-body"))
+
+    def test_extract_table_survives_cache_round_trip(self):
+        table = extract_table(parse_html_document(ADM_PAGE))
+        self.assertEqual(table, json.loads(json.dumps(table)))
+        self.assertEqual(["Project", "Location"], table[TABLE_HEADER])
+
+    def test_filter_cached_adm_rows(self):
+        table = json.loads(json.dumps(extract_table(parse_html_document(ADM_PAGE))))
+        self.assertEqual([["ice-adapter", "/opt/adapters/ice"]], ADMProxy.filter_project_rows(table[TABLE_ROWS], 0, {"ice-adapter"}))
+        self.assertEqual([], ADMProxy.filter_project_rows(table[TABLE_ROWS], 5, {"ice-adapter"}))
+
+    def test_adm_snapshot_fetches_every_page(self):
+        proxy = PageServingADMProxy()
+        snapshot = dict(proxy.iter_snapshot({}))
+        self.assertEqual(set(ADMProxy.ADM_SNAPSHOT_PAGES), set(snapshot.keys()))
+        self.assertEqual(sorted(ADMProxy.ADM_SNAPSHOT_PAGES), sorted(proxy.fetched_urls))
+        self.assertEqual(4, len(snapshot[ADM_CONFIGS]))
+        self.assertEqual(3, len(snapshot[ADM_LOCATIONS]))
+
+    def test_adm_snapshot_for_projects(self):
+        snapshot = dict(PageServingADMProxy().iter_snapshot({}, {"ice-adapter"}))
+        self.assertEqual([["Project", "Location"], ["ice-adapter", "/opt/adapters/ice"]], snapshot[ADM_LOCATIONS])
+        self.assertEqual([["Project", "Location"]], snapshot[ADM_SCRIPTS])
+
+    def test_only_found_tables_are_cached(self):
+        proxy = PageServingADMProxy(LOGIN_PAGE)
+        proxy.initialised = True
+        proxy.cache = DictCache()
+        self.assertEqual([[]], proxy.get_all_data(ADM_LOCATIONS, {}))
+        self.assertEqual({}, proxy.cache.results)
+        proxy.page = ADM_PAGE
+        self.assertEqual(3, len(proxy.get_all_data(ADM_LOCATIONS, {})))
+        self.assertEqual(1, len(proxy.cache.results))
+
+    def test_ice_table_data(self):
+        main_panel = find_first_with_class(parse_html_document(ICE_PAGE), "div", "panel-body")
+        self.assertEqual(["Community", "In Progress Messages", "Failed Event Messages", "Heartbeat Failures", "CALM Alerts"], get_header_cells(main_panel, "th"))
+        table_data = ICEProxy.__new__(ICEProxy)._obtain_table_data(get_body_rows(main_panel), ICEProxy.CALM_DASHBOARD_COLUMNS_MAP)
+        self.assertEqual([{"Community": "EU", "In Progress Messages": "1", "Failed Event Messages": "2", "Heartbeat Failures": "6", "CALM Alerts": "7"},
+                          {"Community": "US", "In Progress Messages": "22", "Failed Event Messages": "69 ", "Heartbeat Failures": "0", "CALM Alerts": "11"}],
+                         table_data)
+
+
+if __name__ == '__main__':
+    unittest.main()
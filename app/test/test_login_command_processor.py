@@ -0,0 +1,49 @@
+import threading
+import unittest
+
+from main.config.constants import APPLICATIONS
+from main.login_command_processor import LoginCommandProcessor
+
+CONFIGURATION = {APPLICATIONS: [
+    {"name": "CIRRUS", "env": [{"name": "PRD", "region": "EU"}, {"name": "PRD", "region": "US"}, {"name": "OAT", "region": "EU"}]},
+    {"name": "ADM", "env": [{"name": "*", "region": "*"}]},
+    {"name": "ICE", "env": [{"name": "PRD", "region": "*"}]},
+    {"name": "LOKI", "env": [{"name": "PRD", "region": "*"}]}
+]}
+
+
+class RecordingLoginCommandProcessor(LoginCommandProcessor):
+    """Records the logins rather than logging into the sites, failing those for the US"""
+
+    def __init__(self):
+        self.configuration = CONFIGURATION
+        self.login_threads = set()
+        self.logins = []
+
+    def login_to_target(self, system, env, region):
+        self.login_threads.add(threading.current_thread().name)
+        self.logins.append((system, env, region))
+        return "Unauthorised" if region == "US" else None
+
+
+class LoginCommandProcessorTest(unittest.TestCase):
+
+    def test_configured_login_targets(self):
+        processor = RecordingLoginCommandProcessor()
+        self.assertEqual([("CIRRUS", "PRD", "EU"), ("CIRRUS", "PRD", "US"), ("CIRRUS", "OAT", "EU"), ("ADM", "OAT", "US"), ("ICE", "PRD", "US")],
+                         processor.get_configured_login_targets("OAT", "US"))
+
+    def test_login_to_targets(self):
+        processor = RecordingLoginCommandProcessor()
+        login_targets = processor.get_configured_login_targets("PRD", "EU")
+        results = dict(processor.login_to_targets(login_targets))
+        self.assertEqual(set(login_targets), set(processor.logins))
+        self.assertEqual({("CIRRUS", "PRD", "US"): "Unauthorised"}, {target: error for target, error in results.items() if error})
+        self.assertNotIn(threading.current_thread().name, processor.login_threads)
+
+    def test_login_to_no_targets(self):
+        self.assertEqual([], list(RecordingLoginCommandProcessor().login_to_targets([])))
+
+
+if __name__ == '__main__':
+    unittest.main()
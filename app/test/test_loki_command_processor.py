@@ -0,0 +1,74 @@
+import json
+import unittest
+
+from main.config.constants import VERBOSE, OUTPUT, NDJSON, CSV, DataType
+from main.formatter.formatter import DynamicFormatter
+from main.loki_command_processor import LokiCommandProcessor
+
+LOKI_RESPONSE = {
+    "status": "success",
+    "data": {
+        "resultType": "streams",
+        "result": [
+            {"stream": {"app": "adapter", "pod": "adapter-1"},
+             "values": [["1597831516000000000", json.dumps({"time": "2020-08-19T10:05:16Z", "pod": "adapter-1", "log": "msg produced 1"})],
+                        ["1597831517000000000", json.dumps({"time": "2020-08-19T10:05:17Z", "pod": "adapter-1", "log": "msg produced 2"})]]},
+            {"stream": {"app": "adapter", "pod": "adapter-2"},
+             "values": [["1597831518000000000", 'level=info msg="msg produced 3"']]}
+        ]
+    }
+}
+
+
+class CollectingFormatter(DynamicFormatter):
+    """Keeps the ndjson and csv lines rather than logging them"""
+
+    def __init__(self):
+        DynamicFormatter.__init__(self)
+        self.lines = []
+
+    def _format_to_ndjson(self, data_records):
+        self.lines.extend(json.dumps(record) for record in data_records)
+
+    def _format_to_csv(self, data_records, headings):
+        self.lines.extend(self._csv_data_generator(data_records, headings))
+
+
+class LokiCommandProcessorTest(unittest.TestCase):
+
+    def test_rows_for_every_stream_value(self):
+        rows = LokiCommandProcessor.process_response_data(LOKI_RESPONSE, {VERBOSE: False})
+        self.assertEqual([["msg produced 1"], ["msg produced 2"], ['level=info msg="msg produced 3"']], rows)
+
+    def test_verbose_rows(self):
+        rows = LokiCommandProcessor.process_response_data(LOKI_RESPONSE, {VERBOSE: True})
+        self.assertEqual(["2020-08-19T10:05:16Z", "adapter-1", "msg produced 1"], rows[0])
+
+    def test_rows_are_lazy(self):
+        rows = LokiCommandProcessor.iter_response_rows(LOKI_RESPONSE, {VERBOSE: False})
+        self.assertEqual(["msg produced 1"], next(rows))
+
+    def test_empty_response(self):
+        self.assertEqual([], LokiCommandProcessor.process_response_data({"status": "success", "data": {"result": []}}, {VERBOSE: False}))
+
+    def test_format_stream_ndjson(self):
+        formatter = CollectingFormatter()
+        options = {VERBOSE: False, OUTPUT: NDJSON}
+        formatter.format_stream(DataType.loki_logs, LokiCommandProcessor.iter_response_rows(LOKI_RESPONSE, options), options)
+        self.assertEqual({"log": "msg produced 1"}, json.loads(formatter.lines[0]))
+        self.assertEqual(3, len(formatter.lines))
+
+    def test_format_stream_csv(self):
+        formatter = CollectingFormatter()
+        options = {VERBOSE: True, OUTPUT: CSV}
+        formatter.format_stream(DataType.loki_logs, LokiCommandProcessor.iter_response_rows(LOKI_RESPONSE, options), options)
+        self.assertEqual(["time, pod, log", "2020-08-19T10:05:16Z, adapter-1, msg produced 1"], formatter.lines[0:2])
+
+    def test_ndjson_of_a_single_dict(self):
+        with self.assertLogs('message', level='INFO') as captured_logs:
+            DynamicFormatter()._format_to_ndjson({"message_uid": "123", "status": "FAILED"})
+        self.assertEqual([{"message_uid": "123", "status": "FAILED"}], [json.loads(record.getMessage()) for record in captured_logs.records])
+
+
+if __name__ == '__main__':
+    unittest.main()
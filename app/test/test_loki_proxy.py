@@ -0,0 +1,106 @@
+import json
+import unittest
+from unittest import mock
+
+from main.http import loki_proxy
+from main.http.loki_proxy import LokiProxy, split_time_window
+from main.model.model_utils import CacheMissException
+
+ADAPTER_STREAM = {"app": "adapter", "pod": "adapter-1"}
+ROUTER_STREAM = {"app": "router", "pod": "router-1"}
+
+
+class DictCache:
+    """In memory stand in for the proxy cache"""
+
+    def __init__(self):
+        self.results = {}
+
+    def get_cache_result_dict(self, url):
+        if url in self.results:
+            return json.loads(self.results[url])
+        raise CacheMissException(url)
+
+    def store_cache_result_dict(self, url, data, duration):
+        self.results[url] = json.dumps(data)
+
+
+class FakeLokiProxy(LokiProxy):
+    """Serves query_range requests from the given (timestamp, stream, line) entries as loki would"""
+
+    def __init__(self, entries):
+        self.entries = sorted(entries, key=lambda entry: entry[0])
+        self.requests = []
+        self.cache = DictCache()
+
+    def get_endpoint_url(self, env, query_str, start_nanos=None, end_nanos=None):
+        return start_nanos, end_nanos
+
+    def execute_loki_request(self, url, form_data, headers):
+        self.requests.append(url)
+        start_nanos, end_nanos = url
+        page = [entry for entry in self.entries if start_nanos <= entry[0] < end_nanos][:loki_proxy.LOKI_PAGE_LIMIT]
+        streams = {}
+        for timestamp, stream, line in page:
+            streams.setdefault(tuple(sorted(stream.items())), {"stream": stream, "values": []})["values"].append([str(timestamp), line])
+        return {"status": "success", "data": {"resultType": "streams", "result": list(streams.values())}}
+
+
+class LokiProxyTest(unittest.TestCase):
+
+    def test_split_time_window(self):
+        self.assertEqual([(0, 10), (10, 20), (20, 25)], split_time_window(0, 25, 10))
+        self.assertEqual([], split_time_window(25, 25, 10))
+
+    def test_split_time_window_on_slice_grid(self):
+        self.assertEqual([(5, 10), (10, 20), (20, 25)], split_time_window(5, 25, 10))
+        self.assertEqual([(12, 18)], split_time_window(12, 18, 10))
+
+    def test_convert_datetime_to_unix_nanos(self):
+        self.assertEqual(1597831516123000000, LokiProxy.convert_datetime_to_unix_nanos("2020-08-19T10:05:16.123Z"))
+
+    @mock.patch.object(loki_proxy, "LOKI_PAGE_LIMIT", 3)
+    def test_fetch_slice_pages_through_limit(self):
+        entries = [(1, ADAPTER_STREAM, "a1"), (2, ROUTER_STREAM, "r2"), (3, ADAPTER_STREAM, "a3"),
+                   (3, ROUTER_STREAM, "r3"), (3, ADAPTER_STREAM, "a3b"), (5, ADAPTER_STREAM, "a5")]
+        proxy = FakeLokiProxy(entries)
+        streams = proxy.fetch_slice("PRD", "{app=~'.+'}", 0, 10)
+        lines = sorted((int(value[0]), value[1]) for stream in streams.values() for value in stream["values"])
+        self.assertEqual(sorted((timestamp, line) for timestamp, _, line in entries), lines)
+        self.assertTrue(len(proxy.requests) > 1)
+
+    @mock.patch.object(loki_proxy, "LOKI_PAGE_LIMIT", 3)
+    def test_fetch_slice_moves_past_timestamp_with_too_many_lines(self):
+        entries = [(4, ADAPTER_STREAM, "a{}".format(index)) for index in range(5)] + [(6, ROUTER_STREAM, "r6")]
+        proxy = FakeLokiProxy(entries)
+        streams = proxy.fetch_slice("PRD", "{app=~'.+'}", 0, 10)
+        self.assertEqual(4, sum(len(stream["values"]) for stream in streams.values()))
+        self.assertEqual([(0, 10), (4, 10), (5, 10)], proxy.requests)
+
+    def test_settled_slice_is_cached(self):
+        proxy = FakeLokiProxy([(1, ADAPTER_STREAM, "a1"), (12, ROUTER_STREAM, "r12")])
+        first_streams = proxy.fetch_cached_slice("PRD", "{app=~'.+'}", 0, 10, 20)
+        second_streams = proxy.fetch_cached_slice("PRD", "{app=~'.+'}", 0, 10, 20)
+        self.assertEqual(first_streams, second_streams)
+        self.assertEqual([(0, 10)], proxy.requests)
+
+    def test_recent_slice_is_not_cached(self):
+        proxy = FakeLokiProxy([(1, ADAPTER_STREAM, "a1"), (12, ROUTER_STREAM, "r12")])
+        proxy.fetch_cached_slice("PRD", "{app=~'.+'}", 10, 20, 15)
+        proxy.fetch_cached_slice("PRD", "{app=~'.+'}", 10, 20, 15)
+        self.assertEqual([(10, 20), (10, 20)], proxy.requests)
+        self.assertEqual({}, proxy.cache.results)
+
+    def test_merge_slice_streams(self):
+        first_slice = {("app", "adapter"): {"stream": ADAPTER_STREAM, "values": [["1", "a1"], ["2", "a2"]]}}
+        second_slice = {("app", "adapter"): {"stream": ADAPTER_STREAM, "values": [["11", "a11"]]},
+                        ("app", "router"): {"stream": ROUTER_STREAM, "values": [["12", "r12"]]}}
+        merged = LokiProxy.merge_slice_streams([first_slice, second_slice])
+        result = merged["data"]["result"]
+        self.assertEqual(2, len(result))
+        self.assertEqual([["1", "a1"], ["2", "a2"], ["11", "a11"]], result[0]["values"])
+        self.assertEqual(ROUTER_STREAM, result[1]["stream"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -265,6 +265,22 @@ class DocumentMandatoryFieldsParserTest(AbstractFieldsParserTest):
         self.assertHasHeaderValues('{"index": 1, "header_fields": ["shipto_address_4"]}', result_map)
         self.assertHasLineValues('[{"index": 1, "fields": ["order_qty"]}]', result_map)
 
+    def test_parse_xml_payload_mandatory_fields_filtered_or_absent(self):
+        parameters_map = {
+            "document_header_root": "movements",
+            "document_lines_root": "movement_lines",
+            "header_exclude_fields": ["order_date"],
+            "document_header_mandatory_fields": ["order_date", "order_number", "not_present"],
+            "document_lines_mandatory_fields": ["order_qty", "line_number"],
+            "type": "all"
+        }
+        payload_str = '<o><movements class="object"><order_date>2020-05-01</order_date><order_number>5503087</order_number>' \
+                      '<movement_lines><e><line_number>1</line_number><order_qty></order_qty><order_qty>3</order_qty></e>' \
+                      '<e><line_number>2</line_number><order_qty>4</order_qty></e></movement_lines></movements></o>'
+        result_map = self.createSUT(parameters_map).parse({"payload": payload_str})
+        self.assertHasHeaderValues('{"index": 1, "header_fields": ["order_date", "not_present"]}', result_map)
+        self.assertHasLineValues('[{"index": 1, "fields": ["order_qty"]}]', result_map)
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
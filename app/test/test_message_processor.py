@@ -1,5 +1,11 @@
+import contextlib
 import importlib
+import io
+import os
+import tempfile
+import threading
 import unittest
+from types import SimpleNamespace
 # import main.algorithms.algorithms.AbstractAlgorithm
 # import main.message_processor.DataRequisites
 
@@ -27,5 +33,76 @@ class MessageProcessorTest(unittest.TestCase):
         self.assertTrue("get_analysis_data" in object_methods)
 
 
+class ReadMessageUidsTest(unittest.TestCase):
+    def test_read_message_uids(self):
+        from main.message_processor import read_message_uids
+        with tempfile.TemporaryDirectory() as temp_dir:
+            uid_file = os.path.join(temp_dir, "uids.txt")
+            with open(uid_file, 'w') as uid_file_handler:
+                uid_file_handler.write("324324-23434-3423423\n\n  324324-23434-3423424 \n324324-23434-3423423\n")
+            self.assertEqual(["324324-23434-3423423", "324324-23434-3423424"], read_message_uids(uid_file))
+
+
+class DetailCirrusMessagesTest(unittest.TestCase):
+    """Batch detail with the cirrus retrieval and the log server replaced by stand ins"""
+
+    def setUp(self):
+        from main.message_processor import MessageProcessor
+        from main.model.message_model import Message
+        from main.utils.utils import error_and_exit
+        self.formatted_uids = []
+        self.lookups = []
+        self.server_locations = {}
+        self.processor = MessageProcessor.__new__(MessageProcessor)
+        self.processor._elasticsearch_proxy = SimpleNamespace(lookup_messages=self.lookup_messages)
+        self.processor._elastic_merged_app_cfg = None
+        self.processor.details_formatter = SimpleNamespace(format_message_model=self.format_message_model)
+
+        # The slow message is only retrieved once another has been output
+        self.first_output = threading.Event()
+
+        def retrieve_cirrus_message_details(message_uid, merged_app_cfg):
+            if message_uid == "unknown":
+                error_and_exit("Message unique id is unknown")
+            if message_uid == "slow":
+                self.assertTrue(self.first_output.wait(5))
+            msg_model = Message()
+            msg_model.add_message_uid(message_uid)
+            msg_model.payloads_list = []
+            return msg_model
+        self.processor._retrieve_cirrus_message_details = retrieve_cirrus_message_details
+
+    def format_message_model(self, msg_model, options):
+        self.formatted_uids.append(msg_model.message_uid)
+        self.server_locations[msg_model.message_uid] = msg_model.server_location_dict if msg_model.has_server_location else None
+        self.first_output.set()
+
+    def lookup_messages(self, message_payloads_dict):
+        self.lookups.append(sorted(message_payloads_dict))
+        return {message_uid: {"message_id": message_uid} for message_uid in message_payloads_dict}
+
+    def test_failed_uid_exits_after_the_others_are_detailed(self):
+        with self.assertRaises(SystemExit) as exit_context, contextlib.redirect_stderr(io.StringIO()):
+            self.processor.detail_cirrus_messages(["324324-1", "unknown", "324324-2"], {}, {})
+        self.assertEqual(1, exit_context.exception.code)
+        self.assertEqual(["324324-1", "324324-2"], sorted(self.formatted_uids))
+        self.assertEqual(["324324-1", "324324-2"], sorted(uid for lookup in self.lookups for uid in lookup))
+        self.assertEqual({"message_id": "324324-1"}, self.server_locations["324324-1"])
+
+    def test_messages_output_as_they_complete(self):
+        self.processor.detail_cirrus_messages(["slow", "324324-1"], {}, {})
+        self.assertEqual(["324324-1", "slow"], self.formatted_uids)
+        self.assertEqual([["324324-1"], ["slow"]], self.lookups)
+
+    def test_messages_output_when_the_lookup_fails(self):
+        def failing_lookup(message_payloads_dict):
+            raise ConnectionError("log server unavailable")
+        self.processor._elasticsearch_proxy = SimpleNamespace(lookup_messages=failing_lookup)
+        with self.assertRaises(SystemExit) as exit_context, contextlib.redirect_stderr(io.StringIO()):
+            self.processor.detail_cirrus_messages(["324324-1", "unknown"], {}, {})
+        self.assertEqual(1, exit_context.exception.code)
+        self.assertEqual(["324324-1"], self.formatted_uids)
+        self.assertIsNone(self.server_locations["324324-1"])
+
 if __name__ == '__main__':
     unittest.main()
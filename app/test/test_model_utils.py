@@ -3,7 +3,11 @@ import unittest
 
 from main.config.constants import TRANSFORM, VALIDATE
 from main.model.model_utils import translate_step_type_to_payload_type, XALAN, SAXON, XMLJSON, JSONXML, \
-    is_valid_step_type
+    is_valid_step_type, obtain_transform_details_from_payload_tracking_point, get_matching_transform_and_step, \
+    build_transform_index, lookup_transform_and_step, build_payload_index_map, get_payload_index
+from test.test_utils import read_json_data_file
+
+TRANSFORM_FILE = os.path.join(os.path.dirname(__file__), './resources/yara_msg_transforms.json')
 
 
 class ModelUtilsTest(unittest.TestCase):
@@ -30,16 +34,38 @@ class ModelUtilsTest(unittest.TestCase):
         pass
 
     def test_get_matching_transform_and_step(self):
-        pass
+        transforms_list = read_json_data_file(TRANSFORM_FILE)
+        transform_obj, transform_step = get_matching_transform_and_step(transforms_list, TRANSFORM, "Movement - COP", "Extension Replacement")
+        self.assertEqual(transforms_list[0], transform_obj)
+        self.assertEqual("Extension Replacement", transform_step.get("transform-step-name"))
+        self.assertEqual((None, None), get_matching_transform_and_step(transforms_list, VALIDATE, "Movement - COP", "Extension Replacement"))
+
+    def test_build_transform_index(self):
+        transforms_list = read_json_data_file(TRANSFORM_FILE)
+        transform_index = build_transform_index(transforms_list)
+        for current_transform in transforms_list:
+            for current_step in current_transform.get("transform-steps"):
+                for stage_type in [TRANSFORM, VALIDATE, "BAD"]:
+                    transform_name = current_transform.get("transform-name")
+                    step_name = current_step.get("transform-step-name")
+                    self.assertEqual(get_matching_transform_and_step(transforms_list, stage_type, transform_name, step_name),
+                                     lookup_transform_and_step(transform_index, stage_type, transform_name, step_name))
+        self.assertEqual((None, None), lookup_transform_and_step(transform_index, TRANSFORM, "missing", "missing"))
+        self.assertEqual({}, build_transform_index(None))
 
     def test_get_transform_step_from_payload(self):
         pass
 
     def test_obtain_transform_details_from_payload_tracking_point(self):
-        pass
+        result = obtain_transform_details_from_payload_tracking_point({"tracking-point": "TRANSFORM - Movement - COP(Extension Replacement)"})
+        self.assertEqual(("TRANSFORM", "Movement - COP", "Extension Replacement"), result)
+        self.assertIsNone(obtain_transform_details_from_payload_tracking_point({"tracking-point": "IN"}))
 
     def test_get_payload_index(self):
-        pass
+        payloads_list = [{"tracking-point": "IN"}, {"tracking-point": "ROUTE"}, {"tracking-point": "IN"}, {"tracking-point": "OUT"}]
+        payload_index_map = build_payload_index_map(payloads_list)
+        for tracking_point in ["IN", "ROUTE", "OUT", "SEND"]:
+            self.assertEqual(get_payload_index(tracking_point, payloads_list), payload_index_map.get(tracking_point, -1))
 
     def test_get_payload_object(self):
         pass
@@ -144,6 +144,27 @@ class PayloadTransformMapperTest(unittest.TestCase):
         result = sut.wrapped_get_variable_resolved_url(transform_obj, transform_step)
         self.assertEqual("http://mappings.f4f.com/${gremlin}/uk0000000037/ext-replacement.xsl", result)
 
+    def test_map_resolves_env_urls_once_per_template(self):
+        transform_steps = [{"transform-step-name": "Step {}".format(index), "transform-step-type": "XALAN",
+                            "url": "http://mappings.f4f.com/${ENV}/uk0000000037/step-" + str(index % 2) + ".xsl"} for index in range(4)]
+        transforms = [{"transform-name": "Movement", "transform-pre-metadata": [{"metadata-name": "ENV", "metadata-value": "${ENV}"}],
+                       "transform-steps": transform_steps}]
+        payloads = [{"tracking-point": "TRANSFORM - Movement(Step {})".format(index)} for index in range(4)]
+        proxy = MockCirrusProxy(valid_urls=["http://mappings.f4f.com/PRD/uk0000000037/step-0.xsl", "http://mappings.f4f.com/prd/uk0000000037/step-1.xsl"])
+        sut = PayloadTransformMapper(payloads, transforms, proxy)
+        sut.map()
+        urls = [record["url"] for record in sut.get_records()]
+        self.assertEqual(["http://mappings.f4f.com/PRD/uk0000000037/step-0.xsl", "http://mappings.f4f.com/prd/uk0000000037/step-1.xsl"] * 2, urls)
+        # live & PRD for the first template, live, PRD & prd for the second
+        self.assertEqual(5, len(proxy.checked_urls))
+
+        # A second mapper sharing the cache should not issue any further requests
+        second_proxy = MockCirrusProxy()
+        second_sut = PayloadTransformMapper(payloads, transforms, second_proxy, sut.resolved_url_cache)
+        second_sut.map()
+        self.assertEqual(urls, [record["url"] for record in second_sut.get_records()])
+        self.assertEqual([], second_proxy.checked_urls)
+
     def test_find_transform_metadata_simple(self):
         search_key = "transform-pre-metadata"
         transform_obj = dict(self.transforms_list[0])
@@ -186,10 +207,15 @@ class PayloadTransformMapperTest(unittest.TestCase):
 
 
 class MockCirrusProxy:
-    def __init__(self, url_lookup_result=True):
+    def __init__(self, url_lookup_result=True, valid_urls=None):
         self.check_result = url_lookup_result
+        self.valid_urls = valid_urls
+        self.checked_urls = []
 
     def check_if_valid_url(self, url):
+        self.checked_urls.append(url)
+        if self.valid_urls is not None:
+            return url in self.valid_urls
         return self.check_result
 
 
@@ -0,0 +1,30 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+APP_FOLDER = os.path.join(os.path.dirname(__file__), '..')
+# Third party libraries that should only be loaded by the commands that need them
+HEAVY_MODULES = ["selenium", "elasticsearch", "gitlab", "bs4", "lxml", "tabulate", "dateutil", "yaml"]
+
+IMPORT_SCRIPT = """
+import json, sys
+import cmc
+print(json.dumps({"modules": [name for name in %r if name in sys.modules]}))
+""" % HEAVY_MODULES
+
+
+def import_entry_point():
+    output = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT], cwd=APP_FOLDER, check=True, stdout=subprocess.PIPE).stdout
+    return json.loads(output.decode("utf-8").strip().splitlines()[-1])
+
+
+class StartupTest(unittest.TestCase):
+
+    def test_no_heavy_modules_loaded_on_import(self):
+        self.assertEqual([], import_entry_point()["modules"])
+
+
+if __name__ == '__main__':
+    unittest.main()